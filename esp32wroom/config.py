@@ -58,8 +58,15 @@ WIFI_CONFIG = {
     # Station Mode (Connect to existing router)
     'STA_SSID': "iPhone (188)",
     'STA_PASSWORD': "12345678",
-    'STA_TIMEOUT': 15,  # Connection timeout in seconds
-    
+    'STA_TIMEOUT': 15,  # Connection timeout in seconds (scan path)
+    'FAST_CONNECT_TIMEOUT': 4,  # Seconds for the cached BSSID/lease attempt
+    'CACHE_PATH': '/wifi_cache.json',  # Last access point, channel and IP lease
+    'REUSE_LEASE': True,  # Set the cached lease statically (skips DHCP)
+    'CHECK_INTERVAL_MS': 2000,  # Link check period once connected
+    'RETRY_MIN_S': 2,     # First reconnect backoff, doubles per failure
+    'RETRY_MAX_S': 300,   # Backoff ceiling
+    'INFO_REFRESH_S': 60,  # Cached addresses/RSSI refresh for pages and APIs
+
     # Access Point Mode (Create own hotspot)
     'AP_SSID': "ESP32-CAM",
     'AP_PASSWORD': "12345678",
@@ -69,6 +76,21 @@ WIFI_CONFIG = {
     'AP_DNS': "8.8.8.8"
 }
 
+# SNTP: the RTC keeps local time (UTC + UTC_OFFSET_S) for alarms, photo names and logs
+NTP_CONFIG = {
+    'ENABLED': True,
+    'SERVERS': ['pool.ntp.org', 'time.google.com'],  # Or (ip, port) tuples
+    'PORT': 123,
+    'UTC_OFFSET_S': 0,         # Time zone, e.g. -3 * 3600
+    'TIMEOUT_MS': 1500,        # Per request
+    'SAMPLES': 3,              # Requests per sync; the shortest round trip wins
+    'RESYNC_S': 3600,
+    'RETRY_S': 30,             # After a failed sync
+    'MIN_DRIFT_SPAN_S': 600,   # Shortest sync interval used to estimate drift
+    'CORRECT_INTERVAL_S': 60,  # Drift correction check between syncs
+    'CORRECT_STEP_MS': 100     # Smallest correction written to the RTC
+}
+
 # =============================================================================
 # CAMERA CONFIGURATION
 # =============================================================================
@@ -86,7 +108,99 @@ CAMERA_CONFIG = {
     'XCLK_FREQ': 20000000,  # 20MHz external clock
     'FORMAT': 4,  # camera.JPEG
     'FB_LOCATION': 1,  # camera.PSRAM
-    'INIT_RETRIES': 3
+    'INIT_RETRIES': 3,
+    'SETTINGS_PATH': '/camera_settings.json',  # Last saved settings, restored on boot
+    'RESIZE_DISCARD_FRAMES': 1,  # Stale frames dropped after a framesize change
+    'IDLE_POWER_DOWN': True,     # Deinit the camera when nothing uses it
+    'IDLE_TIMEOUT_S': 120        # Seconds without a capture before power-down
+}
+
+# Named capture profiles - overrides on top of the saved settings.
+# 'resolution' takes a camera constant name.
+CAMERA_PROFILES = {
+    'stream': {},                                         # Saved settings as-is
+    'snapshot': {'quality': 10},                          # Best JPEG quality
+    'night': {'quality': 12, 'brightness': 2, 'contrast': 1, 'saturation': -1},
+    'timelapse': {'resolution': 'FRAME_QQVGA', 'quality': 30},
+    'thumbnail': {'resolution': 'FRAME_QQVGA', 'quality': 30}
+}
+
+# =============================================================================
+# MOTION CAPTURE CONFIGURATION
+# =============================================================================
+
+MOTION_CONFIG = {
+    'PRE_TRIGGER_ENABLED': True,      # Keep a frame ring while armed
+    'PRE_TRIGGER_FRAMES': 4,          # Frames kept from before the PIR edge
+    'PRE_TRIGGER_INTERVAL_MS': 250,   # Ring sampling period while armed
+    'RING_MAX_BYTES': 64 * 1024,      # PSRAM budget for the whole ring
+    'POST_TRIGGER_FRAMES': 3,         # Burst captured after the PIR edge
+    'POST_TRIGGER_INTERVAL_MS': 150,  # Delay between burst frames
+    'FRAME_CACHE_MAX_AGE_MS': 80      # Reuse a frame younger than this
+}
+
+VISION_CONFIG = {
+    'ENABLED': False,                 # Needs firmware with camera.pixformat()
+    'WIDTH': 96,                      # Grayscale sample size (FRAME_96X96)
+    'HEIGHT': 96,
+    'BLOCK_SIZE': 8,                  # Difference computed per 8x8 block
+    'SAMPLE_INTERVAL_MS': 500,
+    'TIME_BUDGET_MS': 30,             # Max CPU per frame (pure Python path)
+    'PIXEL_STRIDE': 2,                # Pixel subsampling inside a block
+    'LEARN_SHIFT': 3,                 # Background learning rate 1/2^n
+    'BLOCK_THRESHOLD': 12,            # Mean abs difference of a changed block
+    'FULL_CONFIDENCE_FRACTION': 0.2,  # Changed share of a zone = confidence 1.0
+    'ZONES': [
+        # {'name': 'door', 'rect': (0.0, 0.0, 0.5, 1.0), 'weight': 1.0}
+    ],
+    'PIR_WEIGHT': 0.4,                # PIR alone is not enough when vision runs
+    'VISION_WEIGHT': 0.6,
+    'FUSION_THRESHOLD': 0.5
+}
+
+MOTION_EVENT_CONFIG = {
+    'CAPACITY': 512,                  # Events kept (13 bytes each in RAM)
+    'PATH': '/motion_events.bin',
+    'PERSIST_INTERVAL_S': 300,        # Flash write at most this often
+    'MAX_RESULTS': 100                # Events returned per query
+}
+
+# =============================================================================
+# PHOTO STORAGE CONFIGURATION
+# =============================================================================
+
+PHOTO_LOG_CONFIG = {
+    'STORAGE_PATH': '/photos',
+    'SEGMENT_BYTES': 192 * 1024,  # Size of one append-only segment file
+    'MAX_SEGMENTS': 6,            # Oldest segment is reclaimed beyond this
+    'ENTRIES_PER_SEGMENT': 64,    # Index slots in each segment header
+    'MIN_FREE_BYTES': 64 * 1024   # Filesystem headroom kept free
+}
+
+THUMBNAIL_CONFIG = {
+    'ENABLED': True,              # Capture a small preview for each motion event
+    'PROFILE': 'thumbnail',       # 160x120 - roughly a tenth of a QVGA photo
+    'PAGE_SIZE': 20,              # Default /api/photos page length
+    'MAX_PAGE_SIZE': 50
+}
+
+CLIP_CONFIG = {
+    'ENABLED': False,             # Record an AVI clip on every motion event
+    'STORAGE_PATH': '/clips',
+    'DURATION_S': 5,              # Seconds recorded after the trigger
+    'FPS': 5,
+    'INCLUDE_PRE_TRIGGER': True,  # Start the clip with the ring frames
+    'CHUNK_BYTES': 4096,          # Flash write size (one littlefs block)
+    'MAX_CLIPS': 4,               # Oldest clip is deleted beyond this
+    'MAX_FRAMES': 120             # Hard cap on frames per clip
+}
+
+TIMELAPSE_CONFIG = {
+    'INTERVAL_S': 60,             # Seconds between timelapse frames
+    'PROFILE': 'timelapse',       # Camera profile of reduced captures
+    'QUOTA_BYTES': 256 * 1024,    # Photo log bytes timelapse may use
+    'PLAYBACK_FPS': 10,           # /timelapse playback speed
+    'REUSE_MAX_AGE_MS': 2000      # Reuse a cached frame this fresh
 }
 
 # =============================================================================
@@ -115,7 +229,12 @@ ALARM_CONFIG = {
     'MAX_ALARM_DURATION': 30, # minutes
     'ALARM_TYPES': ['gentle', 'normal', 'urgent'],
     'DEFAULT_ALARM_TYPE': 'gentle',
-    'SUNRISE_SIMULATION_DURATION': 300  # seconds (5 minutes)
+    'SUNRISE_SIMULATION_DURATION': 300,  # seconds (5 minutes)
+    'SUNRISE_STEP_MS': 250,              # Strip update cadence during the sunrise
+    'SUNRISE_LUT_STEPS': 64,             # Colour table entries (interpolated between)
+    'SCHEDULE_PATH': '/alarms.json',     # Alarms persist across reboots
+    'MAX_ALARMS': 8,
+    'MAX_ARM_S': 600          # Longest single wait before re-checking the clock
 }
 
 # =============================================================================
@@ -168,6 +287,65 @@ SYSTEM_CONFIG = {
     'AUTO_RESTART_ON_ERROR': True
 }
 
+# Modules listed in EAGER are built during boot; the others are constructed,
+# libraries and all, the first time something uses them. By default only the
+# modules that do nothing unless loaded are eager: motion (PIR polling) and
+# alarm (scheduled alarms). The camera powers up on the first capture, and the
+# alarm builds sensors/rgb when it needs them. Trade-off: background reactions
+# only use modules that are already loaded, so until a request touches them
+# there is no motion alert sound ('audio') or strip flash and status colours
+# ('rgb'). Add those (or 'camera', 'sensors') to have them from boot, at the
+# cost of boot time and heap.
+LAZY_INIT_CONFIG = {
+    'ENABLED': True,  # False builds every module at boot
+    'EAGER': ['alarm', 'motion']  # Also: 'camera', 'sensors', 'rgb', 'audio', 'timelapse'
+}
+
+EVENT_BUS_CONFIG = {
+    'QUEUE_SIZE': 16,        # Preallocated event slots; publishes beyond are dropped
+    'BATCH': 4,              # Events dispatched per scheduler slice
+    'LISTENER_BACKLOG': 8,   # Events buffered per /api/events client
+    'SSE_MAX_CLIENTS': 2,
+    'SSE_KEEPALIVE_S': 15
+}
+
+# All sounds share one playback engine; a higher class (alarm > motion >
+# notification > ui) preempts a lower one. ROUTES picks the output per class:
+# 'audio' = PWMAudio board, 'buzzer' = passive PWM buzzer, 'active' = active buzzer.
+AUDIO_CONFIG = {
+    'QUEUE_SIZE': 4,         # Sounds waiting behind the one playing; more are dropped
+    'NOTE_GAP_MS': 50,       # Default pause between notes
+    'ROUTES': {
+        'alarm': 'buzzer',
+        'motion': 'audio',
+        'notification': 'audio',
+        'ui': 'audio'
+    },
+    'RESUME': ['alarm', 'motion'],           # Classes that continue after being preempted
+    'FALLBACK': ['audio', 'buzzer', 'active']  # When the routed device is not loaded
+}
+
+# Periodic and one-shot work (LED off, alarm auto-stop, snooze, sensor reads,
+# status refresh, camera idle) runs from one timer wheel; the main loop sleeps
+# until the next deadline instead of polling.
+TIMER_CONFIG = {
+    'TICK_SHIFT': 3,         # Bucket width 2^3 = 8 ms; deadlines stay 1 ms exact
+    'SLOTS': 64,             # Power of two (one rotation = 512 ms)
+    'MAX_SLEEP_MS': 500,     # Longest sleep, so timers added by other tasks are seen
+    'MOTION_POLL_MS': 100,   # PIR / frame motion check
+    'STATUS_MS': 30000,      # Status refresh, rules inputs, gc
+    'CLOCK_MS': 1000         # Time-of-day rules inputs
+}
+
+# Rules: [{"name", "all": [[input, op, value(, high)]], "any": [...],
+#          "actions": [{"type": "rgb"|"sound"|"capture", ...}], "cooldown_s"}]
+# Inputs: temperature_c, humidity, motion, motion_count, alarm_active,
+# alarm_enabled, wake_adjust_min, connected, hour, minute, weekday
+AUTOMATION_CONFIG = {
+    'ENABLED': True,
+    'RULES_PATH': '/rules.json'
+}
+
 # =============================================================================
 # HARDWARE PROFILES
 # =============================================================================
@@ -5,27 +5,44 @@ import sys
 import gc
 import utime
 import camera
-import network
 import ulogging as logging
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
 
 # Import configuration
 from config import (
-    WIFI_CONFIG, CAMERA_CONFIG, SYSTEM_CONFIG, 
-    get_camera_pin_config, get_system_status
+    WIFI_CONFIG, CAMERA_CONFIG, SYSTEM_CONFIG, LAZY_INIT_CONFIG, AUTOMATION_CONFIG, TIMER_CONFIG,
+    NTP_CONFIG
 )
 
 # Import modules
 sys.path.append('modules')
 import web_server
-from environmental_sensor import EnvironmentalSensor
-from alarm_system import SmartAlarmSystem
-from rgb_strip import RGBStrip
-from motion_detector import MotionDetector
-from pwm_audio import PWMAudio
+from frame_cache import frame_cache
+from camera_power import camera_power
+from boot_orchestrator import BootOrchestrator
+from network_manager import network_manager
+from time_sync import time_sync
+from event_bus import event_bus, MOTION, ALARM, RULE
+from lazy_modules import ModuleRegistry, LazyModule, loaded
+from rules_engine import RulesEngine
+from timer_wheel import timer_wheel
 
 # Import pins from config
 from config import SMART_HOME_PINS
 
+# Automation 'sound' action names -> PWMAudio methods
+SOUND_ACTIONS = {
+    'motion': 'play_motion_alert',
+    'capture': 'play_photo_capture_sound',
+    'alarm': 'play_alarm_sound',
+    'success': 'play_success_sound',
+    'error': 'play_error_sound',
+    'notification': 'play_notification_beep'
+}
+
 class SmartHomeSystem:
     def __init__(self):
         """Initialize the complete Smart Home System"""
@@ -38,6 +55,9 @@ class SmartHomeSystem:
         self.wifi_ap = None
         self.camera_initialized = False
         self.web_server = None
+        self.boot = BootOrchestrator()
+        self.modules = ModuleRegistry()
+        self.rules = None
         
         # Smart home modules
         self.env_sensor = None
@@ -45,6 +65,7 @@ class SmartHomeSystem:
         self.rgb_strip = None
         self.motion_detector = None
         self.pwm_audio = None
+        self.timelapse = None
         
         # System status
         self.system_status = {
@@ -56,6 +77,7 @@ class SmartHomeSystem:
             'rgb_ok': False,
             'motion_ok': False,
             'audio_ok': False,
+            'timelapse_ok': False,
             'web_server_ok': False
         }
         
@@ -63,68 +85,38 @@ class SmartHomeSystem:
         print("=" * 50)
     
     def initialize_wifi(self):
-        """Initialize WiFi in dual mode (STA + AP)"""
+        """Initialize WiFi in dual mode (STA + AP) - uasyncio coroutine
+        
+        The network manager connects through the cached access point and
+        lease when it can and keeps reconnecting in the background.
+        """
         print("📡 Setting up WiFi connections...")
         
         try:
-            # Clean up any existing connections
-            try:
-                temp_sta = network.WLAN(network.STA_IF)
-                temp_ap = network.WLAN(network.AP_IF)
-                if temp_sta.active():
-                    temp_sta.disconnect()
-                    temp_sta.active(False)
-                if temp_ap.active():
-                    temp_ap.active(False)
-                utime.sleep(0.5)
-            except:
-                pass
-            
-            # Setup Access Point
-            self.wifi_ap = network.WLAN(network.AP_IF)
-            self.wifi_ap.active(False)
-            utime.sleep(0.1)
-            
-            # Configure AP with settings from config
-            ap_config = [
+            # Setup Access Point with settings from config
+            ap_config = (
                 WIFI_CONFIG['AP_IP'],
                 WIFI_CONFIG['AP_SUBNET'],
                 WIFI_CONFIG['AP_GATEWAY'],
                 WIFI_CONFIG['AP_DNS']
-            ]
-            self.wifi_ap.ifconfig(ap_config)
-            self.wifi_ap.active(True)
-            self.wifi_ap.config(
-                essid=WIFI_CONFIG['AP_SSID'],
-                authmode=network.AUTH_WPA_WPA2_PSK,
-                password=WIFI_CONFIG['AP_PASSWORD']
             )
-            utime.sleep(1)
-            
-            if self.wifi_ap.active():
+            self.wifi_ap = network_manager.ap
+            if network_manager.start_ap(WIFI_CONFIG['AP_SSID'], WIFI_CONFIG['AP_PASSWORD'], ap_config):
                 self.system_status['wifi_ap_ok'] = True
-                print(f"✅ AP Mode: {WIFI_CONFIG['AP_SSID']} - IP: {self.wifi_ap.ifconfig()[0]}")
+                print(f"✅ AP Mode: {WIFI_CONFIG['AP_SSID']} - IP: {network_manager.ap_ip}")
             
-            # Setup Station Mode
-            self.wifi_sta = network.WLAN(network.STA_IF)
-            self.wifi_sta.active(False)
-            utime.sleep(0.1)
-            self.wifi_sta.active(True)
+            # Setup Station Mode; the status flag follows the link from now on
+            self.wifi_sta = network_manager.sta
+            network_manager.on_change(self.on_wifi_change)
+            print(f"🔄 Connecting to {WIFI_CONFIG['STA_SSID']}...")
+            if not (yield from network_manager.connect()):
+                print("⚠️  STA connection failed - AP mode still available, retrying in background")
+            asyncio.get_event_loop().create_task(network_manager.monitor())
             
-            if not self.wifi_sta.isconnected():
-                print(f"🔄 Connecting to {WIFI_CONFIG['STA_SSID']}...")
-                self.wifi_sta.connect(WIFI_CONFIG['STA_SSID'], WIFI_CONFIG['STA_PASSWORD'])
-                
-                timeout = WIFI_CONFIG['STA_TIMEOUT']
-                while not self.wifi_sta.isconnected() and timeout > 0:
-                    utime.sleep(1)
-                    timeout -= 1
-                
-                if self.wifi_sta.isconnected():
-                    self.system_status['wifi_sta_ok'] = True
-                    print(f"✅ STA Mode: Connected - IP: {self.wifi_sta.ifconfig()[0]}")
-                else:
-                    print("⚠️  STA connection failed - AP mode still available")
+            # RTC from NTP as soon as the station is up, re-synced in the background
+            if NTP_CONFIG.get('ENABLED', True):
+                time_sync.on_change(self.on_clock_set)
+                asyncio.get_event_loop().create_task(time_sync.run(network_manager.is_connected))
             
         except Exception as e:
             print(f"❌ WiFi setup error: {e}")
@@ -132,37 +124,32 @@ class SmartHomeSystem:
         
         return True
     
+    def on_wifi_change(self, connected):
+        """Network manager callback: station link went up or down"""
+        self.system_status['wifi_sta_ok'] = connected
+    
+    def on_clock_set(self):
+        """Time sync callback: the RTC was stepped, re-plan the alarms"""
+        alarm_system = loaded(self.alarm_system)
+        if alarm_system:
+            alarm_system.clock_changed()
+    
     def initialize_camera(self):
-        """Initialize camera with configuration settings"""
+        """Initialize camera with configuration settings - uasyncio coroutine"""
         print("📷 Initializing camera...")
         
         retries = CAMERA_CONFIG['INIT_RETRIES']
         
         for attempt in range(retries):
             try:
-                # Deinitialize if already initialized
-                camera.deinit()
-                utime.sleep(0.1)
-                
-                # Get camera pins from config
-                pins = get_camera_pin_config()
-                
-                # Initialize with config settings using proper camera constants
-                camera.init(
-                    0,  # Camera ID
-                    d0=pins['D0'], d1=pins['D1'], d2=pins['D2'], d3=pins['D3'],
-                    d4=pins['D4'], d5=pins['D5'], d6=pins['D6'], d7=pins['D7'],
-                    format=camera.JPEG,  # Use camera constant
-                    xclk_freq=camera.XCLK_20MHz,  # Use camera constant
-                    href=pins['HREF'], vsync=pins['VSYNC'],
-                    reset=pins['RESET'], pwdn=pins['PWDN'],
-                    sioc=pins['SIOC'], siod=pins['SIOD'],
-                    xclk=pins['XCLK'], pclk=pins['PCLK'],
-                    fb_location=camera.PSRAM  # Use camera constant
-                )
+                # Deinitialize if already initialized (soft reset, failed attempt)
+                camera_power.power_off(force=True)
+                yield from asyncio.sleep_ms(100)
                 
-                # Apply default settings
-                self._apply_camera_settings()
+                # Initialize with config pins; saved settings are restored
+                # by the resume callback (later idle wake-ups reuse this path)
+                start = utime.ticks_ms()
+                camera_power.power_on()
                 
                 # Test capture
                 test_buf = camera.capture()
@@ -170,39 +157,30 @@ class SmartHomeSystem:
                     del test_buf
                     self.camera_initialized = True
                     self.system_status['camera_ok'] = True
-                    print("✅ Camera initialized successfully")
+                    camera_power.cold_start_ms = utime.ticks_diff(utime.ticks_ms(), start)
+                    print(f"✅ Camera initialized successfully ({camera_power.cold_start_ms}ms cold start)")
                     return True
                 
             except Exception as e:
                 print(f"⚠️  Camera init attempt {attempt + 1} failed: {e}")
                 if attempt < retries - 1:
-                    utime.sleep(1)
+                    yield from asyncio.sleep_ms(1000)
         
         print("❌ Camera initialization failed after all attempts")
         return False
     
-    def _apply_camera_settings(self):
-        """Apply camera settings from configuration"""
-        settings = CAMERA_CONFIG['DEFAULT_SETTINGS']
-        
-        camera.framesize(camera.FRAME_QVGA)  # Use camera constant
-        camera.quality(settings['quality'])
-        camera.brightness(settings['brightness'])
-        camera.contrast(settings['contrast'])
-        camera.saturation(settings['saturation'])
-        camera.flip(settings['flip'])
-        camera.mirror(settings['mirror'])
-    
     def initialize_sensors(self):
         """Initialize environmental sensors"""
         print("🌡️  Initializing environmental sensors...")
         
         try:
+            from environmental_sensor import EnvironmentalSensor
             self.env_sensor = EnvironmentalSensor(
                 dht_pin=SMART_HOME_PINS['DHT11_SENSOR']
             )
             
-            # Test sensor reading
+            # Test sensor reading, then sample on the timer wheel
+            self.env_sensor.start_sampling()
             if self.env_sensor.read_sensors():
                 self.system_status['sensors_ok'] = True
                 temp = self.env_sensor.get_temperature_celsius()
@@ -222,13 +200,14 @@ class SmartHomeSystem:
         print("🌈 Initializing RGB LED strip...")
         
         try:
+            from rgb_strip import RGBStrip
             self.rgb_strip = RGBStrip(
                 pin=SMART_HOME_PINS['RGB_STRIP'],
                 num_leds=8
             )
             
-            # Test RGB strip
-            self.rgb_strip.startup_sequence()
+            # Startup animation runs alongside the rest of the boot
+            asyncio.get_event_loop().create_task(self.rgb_strip.startup_sequence_async())
             self.system_status['rgb_ok'] = True
             print("✅ RGB LED strip initialized")
             return True
@@ -242,6 +221,7 @@ class SmartHomeSystem:
         print("⏰ Initializing alarm system...")
         
         try:
+            from alarm_system import SmartAlarmSystem
             self.alarm_system = SmartAlarmSystem(
                 active_buzzer_pin=SMART_HOME_PINS['ACTIVE_BUZZER'],
                 passive_buzzer_pin=SMART_HOME_PINS['PASSIVE_BUZZER'],
@@ -250,8 +230,7 @@ class SmartHomeSystem:
                 rgb_strip=self.rgb_strip
             )
             
-            # Set initial time (example - you'd normally get this from NTP)
-            self.alarm_system.set_time(2024, 1, 1, 12, 0, 0)
+            # The clock comes from time_sync once Wi-Fi is up
             
             self.system_status['alarm_ok'] = True
             print("✅ Alarm system initialized")
@@ -266,10 +245,13 @@ class SmartHomeSystem:
         print("🚶 Initializing motion detection system...")
         
         try:
+            from motion_detector import MotionDetector
             self.motion_detector = MotionDetector(
                 pir_pin=SMART_HOME_PINS['PIR_SENSOR'],
-                motion_led_pin=SMART_HOME_PINS['MOTION_LED']
+                motion_led_pin=SMART_HOME_PINS['MOTION_LED'],
+                warmup_blink=False
             )
+            asyncio.get_event_loop().create_task(self.motion_detector.warmup_blink_async())
             
             self.system_status['motion_ok'] = True
             print("✅ Motion detector initialized")
@@ -279,14 +261,42 @@ class SmartHomeSystem:
             print(f"❌ Motion detector error: {e}")
             return False
     
+    def initialize_timelapse(self):
+        """Initialize timelapse recorder (shares the motion photo log)"""
+        print("🎞️ Initializing timelapse recorder...")
+        
+        try:
+            from timelapse import TimelapseRecorder
+            photo_log = None
+            if self.motion_detector:
+                photo_log = self.motion_detector.photo_storage.photo_log
+            if not photo_log:
+                print("⚠️  Timelapse needs flash photo storage")
+                return False
+            
+            self.timelapse = TimelapseRecorder(
+                photo_log,
+                frame_cache
+            )
+            
+            self.system_status['timelapse_ok'] = True
+            print("✅ Timelapse recorder initialized")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Timelapse error: {e}")
+            return False
+    
     def initialize_pwm_audio(self):
         """Initialize PWM audio system"""
         print("🔊 Initializing PWM audio system...")
         
         try:
+            from pwm_audio import PWMAudio
             self.pwm_audio = PWMAudio(
                 pwm_pin=SMART_HOME_PINS['PWM_AUDIO'],
-                status_led_pin=SMART_HOME_PINS['AUDIO_STATUS_LED']
+                status_led_pin=SMART_HOME_PINS['AUDIO_STATUS_LED'],
+                startup_sound=False  # The boot result sound plays instead
             )
             
             self.system_status['audio_ok'] = True
@@ -308,8 +318,10 @@ class SmartHomeSystem:
                 alarm_sys=self.alarm_system,
                 rgb_controller=self.rgb_strip,
                 motion_detector_sys=self.motion_detector,
-                audio_system=self.pwm_audio
+                audio_system=self.pwm_audio,
+                timelapse_sys=self.timelapse
             )
+            web_server.set_module_registry(self.modules)
             
             self.system_status['web_server_ok'] = True
             print("✅ Web server initialized")
@@ -341,136 +353,250 @@ class SmartHomeSystem:
         print(f"🌈 RGB Strip:{'✅' if self.system_status['rgb_ok'] else '❌'}")
         print(f"🚶 Motion:   {'✅' if self.system_status['motion_ok'] else '❌'}")
         print(f"🔊 Audio:    {'✅' if self.system_status['audio_ok'] else '❌'}")
+        print(f"🎞️ Timelapse:{'✅' if self.system_status['timelapse_ok'] else '❌'}")
         print(f"🌐 Web Server:{'✅' if self.system_status['web_server_ok'] else '❌'}")
         
         # Access information
         if self.system_status['wifi_ap_ok']:
             print(f"\n🔗 Access Points:")
-            print(f"   AP Mode: http://{self.wifi_ap.ifconfig()[0]}")
+            print(f"   AP Mode: http://{network_manager.info['ap_ip']}")
         
         if self.system_status['wifi_sta_ok']:
-            print(f"   STA Mode: http://{self.wifi_sta.ifconfig()[0]}")
+            print(f"   STA Mode: http://{network_manager.info['sta_ip']}")
         
         print("=" * 50)
     
     def update_system_status(self):
         """Update RGB strip with system status"""
-        if self.rgb_strip:
-            self.rgb_strip.system_status(
+        rgb_strip = loaded(self.rgb_strip)
+        if rgb_strip:
+            rgb_strip.system_status(
                 wifi_ok=self.system_status['wifi_sta_ok'] or self.system_status['wifi_ap_ok'],
-                camera_ok=self.system_status['camera_ok'],
+                camera_ok=self.system_status['camera_ok'] or camera_power.powered,
                 sensors_ok=self.system_status['sensors_ok']
             )
     
     def run_system_loop(self):
-        """Main system loop with motion detection"""
-        last_status_update = 0
-        last_alarm_check = 0
-        last_motion_check = 0
+        """Schedule the periodic system work on the timer wheel
         
+        The wheel task (started in main) sleeps until the next deadline.
+        Background work only touches modules that are already loaded, so an
+        unused lazy module is never constructed by the loop.
+        """
         print("🔄 Starting main system loop...")
         
-        while True:
-            try:
-                current_time = utime.time()
-                
-                # Check motion detection every 100ms
-                if self.motion_detector and current_time - last_motion_check > 0.1:
-                    if self.motion_detector.check_motion():
-                        # Motion detected - play audio alert
-                        if self.pwm_audio:
-                            self.pwm_audio.play_motion_alert()
-                        # Trigger RGB indication
-                        if self.rgb_strip:
-                            self.rgb_strip.set_color_name('red', 255)
-                            utime.sleep_ms(100)
-                            self.rgb_strip.clear()
-                    last_motion_check = current_time
-                
-                # Update system status every 30 seconds
-                if current_time - last_status_update > 30:
-                    self.update_system_status()
-                    gc.collect()  # Memory cleanup
-                    last_status_update = current_time
-                
-                # Check alarm system every minute
-                if self.alarm_system and current_time - last_alarm_check > 60:
-                    self.alarm_system.update()
-                    last_alarm_check = current_time
-                
-                # Brief sleep to prevent watchdog timeout
-                utime.sleep(0.1)
-                
-            except KeyboardInterrupt:
-                print("\n🛑 System shutdown requested")
-                break
-            except Exception as e:
-                print(f"❌ System loop error: {e}")
-                utime.sleep(5)  # Wait before retrying
+        # Streaming keeps the camera awake past its idle deadline
+        camera_power.busy_check = frame_cache.is_streaming
+        
+        timer_wheel.call_every(TIMER_CONFIG.get('MOTION_POLL_MS', 100), self.poll_motion, name='motion')
+        timer_wheel.call_every(TIMER_CONFIG.get('STATUS_MS', 30000), self.refresh_status,
+                               name='status', first_ms=0)
+        if self.rules:
+            timer_wheel.call_every(TIMER_CONFIG.get('CLOCK_MS', 1000), self.update_clock_inputs,
+                                   name='clock', first_ms=0)
+    
+    def poll_motion(self):
+        """Check motion detection (reactions run from the event bus)"""
+        motion_detector = loaded(self.motion_detector)
+        if motion_detector:
+            motion_detector.check_motion()
+    
+    def refresh_status(self):
+        """Status LEDs, slow-changing rules inputs and memory cleanup"""
+        self.update_system_status()
+        alarm_system = loaded(self.alarm_system)
+        if self.rules and alarm_system:
+            self.rules.set_input('alarm_enabled', alarm_system.alarm_enabled)
+            self.rules.set_input('wake_adjust_min', alarm_system.get_weather_adjustment())
+            self.rules.evaluate()
+        gc.collect()  # Memory cleanup
+    
+    def update_clock_inputs(self):
+        """Time of day inputs; only rules reading a changed input run"""
+        now = utime.localtime()
+        self.rules.set_input('hour', now[3])
+        self.rules.set_input('minute', now[4])
+        self.rules.set_input('weekday', now[6])
+        self.rules.evaluate()
+    
+    def subscribe_events(self):
+        """Wire cross-module reactions to the event bus"""
+        event_bus.subscribe(MOTION, self.on_motion_audio, priority=10, name='motion_audio')
+        event_bus.subscribe(MOTION, self.on_motion_rgb, priority=5, name='motion_rgb')
+        event_bus.subscribe(ALARM, self.on_alarm_rgb, priority=5, name='alarm_sunrise')
+        
+        # Declarative automation on top of the same events
+        if AUTOMATION_CONFIG.get('ENABLED', True):
+            self.rules = RulesEngine()
+            self.rules.load()
+            self.rules.bind_events()
+            event_bus.subscribe(RULE, self.on_rule, name='rule_actions')
+    
+    def on_motion_audio(self, topic, data):
+        """Motion detected - play audio alert"""
+        pwm_audio = loaded(self.pwm_audio)
+        if pwm_audio:
+            pwm_audio.play_motion_alert()
+    
+    def on_motion_rgb(self, topic, data):
+        """Motion detected - flash the strip red (uasyncio coroutine)"""
+        rgb_strip = loaded(self.rgb_strip)
+        if rgb_strip:
+            rgb_strip.set_color_name('red', 255)
+            yield from asyncio.sleep_ms(100)
+            rgb_strip.clear()
+    
+    def on_alarm_rgb(self, topic, data):
+        """Alarm triggered - run the sunrise simulation"""
+        alarm_system = loaded(self.alarm_system)
+        if alarm_system and loaded(self.rgb_strip):
+            alarm_system.start_sunrise_simulation()
+    
+    def on_rule(self, topic, data):
+        """Run the actions of a fired automation rule"""
+        for action in data['actions']:
+            kind = action.get('type')
+            if kind == 'rgb':
+                rgb_strip = loaded(self.rgb_strip)
+                if rgb_strip:
+                    rgb_strip.set_color_name(action.get('color', 'off'), action.get('brightness', 128))
+            elif kind == 'sound':
+                pwm_audio = loaded(self.pwm_audio)
+                method = SOUND_ACTIONS.get(action.get('name'))
+                if pwm_audio and method:
+                    getattr(pwm_audio, method)()
+            elif kind == 'capture':
+                motion_detector = loaded(self.motion_detector)
+                if motion_detector:
+                    asyncio.get_event_loop().create_task(motion_detector.capture_motion_photo())
+            else:
+                print(f"Rule {data['rule']}: unknown action {kind}")
     
     def start_web_server(self):
-        """Start the web server"""
+        """Start the web server on the event loop (does not block)"""
         try:
             print("🌐 Starting web server...")
-            web_server.run_server(
+            web_server.set_boot_orchestrator(self.boot)
+            web_server.set_rules_engine(self.rules)
+            web_server.start_server(
                 host="0.0.0.0",
                 port=80,
                 debug=SYSTEM_CONFIG['DEBUG_MODE']
             )
+            return True
         except Exception as e:
             print(f"❌ Web server start error: {e}")
+            return False
     
     def initialize_all(self):
-        """Initialize all system components"""
-        success_count = 0
-        total_components = 8  # Updated to include motion detector and PWM audio
-        
-        # Initialize components in order
-        if self.initialize_wifi():
-            success_count += 1
-        
-        if self.initialize_camera():
-            success_count += 1
-        
-        if self.initialize_sensors():
-            success_count += 1
-        
-        if self.initialize_rgb_strip():
-            success_count += 1
-        
-        if self.initialize_alarm_system():
-            success_count += 1
-        
-        if self.initialize_motion_detector():
-            success_count += 1
-        
-        if self.initialize_pwm_audio():
-            success_count += 1
-        
-        if self.initialize_web_server():
-            success_count += 1
+        """Initialize all system components - uasyncio coroutine
+        
+        Independent steps overlap: while Wi-Fi waits for its association the
+        camera, sensors and LEDs come up. Each step waits only for the steps
+        it needs.
+        
+        Smart home modules are registered as lazy proxies first and handed to
+        the web server straight away; only the LAZY_INIT_CONFIG eager ones are
+        built here, the rest on first use. The camera is powered up on first
+        capture when it is not eager.
+        """
+        if LAZY_INIT_CONFIG.get('ENABLED', True):
+            eager = LAZY_INIT_CONFIG.get('EAGER', [])
+        else:
+            eager = None  # Everything at boot
+        
+        boot = self.boot
+        boot.add('wifi', self.initialize_wifi)
+        if eager is None or 'camera' in eager:
+            boot.add('camera', self.initialize_camera)
+        
+        # Name, attribute, initializer, boot steps it waits for when eager
+        modules = (
+            ('sensors', 'env_sensor', self.initialize_sensors, ()),
+            ('rgb', 'rgb_strip', self.initialize_rgb_strip, ()),
+            ('audio', 'pwm_audio', self.initialize_pwm_audio, ()),
+            ('alarm', 'alarm_system', self.initialize_alarm_system, ('sensors', 'rgb')),
+            ('motion', 'motion_detector', self.initialize_motion_detector, ('camera',)),
+            ('timelapse', 'timelapse', self.initialize_timelapse, ('motion',)),
+        )
+        for name, attr, initializer, requires in modules:
+            self.register_module(name, attr, initializer)
+            if eager is None or name in eager:
+                boot.add(name, self.warm_up_step(name), requires=requires)
+        boot.add('web_modules', self.initialize_web_server, requires=('wifi',))
+        
+        yield from boot.run()
+        
+        success_count = boot.success_count()
+        total_components = len(boot.steps)
         
         # Display final status
         self.display_system_status()
         
-        print(f"\n🎯 System initialization: {success_count}/{total_components} components ready")
+        print(f"\n🎯 System initialization: {success_count}/{total_components} components ready ({boot.total_ms}ms)")
         
-        if success_count >= 5:  # Minimum viable system (updated threshold)
+        # Minimum viable system; fewer steps run when modules are lazy
+        pwm_audio = loaded(self.pwm_audio)
+        if success_count >= min(5, total_components):
             print("✅ System ready to start!")
             
             # Play success sound
-            if self.pwm_audio:
-                self.pwm_audio.play_success_sound()
+            if pwm_audio:
+                pwm_audio.play_success_sound()
             
             return True
         else:
             print("❌ Critical components failed - system cannot start")
             
             # Play error sound
-            if self.pwm_audio:
-                self.pwm_audio.play_error_sound()
+            if pwm_audio:
+                pwm_audio.play_error_sound()
             
             return False
+    
+    def register_module(self, name, attr, initializer):
+        """Put a lazy proxy in self.<attr> that runs initializer() on first use"""
+        def loader():
+            initializer()
+            instance = getattr(self, attr)
+            if isinstance(instance, LazyModule):
+                return None  # Constructor failed; the proxy is still in place
+            return instance
+        setattr(self, attr, self.modules.register(name, loader))
+    
+    def warm_up_step(self, name):
+        """Boot step that loads a registered module"""
+        return lambda: self.modules.warm_up(name)
+    
+    def boot_and_run(self):
+        """Boot, then hand over to the system loop - uasyncio coroutine"""
+        try:
+            success = yield from self.initialize_all()
+            rgb_strip = loaded(self.rgb_strip)
+            if success:
+                
+                # Show RGB startup indication
+                if rgb_strip:
+                    rgb_strip.set_color_name('green', 100)
+                    yield from asyncio.sleep_ms(1000)
+                    rgb_strip.clear()
+            else:
+                print("❌ System initialization failed - running the modules that loaded")
+                
+                # Show error on RGB strip
+                if rgb_strip:
+                    rgb_strip.set_color_name('red', 100)
+            
+            # Periodic jobs only touch loaded modules, so a partial boot still gets them
+            self.run_system_loop()
+        
+        except Exception as e:
+            print(f"❌ Critical system error: {e}")
+            
+            # Show error indication
+            rgb_strip = loaded(self.rgb_strip)
+            if rgb_strip:
+                rgb_strip.blink_pattern([0, 2, 4, 6], (255, 0, 0), 5)
 
 
 def main():
@@ -481,34 +607,21 @@ def main():
     smart_home = SmartHomeSystem()
     
     try:
-        # Initialize all components
-        if smart_home.initialize_all():
-            
-            # Show RGB startup indication
-            if smart_home.rgb_strip:
-                smart_home.rgb_strip.set_color_name('green', 100)
-                utime.sleep(1)
-                smart_home.rgb_strip.clear()
-            
-            # Start web server (this will block)
-            smart_home.start_web_server()
-        else:
-            print("❌ System initialization failed")
-            
-            # Show error on RGB strip
-            if smart_home.rgb_strip:
-                smart_home.rgb_strip.set_color_name('red', 100)
-            
-    except Exception as e:
-        print(f"❌ Critical system error: {e}")
-        
-        # Show error indication
-        if smart_home.rgb_strip:
-            smart_home.rgb_strip.blink_pattern([0, 2, 4, 6], (255, 0, 0), 5)
+        # Serve requests right away; subsystems appear as they finish booting
+        loop = asyncio.get_event_loop()
+        smart_home.subscribe_events()
+        loop.create_task(event_bus.run())
+        loop.create_task(timer_wheel.run())  # Deadlines set during boot fire on time
+        smart_home.start_web_server()
+        loop.create_task(smart_home.boot_and_run())
+        loop.run_forever()
+    
+    except KeyboardInterrupt:
+        print("\n🛑 System shutdown requested")
     
     finally:
         print("🛑 System shutdown")
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,303 @@
+# Alarm Scheduler for ESP32-WROVER Smart Home
+# Multiple recurring alarms in a next-fire heap, armed as one timer wheel deadline
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+import json
+try:
+    import uheapq as heapq
+except ImportError:
+    import heapq
+from timer_wheel import timer_wheel
+from atomic_file import write_atomic, open_saved
+
+# Import configuration
+try:
+    from config import ALARM_CONFIG
+except ImportError:
+    # Fallback if config not available
+    ALARM_CONFIG = {
+        'DEFAULT_ALARM_TYPE': 'gentle',
+        'SCHEDULE_PATH': '/alarms.json',
+        'MAX_ALARMS': 8,
+        'MAX_ARM_S': 600
+    }
+
+DAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')  # localtime()[6] order
+EVERY_DAY = 0x7f
+WEEKDAYS = 0x1f
+WEEKEND = 0x60
+FINE_POLL_MS = 100  # Re-check period when the wheel fires before the RTC second
+
+def days_mask(days):
+    """Accept a mask, 'daily'/'weekdays'/'weekend'/'once', or day names/numbers
+    (a list or a comma-separated string); raises ValueError on anything else"""
+    if days is None:
+        return 0
+    if isinstance(days, int):
+        if not 0 <= days <= EVERY_DAY:
+            raise ValueError(f"Day mask out of range: {days}")
+        return days
+    if isinstance(days, str):
+        mask = {'daily': EVERY_DAY, 'weekdays': WEEKDAYS, 'weekend': WEEKEND,
+                'once': 0}.get(days.strip().lower())
+        if mask is not None:
+            return mask
+        days = days.split(',')
+    mask = 0
+    for day in days:
+        if isinstance(day, str):
+            name = day.strip()[:3].lower()
+            if name not in DAY_NAMES:
+                raise ValueError(f"Unknown day: {day}")
+            day = DAY_NAMES.index(name)
+        if not 0 <= day <= 6:
+            raise ValueError(f"Day out of range: {day}")
+        mask |= 1 << day
+    return mask
+
+class Alarm:
+    """One alarm; days is a Monday-first bit mask, 0 means fire once"""
+
+    def __init__(self, alarm_id, hour, minute, days=0, alarm_type=None, label=None, enabled=True):
+        self.id = alarm_id
+        self.hour = hour
+        self.minute = minute
+        self.days = days
+        self.alarm_type = alarm_type or ALARM_CONFIG.get('DEFAULT_ALARM_TYPE', 'gentle')
+        self.label = label or ''
+        self.enabled = enabled
+        self.next_fire = None  # utime.time() seconds
+        self.generation = 0    # Scheduler generation of its live heap entry
+
+    def to_dict(self):
+        return {'id': self.id, 'hour': self.hour, 'minute': self.minute, 'days': self.days,
+                'type': self.alarm_type, 'label': self.label, 'enabled': self.enabled}
+
+def next_fire_time(hour, minute, days, now):
+    """First time after now (seconds) that falls on hour:minute on an allowed day"""
+    t = utime.localtime(now)
+    midnight = now - (t[3] * 3600 + t[4] * 60 + t[5])
+    offset = hour * 3600 + minute * 60
+    for day in range(8):
+        fire = midnight + day * 86400 + offset
+        if fire > now and (not days or days & (1 << ((t[6] + day) % 7))):
+            return fire
+    return None
+
+class AlarmScheduler:
+    """Keeps alarms in a heap by next absolute fire time
+
+    Only the earliest alarm has a timer_wheel deadline. Edits give the
+    alarm a new scheduler-wide generation instead of searching the heap, so
+    entries of an edited, removed or re-added id are stale; they are
+    dropped when they reach the top. Long waits are re-armed every
+    MAX_ARM_S so a clock change (set_time, SNTP) is picked up, and the
+    schedule is rebuilt whenever the clock is set.
+    """
+
+    def __init__(self, on_fire, path=None):
+        self.on_fire = on_fire  # on_fire(alarm)
+        self.path = path or ALARM_CONFIG.get('SCHEDULE_PATH', '/alarms.json')
+        self.max_alarms = ALARM_CONFIG.get('MAX_ALARMS', 8)
+        self.max_arm_s = ALARM_CONFIG.get('MAX_ARM_S', 600)
+        self.alarms = {}  # id -> Alarm
+        self.heap = []    # (next_fire, id, generation)
+        self.next_id = 1
+        self.generation = 0  # Never reused, unlike alarm ids
+        self.timer = None
+        self.armed_for = None
+
+        # Statistics
+        self.fired = 0
+        self.max_late_ms = 0
+        self.rearms = 0
+        self.stale = 0
+
+    def _push(self, alarm, now):
+        self.generation += 1
+        alarm.generation = self.generation
+        alarm.next_fire = None
+        if alarm.enabled:
+            alarm.next_fire = next_fire_time(alarm.hour, alarm.minute, alarm.days, now)
+            if alarm.next_fire is not None:
+                heapq.heappush(self.heap, (alarm.next_fire, alarm.id, alarm.generation))
+
+    def _top(self):
+        """Earliest live heap entry, dropping stale ones"""
+        heap = self.heap
+        while heap:
+            fire, alarm_id, generation = heap[0]
+            alarm = self.alarms.get(alarm_id)
+            if alarm and alarm.generation == generation and alarm.enabled:
+                return heap[0]
+            heapq.heappop(heap)
+            self.stale += 1
+        return None
+
+    def _arm(self):
+        """Point the single wheel timer at the earliest alarm"""
+        timer_wheel.cancel(self.timer)
+        self.timer = None
+        top = self._top()
+        self.armed_for = top[0] if top else None
+        if top is None:
+            return
+        wait_s = top[0] - utime.time()
+        if wait_s > self.max_arm_s:
+            delay_ms = self.max_arm_s * 1000
+        elif wait_s > 1:
+            # Land just short of the second; the fine poll closes the gap
+            delay_ms = (wait_s - 1) * 1000
+        else:
+            delay_ms = FINE_POLL_MS
+        self.timer = timer_wheel.call_later(delay_ms, self._on_timer, name='alarm')
+
+    def _on_timer(self):
+        self.timer = None
+        now = utime.time()
+        due = []
+        top = self._top()
+        while top and top[0] <= now:
+            heapq.heappop(self.heap)
+            due.append(self.alarms[top[1]])
+            top = self._top()
+        if not due:
+            self.rearms += 1
+        changed = False
+        for alarm in due:
+            late_ms = (now - alarm.next_fire) * 1000
+            if late_ms > self.max_late_ms:
+                self.max_late_ms = late_ms
+            if not alarm.days:
+                alarm.enabled = False  # One-off alarms disable themselves
+                changed = True
+            self._push(alarm, now)
+            self.fired += 1
+            try:
+                self.on_fire(alarm)
+            except Exception as e:
+                print(f"Alarm {alarm.id} fire error: {e}")
+        if changed:
+            self.save()
+        self._arm()
+
+    def add(self, hour, minute, days=0, alarm_type=None, label=None, enabled=True, alarm_id=None):
+        """Add an alarm (or replace alarm_id); returns the Alarm or None
+
+        Raises ValueError when days is not understood (see days_mask).
+        """
+        if not (0 <= hour <= 23 and 0 <= minute <= 59):
+            return None
+        if alarm_id is None:
+            if len(self.alarms) >= self.max_alarms:
+                return None
+            alarm_id = self.next_id
+        self.next_id = max(self.next_id, alarm_id + 1)
+        alarm = Alarm(alarm_id, hour, minute, days_mask(days), alarm_type, label, enabled)
+        self.alarms[alarm_id] = alarm
+        self._push(alarm, utime.time())
+        self._arm()
+        self.save()
+        return alarm
+
+    def remove(self, alarm_id):
+        alarm = self.alarms.pop(alarm_id, None)
+        if alarm is None:
+            return False
+        self._arm()
+        self.save()
+        return True
+
+    def enable(self, alarm_id, enabled=True):
+        alarm = self.alarms.get(alarm_id)
+        if alarm is None:
+            return False
+        alarm.enabled = enabled
+        self._push(alarm, utime.time())
+        self._arm()
+        self.save()
+        return True
+
+    def set_all(self, enabled):
+        for alarm in self.alarms.values():
+            alarm.enabled = enabled
+        self.reschedule()
+        self.save()
+
+    def reschedule(self):
+        """Recompute every fire time (after the clock was set)"""
+        now = utime.time()
+        self.heap = []
+        for alarm in self.alarms.values():
+            self._push(alarm, now)
+        self._arm()
+
+    def next_alarm(self):
+        """(Alarm, seconds until it fires) for the earliest alarm, or None"""
+        top = self._top()
+        if top is None:
+            return None
+        return self.alarms[top[1]], top[0] - utime.time()
+
+    def any_enabled(self):
+        for alarm in self.alarms.values():
+            if alarm.enabled:
+                return True
+        return False
+
+    def save(self):
+        """Write the schedule to flash atomically"""
+        try:
+            write_atomic(self.path, json.dumps({'alarms': [a.to_dict() for a in self.alarms.values()]}))
+            return True
+        except Exception as e:
+            print(f"Alarm schedule save error: {e}")
+            return False
+
+    def load(self):
+        """Restore the saved alarms and arm the earliest"""
+        try:
+            with open_saved(self.path) as f:
+                saved = json.loads(f.read())
+        except (OSError, ValueError):
+            return 0
+        self.alarms = {}
+        for item in saved.get('alarms', []):
+            try:
+                alarm = Alarm(int(item['id']), int(item['hour']), int(item['minute']),
+                              days_mask(item.get('days', 0)), item.get('type'),
+                              item.get('label'), item.get('enabled', True))
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"Alarm entry skipped: {e}")
+                continue
+            self.alarms[alarm.id] = alarm
+            self.next_id = max(self.next_id, alarm.id + 1)
+        self.reschedule()
+        print(f"⏰ {len(self.alarms)} alarms loaded")
+        return len(self.alarms)
+
+    def get_schedule(self):
+        """Alarms with their next fire time, earliest first"""
+        now = utime.time()
+        items = []
+        for alarm in self.alarms.values():
+            item = alarm.to_dict()
+            item['time'] = f"{alarm.hour:02d}:{alarm.minute:02d}"
+            item['in_s'] = alarm.next_fire - now if alarm.next_fire is not None else None
+            items.append(item)
+        items.sort(key=lambda item: item['in_s'] if item['in_s'] is not None else 1 << 30)
+        return items
+
+    def get_stats(self):
+        """Get scheduler statistics"""
+        return {
+            'alarms': len(self.alarms),
+            'heap': len(self.heap),
+            'armed_in_s': self.armed_for - utime.time() if self.armed_for is not None else None,
+            'fired': self.fired,
+            'max_late_ms': self.max_late_ms,
+            'rearms': self.rearms,
+            'stale_dropped': self.stale
+        }
@@ -7,7 +7,14 @@ sys.path.append('..')  # To access config
 from pwm_buzzer import PWMBuzzer, ActiveBuzzer
 from machine import Pin, RTC
 import time
-import gc
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+from event_bus import event_bus, ALARM, ALARM_STOP
+from timer_wheel import timer_wheel
+from alarm_scheduler import AlarmScheduler
+from sound_manager import sound_manager, ALARM as ALARM_SOUND
 
 # Import configuration
 try:
@@ -24,9 +31,45 @@ except ImportError:
         'MAX_ALARM_DURATION': 30,
         'ALARM_TYPES': ['gentle', 'normal', 'urgent'],
         'DEFAULT_ALARM_TYPE': 'gentle',
-        'SUNRISE_SIMULATION_DURATION': 300
+        'SUNRISE_SIMULATION_DURATION': 300,
+        'SUNRISE_STEP_MS': 250,
+        'SUNRISE_LUT_STEPS': 64,
+        'SCHEDULE_PATH': '/alarms.json',
+        'MAX_ALARMS': 8,
+        'MAX_ARM_S': 600
     }
 
+# Sunrise colour stops from dark to daylight, expanded once into a lookup table
+SUNRISE_STOPS = (
+    (0, 0, 0),
+    (48, 4, 0),       # First light - deep red
+    (150, 30, 0),     # Orange
+    (255, 100, 5),    # Amber
+    (255, 190, 60),   # Warm yellow
+    (255, 255, 170)   # Daylight
+)
+
+# Alarm sounds as (frequency Hz, duration ms) steps; 0 Hz is a pause
+GENTLE_PATTERN = ((262, 400), (0, 100), (330, 400), (0, 100), (392, 400), (0, 100),
+                  (523, 400), (0, 100), (392, 400), (0, 100), (330, 400), (0, 100),
+                  (262, 400), (0, 100))  # C4 E4 G4 C5 G4 E4 C4
+NORMAL_PATTERN = ((1500, 500), (0, 100), (800, 500), (0, 100))
+URGENT_PATTERN = ((2000, 150), (0, 50)) * 3 + ((0, 300),)
+
+def build_sunrise_lut(steps, stops=SUNRISE_STOPS):
+    """Interpolate the colour stops into steps RGB triples (bytearray)"""
+    lut = bytearray(steps * 3)
+    spans = len(stops) - 1
+    for i in range(steps):
+        pos = i * spans * 256 // (steps - 1)
+        seg = min(pos >> 8, spans - 1)
+        frac = pos - (seg << 8)
+        a = stops[seg]
+        b = stops[seg + 1]
+        for k in range(3):
+            lut[i * 3 + k] = a[k] + (b[k] - a[k]) * frac // 256
+    return lut
+
 class SmartAlarmSystem:
     def __init__(self, active_buzzer_pin=None, passive_buzzer_pin=None, 
                  status_led_pin=None, environmental_sensor=None, rgb_strip=None):
@@ -43,6 +86,8 @@ class SmartAlarmSystem:
         # Audio components
         self.active_buzzer = ActiveBuzzer(active_buzzer_pin)
         self.passive_buzzer = PWMBuzzer(passive_buzzer_pin)
+        sound_manager.add_device('buzzer', self._buzzer_tone, self.passive_buzzer.stop)
+        sound_manager.add_device('active', self._active_tone, self.active_buzzer.off)
         
         # Visual indicators
         self.status_led = Pin(status_led_pin, Pin.OUT)
@@ -54,21 +99,36 @@ class SmartAlarmSystem:
         
         # Alarm state
         self.alarm_active = False
-        self.alarm_time = None  # (hour, minute)
+        self.alarm_time = None  # (hour, minute) of the next alarm
         self.snooze_time = None
-        self.alarm_enabled = False
+        self.alarm_enabled = False  # Any alarm enabled
         
         # Configuration from config.py
         self.snooze_duration = ALARM_CONFIG['SNOOZE_DURATION']
         self.max_alarm_duration = ALARM_CONFIG['MAX_ALARM_DURATION']
         self.current_alarm_type = ALARM_CONFIG['DEFAULT_ALARM_TYPE']
         self.sunrise_duration = ALARM_CONFIG['SUNRISE_SIMULATION_DURATION']
+        self.sunrise_step_ms = ALARM_CONFIG.get('SUNRISE_STEP_MS', 250)
+        self.sunrise_lut = build_sunrise_lut(ALARM_CONFIG.get('SUNRISE_LUT_STEPS', 64))
+        
+        # Sound plays through the shared sound manager; the sunrise runs as a
+        # uasyncio task tagged with this number, stop_alarm() bumps it
+        self.sound_id = None
+        self.sequence = 0
+        self.sunrise_running = False
         
         # RTC for time keeping
         self.rtc = RTC()
         
         # Alarm timing
         self.alarm_start_time = None
+        self.auto_stop_timer = None
+        self.snooze_timer = None
+        
+        # Alarms fire from one timer_wheel deadline; the schedule survives reboots
+        self.scheduler = AlarmScheduler(self._on_scheduled_alarm)
+        self.scheduler.load()
+        self._sync_schedule()
         
         print("Smart Alarm System initialized")
         print(f"Active Buzzer: Pin {active_buzzer_pin}")
@@ -79,8 +139,14 @@ class SmartAlarmSystem:
     def set_time(self, year, month, day, hour, minute, second=0):
         """Set current time"""
         self.rtc.datetime((year, month, day, 0, hour, minute, second, 0))
+        self.clock_changed()
         print(f"Time set to: {hour:02d}:{minute:02d}")
     
+    def clock_changed(self):
+        """The RTC was stepped (set_time, NTP); fire times are absolute"""
+        self.scheduler.reschedule()
+        self._sync_schedule()
+    
     def get_time(self):
         """Get current time as (hour, minute, second)"""
         dt = self.rtc.datetime()
@@ -91,26 +157,56 @@ class SmartAlarmSystem:
         hour, minute, second = self.get_time()
         return f"{hour:02d}:{minute:02d}:{second:02d}"
     
-    def set_alarm(self, hour, minute, alarm_type="gentle"):
-        """Set alarm time and type"""
-        if 0 <= hour <= 23 and 0 <= minute <= 59:
-            self.alarm_time = (hour, minute)
-            self.alarm_enabled = True
-            self.current_alarm_type = alarm_type
+    def set_alarm(self, hour, minute, alarm_type="gentle", days='daily'):
+        """Set the main alarm (alarm 1) time and type"""
+        if self.scheduler.add(hour, minute, days, alarm_type, alarm_id=1):
+            self._sync_schedule()
             print(f"Alarm set for {hour:02d}:{minute:02d} ({alarm_type} mode)")
             return True
         else:
             print("Invalid time format")
             return False
     
+    def add_alarm(self, hour, minute, days='daily', alarm_type=None, label=None):
+        """Add another alarm; days is 'daily', 'weekdays', 'weekend', 'once' or a list"""
+        alarm = self.scheduler.add(hour, minute, days, alarm_type, label)
+        self._sync_schedule()
+        return alarm.id if alarm else None
+    
+    def remove_alarm(self, alarm_id):
+        removed = self.scheduler.remove(alarm_id)
+        self._sync_schedule()
+        return removed
+    
+    def enable_alarm(self, alarm_id, enabled=True):
+        changed = self.scheduler.enable(alarm_id, enabled)
+        self._sync_schedule()
+        return changed
+    
     def disable_alarm(self):
-        """Disable the alarm"""
-        self.alarm_enabled = False
+        """Disable every alarm"""
+        self.scheduler.set_all(False)
+        self._sync_schedule()
         self.alarm_active = False
-        self.snooze_time = None
+        self.cancel_snooze()
         self.stop_alarm()
         print("Alarm disabled")
     
+    def _sync_schedule(self):
+        """Mirror the next alarm into alarm_time / alarm_enabled"""
+        self.alarm_enabled = self.scheduler.any_enabled()
+        upcoming = self.scheduler.next_alarm()
+        self.alarm_time = (upcoming[0].hour, upcoming[0].minute) if upcoming else None
+    
+    def _on_scheduled_alarm(self, alarm):
+        """Scheduler callback: an alarm reached its fire time"""
+        self._sync_schedule()
+        if self.alarm_active:
+            return
+        self.cancel_snooze()
+        self.current_alarm_type = alarm.alarm_type
+        self.trigger_alarm()
+    
     def snooze_alarm(self):
         """Snooze the alarm for specified duration"""
         if self.alarm_active:
@@ -119,45 +215,37 @@ class SmartAlarmSystem:
             # Calculate snooze time
             snooze_minutes = (current_time[1] + self.snooze_duration) % 60
             snooze_hours = (current_time[0] + (current_time[1] + self.snooze_duration) // 60) % 24
-            self.snooze_time = (snooze_hours, snooze_minutes)
+            self.snooze_time = (snooze_hours, snooze_minutes)  # For display
+            timer_wheel.cancel(self.snooze_timer)
+            self.snooze_timer = timer_wheel.call_later(self.snooze_duration * 60 * 1000,
+                                                       self._snooze_expired, name='snooze')
             print(f"Alarm snoozed until {snooze_hours:02d}:{snooze_minutes:02d}")
     
-    def check_alarm_trigger(self):
-        """Check if alarm should be triggered"""
-        if not self.alarm_enabled:
-            return False
-        
-        current_time = self.get_time()
-        current_hour, current_minute = current_time[0], current_time[1]
-        
-        # Check main alarm
-        if self.alarm_time and not self.alarm_active:
-            alarm_hour, alarm_minute = self.alarm_time
-            if current_hour == alarm_hour and current_minute == alarm_minute:
-                self.trigger_alarm()
-                return True
-        
-        # Check snooze alarm
-        if self.snooze_time and not self.alarm_active:
-            snooze_hour, snooze_minute = self.snooze_time
-            if current_hour == snooze_hour and current_minute == snooze_minute:
-                self.trigger_alarm()
-                self.snooze_time = None  # Clear snooze
-                return True
-        
-        return False
+    def cancel_snooze(self):
+        timer_wheel.cancel(self.snooze_timer)
+        self.snooze_timer = None
+        self.snooze_time = None
+    
+    def _snooze_expired(self):
+        self.snooze_timer = None
+        self.snooze_time = None
+        # The pending timer is the snooze; a one-off alarm is already disabled by now
+        if not self.alarm_active:
+            self.trigger_alarm()
     
     def trigger_alarm(self):
         """Start the alarm sequence"""
         self.alarm_active = True
         self.alarm_start_time = time.ticks_ms()
         self.status_led.on()
+        timer_wheel.cancel(self.auto_stop_timer)
+        self.auto_stop_timer = timer_wheel.call_later(self.max_alarm_duration * 60 * 1000,
+                                                      self._auto_stop, name='alarm_auto_stop')
         
         print(f"🚨 ALARM TRIGGERED! ({self.current_alarm_type} mode)")
         
-        # Start sunrise simulation if RGB strip available
-        if self.rgb_strip:
-            self.start_sunrise_simulation()
+        # Light reactions (sunrise simulation) subscribe to the bus
+        event_bus.publish(ALARM, {'type': self.current_alarm_type})
         
         # Start audio alarm based on type
         if self.current_alarm_type == "gentle":
@@ -168,89 +256,114 @@ class SmartAlarmSystem:
             self.urgent_alarm_sequence()
     
     def gentle_wake_up_sequence(self):
-        """Gentle wake-up with progressive volume/intensity"""
+        """Gentle wake-up melody (returns immediately)"""
         print("Starting gentle wake-up sequence...")
-        # Start with passive buzzer melody
-        try:
-            self.passive_buzzer.play_wake_up_melody()
-        except Exception as e:
-            print(f"Passive buzzer error: {e}")
-            # Fallback to active buzzer
-            self.active_buzzer.beep(500)
+        self.play_pattern(GENTLE_PATTERN)
     
     def normal_alarm_sequence(self):
-        """Standard alarm sequence"""
+        """Standard alarm sequence (returns immediately)"""
         print("Starting normal alarm sequence...")
-        try:
-            self.passive_buzzer.alarm_pattern_1(3)
-        except Exception as e:
-            print(f"Passive buzzer error: {e}")
-            self.active_buzzer.alarm_beeps(5)
+        self.play_pattern(NORMAL_PATTERN, 3000)
     
     def urgent_alarm_sequence(self):
-        """Urgent alarm sequence"""
+        """Urgent alarm sequence (returns immediately)"""
         print("Starting urgent alarm sequence...")
-        try:
-            self.passive_buzzer.alarm_pattern_2(5)
-        except Exception as e:
-            print(f"Passive buzzer error: {e}")
-            self.active_buzzer.alarm_beeps(10, 100, 100)
+        self.play_pattern(URGENT_PATTERN, 5000)
+    
+    def play_pattern(self, pattern, duration_ms=0, name='alarm_pattern', priority=ALARM_SOUND, device=None):
+        """Queue (frequency, ms) steps, repeated to fill duration_ms (or once)
+        
+        Alarm sounds preempt every other sound and play on the device
+        AUDIO_CONFIG routes the alarm class to (the passive buzzer by default).
+        """
+        pattern_ms = sum(step[1] for step in pattern)
+        repeats = max(1, -(-duration_ms // pattern_ms)) if pattern_ms else 1
+        seq_id = sound_manager.play(tuple(pattern) * repeats, name, priority,
+                                    gap_ms=0, replace=True, device=device)
+        if priority == ALARM_SOUND:
+            self.sound_id = seq_id
+        return seq_id
+    
+    def _buzzer_tone(self, frequency, volume=None):
+        """Sound manager output for the passive buzzer (volume = duty)"""
+        self.passive_buzzer.start_tone(int(frequency), 512 if volume is None else int(volume))
+    
+    def _active_tone(self, frequency, volume=None):
+        """Sound manager output for the active buzzer - fixed pitch, on/off only"""
+        self.active_buzzer.on()
     
     def start_sunrise_simulation(self):
-        """Simulate sunrise with RGB LEDs"""
+        """Fade the RGB strip through the sunrise over SUNRISE_SIMULATION_DURATION"""
         if not self.rgb_strip:
             return
-        
-        print("Starting sunrise simulation...")
+        print(f"Starting sunrise simulation ({self.sunrise_duration}s)...")
+        asyncio.get_event_loop().create_task(self._sunrise_task(self.sequence))
+    
+    def sunrise_color(self, elapsed_ms):
+        """Colour at elapsed_ms, interpolated between neighbouring LUT entries"""
+        lut = self.sunrise_lut
+        last = len(lut) // 3 - 1
+        duration_ms = self.sunrise_duration * 1000
+        if elapsed_ms >= duration_ms:
+            pos = last << 8
+        else:
+            pos = elapsed_ms * (last << 8) // duration_ms
+        i = (pos >> 8) * 3
+        j = min(i + 3, last * 3)
+        frac = pos & 0xff
+        return (lut[i] + (lut[j] - lut[i]) * frac // 256,
+                lut[i + 1] + (lut[j + 1] - lut[i + 1]) * frac // 256,
+                lut[i + 2] + (lut[j + 2] - lut[i + 2]) * frac // 256)
+    
+    def _sunrise_task(self, sequence):
+        start = time.ticks_ms()
+        duration_ms = self.sunrise_duration * 1000
+        shown = None
+        self.sunrise_running = True
         try:
-            # Gradually increase brightness over 5 minutes
-            for brightness in range(0, 256, 8):
-                # Warm sunrise colors: red -> orange -> yellow -> white
-                if brightness < 64:
-                    # Early sunrise - red/orange
-                    red = brightness * 4
-                    green = brightness // 2
-                    blue = 0
-                elif brightness < 128:
-                    # Mid sunrise - orange/yellow
-                    red = 255
-                    green = brightness * 2
-                    blue = 0
-                else:
-                    # Full daylight - white
-                    red = 255
-                    green = 255
-                    blue = brightness - 128
-                
-                self.rgb_strip.set_all(red, green, blue)
-                time.sleep_ms(300)  # Gradual change
-                
+            while sequence == self.sequence:
+                elapsed = time.ticks_diff(time.ticks_ms(), start)
+                color = self.sunrise_color(elapsed)
+                if color != shown:  # The strip is only rewritten when the colour moves
+                    self.rgb_strip.set_all(*color)
+                    shown = color
+                if elapsed >= duration_ms:
+                    return
+                yield from asyncio.sleep_ms(self.sunrise_step_ms)
         except Exception as e:
             print(f"Sunrise simulation error: {e}")
+        finally:
+            if sequence == self.sequence:
+                self.sunrise_running = False
     
     def stop_alarm(self):
         """Stop all alarm sounds and visuals"""
         self.alarm_active = False
         self.status_led.off()
+        timer_wheel.cancel(self.auto_stop_timer)
+        self.auto_stop_timer = None
         
-        # Stop all audio
-        try:
-            self.active_buzzer.off()
-            self.passive_buzzer.stop()
-        except Exception as e:
-            print(f"Error stopping alarm: {e}")
+        # Cancel the alarm sound; the sunrise task returns at its next step
+        if self.sound_id is not None:
+            sound_manager.cancel(self.sound_id)
+            self.sound_id = None
+        self.sequence += 1
+        if self.sunrise_running:
+            self.sunrise_running = False
+            try:
+                self.rgb_strip.clear()
+            except Exception as e:
+                print(f"Error stopping sunrise: {e}")
         
+        event_bus.publish(ALARM_STOP)
         print("Alarm stopped")
     
-    def check_auto_stop(self):
-        """Auto-stop alarm after maximum duration"""
-        if self.alarm_active and self.alarm_start_time:
-            elapsed = time.ticks_diff(time.ticks_ms(), self.alarm_start_time)
-            if elapsed > (self.max_alarm_duration * 60 * 1000):  # Convert to ms
-                print("Alarm auto-stopped after maximum duration")
-                self.stop_alarm()
-                return True
-        return False
+    def _auto_stop(self):
+        """Auto-stop alarm after maximum duration (timer_wheel deadline)"""
+        self.auto_stop_timer = None
+        if self.alarm_active:
+            print("Alarm auto-stopped after maximum duration")
+            self.stop_alarm()
     
     def get_weather_adjustment(self):
         """Get wake-up time adjustment based on weather"""
@@ -279,20 +392,18 @@ class SmartAlarmSystem:
         return {
             'enabled': self.alarm_enabled,
             'time': f"{self.alarm_time[0]:02d}:{self.alarm_time[1]:02d}" if self.alarm_time else None,
+            'alarms': self.scheduler.get_schedule(),
             'type': self.current_alarm_type,
             'active': self.alarm_active,
+            'sound_running': sound_manager.is_active(self.sound_id),
+            'sunrise_running': self.sunrise_running,
             'snooze_time': f"{self.snooze_time[0]:02d}:{self.snooze_time[1]:02d}" if self.snooze_time else None,
             'current_time': self.get_time_string()
         }
     
-    def update(self):
-        """Main update loop - call this regularly"""
-        self.check_alarm_trigger()
-        self.check_auto_stop()
-        gc.collect()
-    
     def cleanup(self):
         """Clean up resources"""
+        self.cancel_snooze()
         self.stop_alarm()
         self.active_buzzer.cleanup()
         self.passive_buzzer.cleanup()
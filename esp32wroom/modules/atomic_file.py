@@ -0,0 +1,39 @@
+# Atomic File Writes for ESP32-WROVER Smart Home
+# Replace small state files on flash without leaving a half-written copy
+
+import uos
+
+def write_atomic(path, data, binary=False):
+    """Write data (or a list of chunks) to path.tmp, then rename it over path
+
+    FAT will not rename over an existing file, so the old file is removed
+    first; open_saved() finishes a save cut off between the two steps.
+    Raises OSError on failure, leaving the old file in place.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb' if binary else 'w') as f:
+        if isinstance(data, (list, tuple)):
+            for chunk in data:
+                f.write(chunk)
+        else:
+            f.write(data)
+    try:
+        uos.rename(tmp_path, path)
+    except OSError:
+        uos.remove(path)
+        uos.rename(tmp_path, path)
+
+def open_saved(path, mode='r'):
+    """Open a file written by write_atomic, recovering an interrupted save
+
+    If only path.tmp exists, power failed after the old file was removed;
+    the temporary file was complete by then, so it is renamed into place.
+    Raises OSError when neither exists.
+    """
+    try:
+        return open(path, mode)
+    except OSError:
+        pass
+    uos.rename(path + '.tmp', path)
+    print(f"Recovered {path} from an interrupted save")
+    return open(path, mode)
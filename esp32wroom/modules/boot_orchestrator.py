@@ -0,0 +1,136 @@
+# Boot Orchestrator for ESP32-WROVER Smart Home
+# Runs boot steps as uasyncio tasks as soon as their dependencies are done
+
+import utime
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+POLL_MS = 20
+
+# Step states
+PENDING = 0
+RUNNING = 1
+DONE = 2
+
+def _generator_type():
+    def gen():
+        yield
+    return type(gen())
+
+GENERATOR = _generator_type()
+
+class BootStep:
+    """One named boot step with the steps it has to wait for"""
+
+    def __init__(self, name, func, requires=()):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.state = PENDING
+        self.ok = False
+        self.error = None
+        self.start_ms = 0     # Relative to boot start
+        self.duration_ms = 0
+
+class BootOrchestrator:
+    """Dependency-aware boot: independent steps overlap while others wait on I/O
+
+    Step functions may be plain functions or uasyncio coroutines (generators);
+    either returns True on success. A step runs once all its requirements have
+    finished, whether they succeeded or not - steps check what they need.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.by_name = {}
+        self.boot_ticks = utime.ticks_ms()
+        self.finished = False
+        self.total_ms = 0
+        self.server_ms = None         # Web server listening
+        self.first_request_ms = None  # First request accepted
+
+    def add(self, name, func, requires=()):
+        """Register a boot step"""
+        step = BootStep(name, func, requires)
+        self.steps.append(step)
+        self.by_name[name] = step
+        return step
+
+    def elapsed_ms(self):
+        """Milliseconds since the orchestrator was created"""
+        return utime.ticks_diff(utime.ticks_ms(), self.boot_ticks)
+
+    def ok(self, name):
+        """True if the named step finished successfully"""
+        step = self.by_name.get(name)
+        return bool(step and step.ok)
+
+    def mark_server_started(self):
+        if self.server_ms is None:
+            self.server_ms = self.elapsed_ms()
+
+    def mark_first_request(self):
+        if self.first_request_ms is None:
+            self.first_request_ms = self.elapsed_ms()
+
+    def _ready(self, step):
+        for name in step.requires:
+            required = self.by_name.get(name)
+            if required and required.state != DONE:
+                return False
+        return True
+
+    def _run_step(self, step):
+        step.start_ms = self.elapsed_ms()
+        try:
+            result = step.func()
+            if isinstance(result, GENERATOR):
+                result = yield from result
+            step.ok = result is not False
+        except Exception as e:
+            step.error = str(e)
+            print(f"❌ Boot step {step.name} error: {e}")
+        step.duration_ms = self.elapsed_ms() - step.start_ms
+        step.state = DONE
+
+    def run(self):
+        """Coroutine that starts every step once runnable and returns when all are done"""
+        loop = asyncio.get_event_loop()
+        while True:
+            pending = 0
+            for step in self.steps:
+                if step.state == PENDING and self._ready(step):
+                    step.state = RUNNING
+                    loop.create_task(self._run_step(step))
+                if step.state != DONE:
+                    pending += 1
+            if not pending:
+                break
+            yield from asyncio.sleep_ms(POLL_MS)
+
+        self.finished = True
+        self.total_ms = self.elapsed_ms()
+        print(f"🏁 Boot finished in {self.total_ms}ms")
+
+    def success_count(self):
+        return sum(1 for s in self.steps if s.ok)
+
+    def get_report(self):
+        """Per-step timing breakdown for /api/system/boot"""
+        return {
+            'finished': self.finished,
+            'elapsed_ms': self.total_ms if self.finished else self.elapsed_ms(),
+            'server_listening_ms': self.server_ms,
+            'first_request_ms': self.first_request_ms,
+            'steps': [{
+                'name': s.name,
+                'requires': list(s.requires),
+                'state': ('pending', 'running', 'done')[s.state],
+                'ok': s.ok,
+                'error': s.error,
+                'start_ms': s.start_ms,
+                'duration_ms': s.duration_ms if s.state == DONE else None
+            } for s in self.steps]
+        }
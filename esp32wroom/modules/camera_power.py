@@ -0,0 +1,154 @@
+# Camera Power Manager for ESP32-WROVER Smart Home
+# Powers the camera down when idle and brings it back through a fast warm path
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+import camera
+from timer_wheel import timer_wheel
+
+# Import configuration
+try:
+    from config import CAMERA_CONFIG, CAMERA_PINS
+except ImportError:
+    # Fallback if config not available
+    CAMERA_CONFIG = {'IDLE_POWER_DOWN': False, 'IDLE_TIMEOUT_S': 120}
+    CAMERA_PINS = {}
+
+class CameraPower:
+    """Tracks camera activity and deinitializes the sensor after an idle period"""
+
+    def __init__(self):
+        self.enabled = CAMERA_CONFIG.get('IDLE_POWER_DOWN', False)
+        self.idle_timeout_ms = CAMERA_CONFIG.get('IDLE_TIMEOUT_S', 120) * 1000
+        self.powered = False
+        self.last_activity = utime.ticks_ms()
+        self.resume_callbacks = []   # Called after every init (e.g. settings restore)
+        self.suspend_callbacks = []  # Called before deinit
+        self.busy_check = None       # Returns True while a consumer holds the camera
+        self.idle_timer = None
+
+        # Statistics
+        self.cold_start_ms = 0  # Boot init including the test capture
+        self.power_downs = 0
+        self.resumes = 0
+        self.resume_failures = 0
+        self.last_resume_ms = 0
+        self.max_resume_ms = 0
+        self.last_first_frame_ms = 0
+        self._resume_ticks = None  # Set until the first frame after a resume
+
+    def on_resume(self, callback):
+        """Register callback() run after the camera is initialized"""
+        self.resume_callbacks.append(callback)
+
+    def on_suspend(self, callback):
+        """Register callback() run before the camera is powered down"""
+        self.suspend_callbacks.append(callback)
+
+    def power_on(self):
+        """Initialize the camera driver and run the resume callbacks"""
+        pins = CAMERA_PINS
+        camera.init(
+            0,  # Camera ID
+            d0=pins['D0'], d1=pins['D1'], d2=pins['D2'], d3=pins['D3'],
+            d4=pins['D4'], d5=pins['D5'], d6=pins['D6'], d7=pins['D7'],
+            format=camera.JPEG,
+            xclk_freq=camera.XCLK_20MHz,
+            href=pins['HREF'], vsync=pins['VSYNC'],
+            reset=pins['RESET'], pwdn=pins['PWDN'],
+            sioc=pins['SIOC'], siod=pins['SIOD'],
+            xclk=pins['XCLK'], pclk=pins['PCLK'],
+            fb_location=camera.PSRAM
+        )
+        self.powered = True
+        self.last_activity = utime.ticks_ms()
+        if self.enabled:
+            timer_wheel.cancel(self.idle_timer)
+            self.idle_timer = timer_wheel.call_later(self.idle_timeout_ms, self._idle_check,
+                                                     name='camera_idle')
+        for callback in self.resume_callbacks:
+            callback()
+
+    def power_off(self, force=False):
+        """Deinitialize the camera (PWDN pin and XCLK off)
+
+        force=True also deinitializes a driver this boot did not power on
+        (left running by a soft reset, or a failed init attempt).
+        """
+        if not self.powered and not force:
+            return
+        timer_wheel.cancel(self.idle_timer)
+        self.idle_timer = None
+        for callback in self.suspend_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Camera suspend callback error: {e}")
+        try:
+            camera.deinit()
+        except Exception as e:
+            print(f"Camera deinit error: {e}")
+        if self.powered:
+            self.powered = False
+            self.power_downs += 1
+            print("📷 Camera powered down")
+
+    def ensure_on(self):
+        """Make sure the camera is up; warm path without test capture or retries"""
+        if self.powered:
+            return True
+        start = utime.ticks_ms()
+        try:
+            self.power_on()
+        except Exception as e:
+            self.resume_failures += 1
+            print(f"Camera resume error: {e}")
+            return False
+        self.last_resume_ms = utime.ticks_diff(utime.ticks_ms(), start)
+        self.max_resume_ms = max(self.max_resume_ms, self.last_resume_ms)
+        self.resumes += 1
+        self._resume_ticks = start
+        print(f"📷 Camera resumed in {self.last_resume_ms}ms")
+        return True
+
+    def touch(self):
+        """Record camera use; the first call after a resume closes the latency measurement"""
+        self.last_activity = utime.ticks_ms()
+        if self._resume_ticks is not None:
+            self.last_first_frame_ms = utime.ticks_diff(self.last_activity, self._resume_ticks)
+            self._resume_ticks = None
+
+    def _idle_check(self):
+        """Idle deadline: power down, or re-arm for the rest of the timeout"""
+        self.idle_timer = None
+        if not self.powered:
+            return False
+        if self.busy_check and self.busy_check():
+            self.last_activity = utime.ticks_ms()
+        remaining = self.idle_timeout_ms - utime.ticks_diff(utime.ticks_ms(), self.last_activity)
+        if remaining > 0:
+            # touch() only stamps last_activity; the deadline moves here, once per timeout
+            self.idle_timer = timer_wheel.call_later(remaining, self._idle_check, name='camera_idle')
+            return False
+        self.power_off()
+        return True
+
+    def get_status(self):
+        """Get camera power statistics"""
+        return {
+            'enabled': self.enabled,
+            'powered': self.powered,
+            'idle_timeout_s': self.idle_timeout_ms // 1000,
+            'idle_ms': utime.ticks_diff(utime.ticks_ms(), self.last_activity),
+            'cold_start_ms': self.cold_start_ms,
+            'power_downs': self.power_downs,
+            'resumes': self.resumes,
+            'resume_failures': self.resume_failures,
+            'last_resume_ms': self.last_resume_ms,
+            'max_resume_ms': self.max_resume_ms,
+            'last_first_frame_ms': self.last_first_frame_ms
+        }
+
+# Shared instance - every capture path goes through ensure_on()
+camera_power = CameraPower()
@@ -0,0 +1,246 @@
+# Camera Settings Store for ESP32-WROVER Smart Home
+# Applies only changed sensor registers, switches named profiles, keeps settings on flash
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+import json
+import camera
+from camera_power import camera_power
+from atomic_file import write_atomic, open_saved
+
+# Import configuration
+try:
+    from config import CAMERA_CONFIG, CAMERA_PROFILES
+except ImportError:
+    # Fallback if config not available
+    CAMERA_CONFIG = {
+        'DEFAULT_SETTINGS': {
+            'quality': 15,
+            'brightness': 0,
+            'contrast': 0,
+            'saturation': 0,
+            'flip': 1,
+            'mirror': 1
+        },
+        'SETTINGS_PATH': '/camera_settings.json',
+        'RESIZE_DISCARD_FRAMES': 1
+    }
+    CAMERA_PROFILES = {'stream': {}, 'snapshot': {'quality': 10}}
+
+BASE_PROFILE = 'stream'
+
+# Setting name -> (camera setter, min, max); framesize goes first so the
+# other registers are written against the final sensor window
+SETTINGS = (
+    ('resolution', camera.framesize, 0, 255),
+    ('quality', camera.quality, 10, 63),
+    ('brightness', camera.brightness, -2, 2),
+    ('contrast', camera.contrast, -2, 2),
+    ('saturation', camera.saturation, -2, 2),
+    ('flip', camera.flip, 0, 1),
+    ('mirror', camera.mirror, 0, 1),
+)
+
+def resolve_profile(overrides):
+    """Turn config overrides into register values (framesize names -> constants)"""
+    profile = {}
+    for name, value in overrides.items():
+        if name == 'resolution' and isinstance(value, str):
+            value = getattr(camera, value, None)
+            if value is None:
+                continue  # Framesize not supported by this firmware
+        profile[name] = value
+    return profile
+
+class CameraSettingsStore:
+    """Requested camera settings, what the sensor has applied, and flash persistence"""
+
+    def __init__(self, path=None, profiles=None):
+        self.path = path or CAMERA_CONFIG.get('SETTINGS_PATH', '/camera_settings.json')
+        self.settings = dict(CAMERA_CONFIG['DEFAULT_SETTINGS'])
+        self.settings['resolution'] = camera.FRAME_QVGA
+        self.applied = {}  # Empty until the sensor has been programmed
+        self.discard_frames = CAMERA_CONFIG.get('RESIZE_DISCARD_FRAMES', 1)
+
+        # Profiles override the saved settings; 'stream' is the saved settings
+        self.profiles = {BASE_PROFILE: {}}
+        for name, overrides in (profiles or CAMERA_PROFILES).items():
+            self.profiles[name] = resolve_profile(overrides)
+        self.profile = BASE_PROFILE
+        self.switch_stats = {}  # 'from>to' -> [count, total_ms, max_ms, last_ms]
+
+        # Settings are reprogrammed in one pass whenever the camera powers up
+        camera_power.on_resume(self.restore)
+        camera_power.on_suspend(self.invalidate)
+
+        # Statistics
+        self.apply_count = 0
+        self.registers_written = 0
+        self.registers_skipped = 0
+        self.last_apply_ms = 0
+        self.save_count = 0
+
+        self.load()
+
+    def update(self, changes):
+        """Merge requested values into the saved settings, apply the differences and persist them"""
+        changed = False
+        for name, _, low, high in SETTINGS:
+            if name in changes:
+                value = max(low, min(high, int(changes[name])))
+                if self.settings[name] != value:
+                    self.settings[name] = value
+                    changed = True
+        written = self.apply()
+        if changed:
+            self.save()
+        return written
+
+    def target(self, profile=None):
+        """Register values of a profile on top of the saved settings"""
+        values = dict(self.settings)
+        values.update(self.profiles[profile or self.profile])
+        return values
+
+    def apply(self):
+        """Write only the registers whose applied value differs; returns their names"""
+        if not camera_power.powered:
+            return []  # Written by restore() on the next power-up
+        start = utime.ticks_ms()
+        target = self.target()
+        written = []
+        for name, setter, _, _ in SETTINGS:
+            value = target[name]
+            if self.applied.get(name) == value:
+                self.registers_skipped += 1
+                continue
+            try:
+                setter(value)
+                self.applied[name] = value
+                written.append(name)
+            except Exception as e:
+                print(f"Camera setting {name} error: {e}")
+        self.registers_written += len(written)
+        self.apply_count += 1
+        self.last_apply_ms = utime.ticks_diff(utime.ticks_ms(), start)
+        return written
+
+    def restore(self):
+        """Program every register from the stored settings (after camera init)"""
+        self.invalidate()
+        written = self.apply()
+        print(f"📷 Camera settings restored ({len(written)} registers, {self.last_apply_ms}ms)")
+        return written
+
+    def invalidate(self):
+        """Forget the applied state, e.g. after the sensor was reset"""
+        self.applied = {}
+
+    def mark_changed(self, *names):
+        """Forget registers that were written behind the store's back"""
+        for name in names:
+            self.applied.pop(name, None)
+
+    def use_profile(self, name):
+        """Switch to a named profile, writing only the differing registers
+
+        The recorded switch time includes dropping the stale frames the
+        sensor still delivers after a framesize change.
+        """
+        if name not in self.profiles:
+            print(f"Unknown camera profile: {name}")
+            return None
+        previous = self.profile
+        self.profile = name
+        start = utime.ticks_ms()
+        written = self.apply()
+        if 'resolution' in written:
+            for _ in range(self.discard_frames):
+                try:
+                    camera.capture()
+                except Exception:
+                    break
+        elapsed = utime.ticks_diff(utime.ticks_ms(), start)
+
+        key = previous + '>' + name
+        stats = self.switch_stats.get(key)
+        if stats is None:
+            stats = self.switch_stats[key] = [0, 0, 0, 0]
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+        stats[3] = elapsed
+        return written
+
+    def capture(self, profile):
+        """Capture one frame with a profile, then return to the current one"""
+        if not camera_power.ensure_on():
+            return None
+        previous = self.profile
+        self.use_profile(profile)
+        try:
+            return camera.capture()
+        finally:
+            self.use_profile(previous)
+            camera_power.touch()
+
+    def benchmark(self, rounds=3):
+        """Switch to every profile and back a few times; returns the switch stats"""
+        if not camera_power.ensure_on():
+            return self.get_switch_stats()
+        base = self.profile
+        for _ in range(rounds):
+            for name in self.profiles:
+                if name != base:
+                    self.use_profile(name)
+                    self.use_profile(base)
+        return self.get_switch_stats()
+
+    def get_switch_stats(self):
+        """Profile switch timings in ms"""
+        result = {}
+        for key, (count, total, worst, last) in self.switch_stats.items():
+            result[key] = {'count': count, 'avg_ms': total // count, 'max_ms': worst, 'last_ms': last}
+        return result
+
+    def save(self):
+        """Write the settings to flash atomically"""
+        try:
+            write_atomic(self.path, json.dumps(self.settings))
+            self.save_count += 1
+            return True
+        except Exception as e:
+            print(f"Camera settings save error: {e}")
+            return False
+
+    def load(self):
+        """Load saved settings over the defaults"""
+        try:
+            with open_saved(self.path) as f:
+                saved = json.loads(f.read())
+        except (OSError, ValueError):
+            return False
+        for name, _, low, high in SETTINGS:
+            if name in saved:
+                self.settings[name] = max(low, min(high, int(saved[name])))
+        print("Camera settings loaded from flash")
+        return True
+
+    def get_info(self):
+        """Get settings store statistics"""
+        return {
+            'path': self.path,
+            'in_sync': self.applied == self.target(),
+            'profile': self.profile,
+            'profiles': list(self.profiles),
+            'switch_ms': self.get_switch_stats(),
+            'apply_count': self.apply_count,
+            'registers_written': self.registers_written,
+            'registers_skipped': self.registers_skipped,
+            'last_apply_ms': self.last_apply_ms,
+            'save_count': self.save_count
+        }
+
+# Shared instance used by the web server and boot code
+camera_store = CameraSettingsStore()
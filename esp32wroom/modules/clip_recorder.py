@@ -0,0 +1,293 @@
+# Motion Clip Recorder for ESP32-WROVER Smart Home
+# Writes MJPEG AVI clips straight to flash in fixed-size chunks
+
+import sys
+sys.path.append('..')  # To access config
+import uos
+import utime
+import ustruct
+import gc
+from array import array
+
+# Import configuration
+try:
+    from config import CLIP_CONFIG
+except ImportError:
+    # Fallback if config not available
+    CLIP_CONFIG = {
+        'ENABLED': False,
+        'STORAGE_PATH': '/clips',
+        'DURATION_S': 5,
+        'FPS': 5,
+        'INCLUDE_PRE_TRIGGER': True,
+        'CHUNK_BYTES': 4096,
+        'MAX_CLIPS': 4,
+        'MAX_FRAMES': 120
+    }
+
+CLIP_PREFIX = 'clip_'
+CLIP_SUFFIX = '.avi'
+
+HEADER_BYTES = 224      # RIFF + hdrl up to and including the 'movi' fourcc
+AVIF_HASINDEX = 0x10
+AVIIF_KEYFRAME = 0x10
+
+def jpeg_size(frame):
+    """Return (width, height) from a JPEG SOF marker, or (0, 0)"""
+    i = 2
+    n = len(frame)
+    while i + 9 < n:
+        if frame[i] != 0xFF:
+            i += 1
+            continue
+        marker = frame[i + 1]
+        if marker in (0xC0, 0xC1, 0xC2):
+            height = (frame[i + 5] << 8) | frame[i + 6]
+            width = (frame[i + 7] << 8) | frame[i + 8]
+            return width, height
+        if marker == 0xD8 or marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        i += 2 + ((frame[i + 2] << 8) | frame[i + 3])
+    return 0, 0
+
+class ChunkWriter:
+    """Buffers writes so flash sees whole CHUNK_BYTES blocks"""
+
+    def __init__(self, f, chunk_bytes):
+        self.f = f
+        self.buf = bytearray(chunk_bytes)
+        self.fill = 0
+        self.position = 0  # Logical file position
+
+    def write(self, data):
+        mv = memoryview(data)
+        size = len(mv)
+        self.position += size
+        while size:
+            room = len(self.buf) - self.fill
+            if size < room:
+                self.buf[self.fill:self.fill + size] = mv
+                self.fill += size
+                return
+            self.buf[self.fill:] = mv[:room]
+            self.f.write(self.buf)
+            self.fill = 0
+            mv = mv[room:]
+            size -= room
+
+    def flush(self):
+        if self.fill:
+            self.f.write(memoryview(self.buf)[:self.fill])
+            self.fill = 0
+        self.f.flush()
+
+class ClipRecorder:
+    """Records N seconds of frames after a trigger into an AVI file"""
+
+    def __init__(self, frame_cache, storage_path=None):
+        self.frame_cache = frame_cache
+        self.storage_path = storage_path or CLIP_CONFIG['STORAGE_PATH']
+        self.duration_s = CLIP_CONFIG['DURATION_S']
+        self.fps = CLIP_CONFIG['FPS']
+        self.include_pre_trigger = CLIP_CONFIG['INCLUDE_PRE_TRIGGER']
+        self.chunk_bytes = CLIP_CONFIG['CHUNK_BYTES']
+        self.max_clips = CLIP_CONFIG['MAX_CLIPS']
+        self.max_frames = CLIP_CONFIG['MAX_FRAMES']
+
+        # Index kept as two small arrays - frame bodies never stay in RAM
+        self.offsets = array('I', [0] * self.max_frames)
+        self.sizes = array('I', [0] * self.max_frames)
+
+        self.recording = False
+        self.frame_count = 0
+        self.clip_path = None
+        self._file = None
+        self._writer = None
+        self._end_ticks = 0
+        self._next_frame_ticks = 0
+        self._max_frame = 0
+        self._width = 0
+        self._height = 0
+        self.clips_recorded = 0
+
+        try:
+            uos.mkdir(self.storage_path)
+        except OSError:
+            pass  # Directory already exists
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
+
+    def start(self, pre_frames=None):
+        """Open a new clip, writing any pre-trigger frames first"""
+        if self.recording:
+            # Retrigger extends the running clip
+            self._end_ticks = utime.ticks_add(utime.ticks_ms(), self.duration_s * 1000)
+            return self.clip_path
+
+        self._rotate_clips()
+        self.clip_path = f"{self.storage_path}/{CLIP_PREFIX}{self._next_clip_number():05d}{CLIP_SUFFIX}"
+        try:
+            self._file = open(self.clip_path, 'wb')
+        except OSError as e:
+            print(f"Clip open error: {e}")
+            return None
+
+        self._writer = ChunkWriter(self._file, self.chunk_bytes)
+        self._writer.write(bytes(HEADER_BYTES))  # Patched in finish()
+        self.frame_count = 0
+        self._max_frame = 0
+        self._width = 0
+        self._height = 0
+        self.recording = True
+
+        if pre_frames and self.include_pre_trigger:
+            for frame in pre_frames:
+                self.add_frame(frame)
+
+        now = utime.ticks_ms()
+        self._end_ticks = utime.ticks_add(now, self.duration_s * 1000)
+        self._next_frame_ticks = now
+        print(f"🎬 Clip recording started: {self.clip_path}")
+        return self.clip_path
+
+    def add_frame(self, frame):
+        """Append one JPEG frame as a '00dc' chunk"""
+        if not self.recording or self.frame_count >= self.max_frames:
+            return False
+
+        size = len(frame)
+        if not self._width:
+            self._width, self._height = jpeg_size(frame)
+
+        # idx1 offsets are relative to the 'movi' fourcc
+        self.offsets[self.frame_count] = self._writer.position - (HEADER_BYTES - 4)
+        self.sizes[self.frame_count] = size
+        self._writer.write(ustruct.pack('<4sI', b'00dc', size))
+        self._writer.write(frame)
+        if size & 1:
+            self._writer.write(b'\x00')
+        self.frame_count += 1
+        if size > self._max_frame:
+            self._max_frame = size
+        return True
+
+    def tick(self):
+        """Capture the next frame when due and finish after the duration"""
+        if not self.recording:
+            return
+        now = utime.ticks_ms()
+        if utime.ticks_diff(now, self._end_ticks) >= 0 or self.frame_count >= self.max_frames:
+            self.finish()
+            return
+        if utime.ticks_diff(now, self._next_frame_ticks) < 0:
+            return
+
+        self._next_frame_ticks = utime.ticks_add(now, 1000 // self.fps)
+        frame = self.frame_cache.get_frame()
+        if frame:
+            self.add_frame(frame)
+
+    def finish(self):
+        """Write the index and patch the headers"""
+        if not self.recording:
+            return None
+        self.recording = False
+        try:
+            count = self.frame_count
+            self._writer.write(ustruct.pack('<4sI', b'idx1', count * 16))
+            for i in range(count):
+                self._writer.write(ustruct.pack('<4sIII', b'00dc', AVIIF_KEYFRAME,
+                                                self.offsets[i], self.sizes[i]))
+            self._writer.flush()
+            total = self._writer.position
+
+            movi_size = total - HEADER_BYTES - 8 - count * 16 + 4
+            self._file.seek(0)
+            self._file.write(self._build_header(total, movi_size))
+            self._file.close()
+            self.clips_recorded += 1
+            print(f"🎬 Clip saved: {self.clip_path} ({count} frames, {total} bytes)")
+        except Exception as e:
+            print(f"Clip finish error: {e}")
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        self._file = None
+        self._writer = None
+        gc.collect()
+        return self.clip_path
+
+    def _build_header(self, total, movi_size):
+        """RIFF/AVI header for a single MJPEG video stream"""
+        count = self.frame_count
+        usec = 1000000 // self.fps
+        w, h = self._width, self._height
+        return b''.join([
+            ustruct.pack('<4sI4s', b'RIFF', total - 8, b'AVI '),
+            ustruct.pack('<4sI4s', b'LIST', 192, b'hdrl'),
+            ustruct.pack('<4sI', b'avih', 56),
+            ustruct.pack('<14I', usec, self._max_frame * self.fps, 0, AVIF_HASINDEX,
+                         count, 0, 1, self._max_frame, w, h, 0, 0, 0, 0),
+            ustruct.pack('<4sI4s', b'LIST', 116, b'strl'),
+            ustruct.pack('<4sI', b'strh', 56),
+            ustruct.pack('<4s4sIHHIIIIIIiI4h', b'vids', b'MJPG', 0, 0, 0, 0,
+                         1, self.fps, 0, count, self._max_frame, -1, 0, 0, 0, w, h),
+            ustruct.pack('<4sI', b'strf', 40),
+            ustruct.pack('<IiiHH4sIiiII', 40, w, h, 1, 24, b'MJPG', w * h * 3, 0, 0, 0, 0),
+            ustruct.pack('<4sI4s', b'LIST', movi_size, b'movi'),
+        ])
+
+    # -------------------------------------------------------------------------
+    # Storage
+    # -------------------------------------------------------------------------
+
+    def list_clips(self):
+        """Clip file names, newest first"""
+        try:
+            names = [n for n in uos.listdir(self.storage_path)
+                     if n.startswith(CLIP_PREFIX) and n.endswith(CLIP_SUFFIX)]
+        except OSError:
+            return []
+        names.sort(reverse=True)
+        if self.recording:
+            current = self.clip_path[len(self.storage_path) + 1:]
+            names = [n for n in names if n != current]
+        return names
+
+    def clip_file(self, name):
+        """Full path of a finished clip, or None"""
+        if '/' in name or '..' in name or name not in self.list_clips():
+            return None
+        return f"{self.storage_path}/{name}"
+
+    def _next_clip_number(self):
+        names = self.list_clips()
+        if not names:
+            return 1
+        return int(names[0][len(CLIP_PREFIX):-len(CLIP_SUFFIX)]) + 1
+
+    def _rotate_clips(self):
+        names = self.list_clips()
+        while len(names) >= self.max_clips:
+            oldest = names.pop()
+            try:
+                uos.remove(f"{self.storage_path}/{oldest}")
+                print(f"Deleted old clip: {oldest}")
+            except OSError:
+                pass
+
+    def get_status(self):
+        """Get clip recorder status"""
+        return {
+            'recording': self.recording,
+            'frames': self.frame_count,
+            'current_clip': self.clip_path if self.recording else None,
+            'clips': self.list_clips(),
+            'clips_recorded': self.clips_recorded,
+            'duration_s': self.duration_s,
+            'fps': self.fps
+        }
@@ -8,6 +8,8 @@ import dht
 from machine import Pin
 import time
 import gc
+from event_bus import event_bus, SENSOR
+from timer_wheel import timer_wheel
 
 # Import configuration
 try:
@@ -43,6 +45,7 @@ class EnvironmentalSensor:
         self.comfort_zones = SENSOR_CONFIG['DHT11']['COMFORT_ZONES']
         
         self.last_reading_time = 0
+        self.sample_timer = None
         
         # Current readings
         self.temperature_c = 0
@@ -52,16 +55,17 @@ class EnvironmentalSensor:
         # Status
         self.sensor_status = "initializing"
         self.error_count = 0
+        self.last_published = None  # Reading last sent to the event bus
         
         print("Environmental sensor initialized on Pin " + str(dht_pin))
         print(f"Config: Read interval={self.reading_interval}ms, Error threshold={self.error_threshold}")
     
-    def read_sensors(self):
+    def read_sensors(self, force=False):
         """Read all environmental sensors"""
         current_time = time.ticks_ms()
         
         # Check if enough time has passed
-        if time.ticks_diff(current_time, self.last_reading_time) < self.reading_interval:
+        if not force and time.ticks_diff(current_time, self.last_reading_time) < self.reading_interval:
             return True  # Return cached values
         
         try:
@@ -73,9 +77,17 @@ class EnvironmentalSensor:
             
             # Update status
             if self.temperature_c > 0 and self.humidity > 0:
+                changed = (self.temperature_c, self.humidity) != self.last_published
                 self.sensor_status = "ok"
                 self.error_count = 0
                 self.last_reading_time = current_time
+                if changed:
+                    self.last_published = (self.temperature_c, self.humidity)
+                    event_bus.publish(SENSOR, {
+                        'temperature_c': self.temperature_c,
+                        'humidity': self.humidity,
+                        'status': self.sensor_status
+                    })
                 return True
             else:
                 self.sensor_status = "invalid_reading"
@@ -87,6 +99,18 @@ class EnvironmentalSensor:
             print("Environmental sensor error: " + str(e))
             return False
     
+    def start_sampling(self):
+        """Read the sensor every READ_INTERVAL from the timer wheel"""
+        if self.sample_timer is None:
+            self.sample_timer = timer_wheel.call_every(self.reading_interval, self._sample, name='sensor')
+    
+    def stop_sampling(self):
+        timer_wheel.cancel(self.sample_timer)
+        self.sample_timer = None
+    
+    def _sample(self):
+        self.read_sensors(force=True)
+    
     def get_readings_dict(self):
         """Get readings as dictionary for web interface"""
         # Try to get fresh reading
@@ -181,4 +205,5 @@ class EnvironmentalSensor:
     
     def cleanup(self):
         """Cleanup resources"""
+        self.stop_sampling()
         gc.collect() 
\ No newline at end of file
@@ -0,0 +1,249 @@
+# Event Bus for ESP32-WROVER Smart Home
+# Publish/subscribe with preallocated events and a bounded async dispatch queue
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+from boot_orchestrator import GENERATOR
+
+# Import configuration
+try:
+    from config import EVENT_BUS_CONFIG
+except ImportError:
+    # Fallback if config not available
+    EVENT_BUS_CONFIG = {
+        'QUEUE_SIZE': 16,
+        'BATCH': 4,
+        'LISTENER_BACKLOG': 8
+    }
+
+# Topics
+MOTION = 'motion'              # data: {'count', 'confidence'} - published before the capture
+MOTION_PHOTO = 'motion_photo'  # data: {'count', 'photo'}
+MOTION_END = 'motion_end'      # data: None
+ALARM = 'alarm'                # data: {'type'}
+ALARM_STOP = 'alarm_stop'      # data: None
+SENSOR = 'sensor'              # data: {'temperature_c', 'humidity', 'status'}
+NETWORK = 'network'            # data: {'connected', 'ip'}
+RULE = 'rule'                  # data: {'rule', 'actions'}
+ALL = '*'                      # Subscribe to every topic
+
+class Event:
+    """Reusable queue slot; handlers get its topic and data, never the slot"""
+
+    def __init__(self):
+        self.topic = None
+        self.data = None
+        self.ticks = 0
+
+class Subscriber:
+    """A handler with its priority and call statistics"""
+
+    def __init__(self, topic, handler, priority=0, name=None):
+        self.topic = topic
+        self.handler = handler
+        self.priority = priority
+        self.name = name or topic
+        self.calls = 0
+        self.errors = 0
+        self.total_us = 0
+        self.max_us = 0
+
+class EventListener:
+    """Bounded backlog of events for one streaming client (oldest dropped)"""
+
+    def __init__(self, topics=None, backlog=None):
+        self.topics = topics
+        self.backlog = backlog or EVENT_BUS_CONFIG.get('LISTENER_BACKLOG', 8)
+        self.items = []
+        self.dropped = 0
+        self.sub = None  # Set by EventBus.listen()
+
+    def push(self, topic, data):
+        if self.topics and topic not in self.topics:
+            return
+        if len(self.items) >= self.backlog:
+            self.items.pop(0)
+            self.dropped += 1
+        self.items.append((topic, data))
+
+    def pop(self):
+        return self.items.pop(0) if self.items else None
+
+class EventBus:
+    """Producers publish without blocking; a uasyncio task runs the handlers
+
+    Events live in a fixed ring of preallocated slots. When the ring is full
+    new events are dropped and counted rather than growing the heap. Topic
+    subscribers run highest priority first, then the '*' subscribers.
+    Handlers are called as handler(topic, data); handlers that return a
+    generator are started as their own task.
+    """
+
+    def __init__(self, queue_size=None):
+        self.size = queue_size or EVENT_BUS_CONFIG.get('QUEUE_SIZE', 16)
+        self.batch = EVENT_BUS_CONFIG.get('BATCH', 4)
+        self.events = [Event() for _ in range(self.size)]
+        self.head = 0   # Oldest undispatched slot
+        self.depth = 0  # Undispatched events
+        self.subscribers = {}  # topic -> [Subscriber], highest priority first
+        self.listeners = []
+        self.running = False
+        self.draining = False  # A dispatch task is scheduled or running
+
+        # Statistics
+        self.published = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.wakeups = 0
+        self.max_depth = 0
+        self.total_lag_ms = 0
+        self.max_lag_ms = 0
+
+    def subscribe(self, topic, handler, priority=0, name=None):
+        """Call handler(topic, data) for topic ('*' for all); returns the subscriber"""
+        sub = Subscriber(topic, handler, priority, name)
+        subs = self.subscribers.setdefault(topic, [])
+        index = len(subs)
+        while index and subs[index - 1].priority < priority:
+            index -= 1
+        subs.insert(index, sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        subs = self.subscribers.get(sub.topic)
+        if subs and sub in subs:
+            subs.remove(sub)
+
+    def listen(self, topics=None, backlog=None):
+        """Attach a listener that buffers events for a streaming client"""
+        listener = EventListener(topics, backlog)
+        listener.sub = self.subscribe(ALL, listener.push, priority=-100, name='listener')
+        self.listeners.append(listener)
+        return listener
+
+    def unlisten(self, listener):
+        self.unsubscribe(listener.sub)
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def publish(self, topic, data=None):
+        """Queue an event; returns False (and counts a drop) if the queue is full"""
+        if self.depth >= self.size:
+            self.dropped += 1
+            return False
+        event = self.events[(self.head + self.depth) % self.size]
+        event.topic = topic
+        event.data = data
+        event.ticks = utime.ticks_ms()
+        self.depth += 1
+        self.published += 1
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+        if self.running and not self.draining:
+            self._start_drain()
+        return True
+
+    def _call(self, sub, event):
+        start = utime.ticks_us()
+        try:
+            result = sub.handler(event.topic, event.data)
+            if isinstance(result, GENERATOR):
+                asyncio.get_event_loop().create_task(result)
+        except Exception as e:
+            sub.errors += 1
+            print(f"Event handler {sub.name} error: {e}")
+        elapsed = utime.ticks_diff(utime.ticks_us(), start)
+        sub.calls += 1
+        sub.total_us += elapsed
+        if elapsed > sub.max_us:
+            sub.max_us = elapsed
+
+    def dispatch_one(self):
+        """Run the handlers of the oldest queued event"""
+        if not self.depth:
+            return False
+        event = self.events[self.head]
+        lag = utime.ticks_diff(utime.ticks_ms(), event.ticks)
+        self.total_lag_ms += lag
+        if lag > self.max_lag_ms:
+            self.max_lag_ms = lag
+
+        for sub in self.subscribers.get(event.topic, ()):
+            self._call(sub, event)
+        for sub in self.subscribers.get(ALL, ()):
+            self._call(sub, event)
+
+        # Release the slot only now so handlers can publish follow-up events
+        event.topic = None
+        event.data = None
+        self.head = (self.head + 1) % self.size
+        self.depth -= 1
+        self.dispatched += 1
+        return True
+
+    def _start_drain(self):
+        self.draining = True
+        self.wakeups += 1
+        asyncio.get_event_loop().create_task(self._drain())
+
+    def _drain(self):
+        """Dispatch until the queue is empty, a batch per slice - uasyncio coroutine"""
+        while True:
+            yield from asyncio.sleep_ms(0)  # The producer carries on first
+            handled = 0
+            while self.depth and handled < self.batch:
+                self.dispatch_one()
+                handled += 1
+            if not self.depth:
+                break
+        self.draining = False
+
+    def run(self):
+        """Start dispatching - uasyncio coroutine
+
+        Delivers what was published before the loop started. After that,
+        publish() starts a dispatch task only when one is needed, so an
+        idle bus costs no wakeups.
+        """
+        self.running = True
+        if not self.draining:
+            self.draining = True
+            self.wakeups += 1
+            yield from self._drain()
+
+    def get_stats(self):
+        """Queue depth, dispatch lag and per-handler latency"""
+        subscribers = []
+        for topic in self.subscribers:
+            for sub in self.subscribers[topic]:
+                subscribers.append({
+                    'topic': topic,
+                    'name': sub.name,
+                    'priority': sub.priority,
+                    'calls': sub.calls,
+                    'errors': sub.errors,
+                    'avg_us': sub.total_us // sub.calls if sub.calls else 0,
+                    'max_us': sub.max_us
+                })
+        return {
+            'running': self.running,
+            'queue_size': self.size,
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'published': self.published,
+            'dispatched': self.dispatched,
+            'dropped': self.dropped,
+            'wakeups': self.wakeups,
+            'avg_lag_ms': self.total_lag_ms // self.dispatched if self.dispatched else 0,
+            'max_lag_ms': self.max_lag_ms,
+            'listeners': len(self.listeners),
+            'subscribers': subscribers
+        }
+
+# Shared instance - producers publish here, main wires the reactions
+event_bus = EventBus()
@@ -0,0 +1,122 @@
+# Shared Camera Frame Cache for ESP32-WROVER Smart Home
+# Single capture path used by streaming, motion capture and the pre-trigger ring
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+import camera
+from camera_power import camera_power
+
+# Import configuration
+try:
+    from config import MOTION_CONFIG
+except ImportError:
+    # Fallback if config not available
+    MOTION_CONFIG = {'FRAME_CACHE_MAX_AGE_MS': 80}
+
+class FrameCache:
+    """Keeps the latest camera frame so concurrent consumers share captures"""
+
+    def __init__(self, max_age_ms=None):
+        if max_age_ms is None:
+            max_age_ms = MOTION_CONFIG['FRAME_CACHE_MAX_AGE_MS']
+        self.max_age_ms = max_age_ms
+        self.frame = None
+        self.frame_ticks = 0
+        self.stream_clients = 0
+        self.listeners = []
+
+        # Statistics
+        self.captures = 0
+        self.cache_hits = 0
+        self.capture_errors = 0
+
+    def add_listener(self, callback):
+        """Register callback(frame, ticks) called on every new capture"""
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregister a capture listener"""
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def get_frame(self, max_age_ms=None):
+        """Return a frame no older than max_age_ms, capturing if needed"""
+        if max_age_ms is None:
+            max_age_ms = self.max_age_ms
+
+        now = utime.ticks_ms()
+        if self.frame and utime.ticks_diff(now, self.frame_ticks) <= max_age_ms:
+            self.cache_hits += 1
+            return self.frame
+
+        return self.capture()
+
+    def peek(self, max_age_ms):
+        """Return the cached frame if it is young enough, without capturing"""
+        if self.frame and utime.ticks_diff(utime.ticks_ms(), self.frame_ticks) <= max_age_ms:
+            self.cache_hits += 1
+            return self.frame
+        return None
+
+    def capture(self):
+        """Capture a fresh frame and hand it to the listeners"""
+        if not camera_power.ensure_on():
+            self.capture_errors += 1
+            return None
+        try:
+            frame = camera.capture()
+        except Exception as e:
+            print(f"Frame capture error: {e}")
+            self.capture_errors += 1
+            return None
+
+        if not frame:
+            self.capture_errors += 1
+            return None
+
+        self.frame = frame
+        self.frame_ticks = utime.ticks_ms()
+        self.captures += 1
+        camera_power.touch()
+
+        for callback in self.listeners:
+            try:
+                callback(frame, self.frame_ticks)
+            except Exception as e:
+                print(f"Frame listener error: {e}")
+
+        return frame
+
+    def release(self):
+        """Drop the cached frame so its memory can be reclaimed"""
+        self.frame = None
+
+    def stream_started(self):
+        """Register an active stream client"""
+        self.stream_clients += 1
+
+    def stream_stopped(self):
+        """Unregister an active stream client"""
+        if self.stream_clients > 0:
+            self.stream_clients -= 1
+        if self.stream_clients == 0:
+            self.release()
+
+    def is_streaming(self):
+        """True while at least one stream client is pulling frames"""
+        return self.stream_clients > 0
+
+    def get_stats(self):
+        """Get frame cache statistics"""
+        return {
+            'captures': self.captures,
+            'cache_hits': self.cache_hits,
+            'capture_errors': self.capture_errors,
+            'stream_clients': self.stream_clients,
+            'max_age_ms': self.max_age_ms
+        }
+
+# Shared instance used by every capture path
+frame_cache = FrameCache()
@@ -0,0 +1,125 @@
+# Pre-trigger Frame Ring for ESP32-WROVER Smart Home
+# Keeps the last N frames in preallocated PSRAM slots while motion is armed
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+
+# Import configuration
+try:
+    from config import MOTION_CONFIG
+except ImportError:
+    # Fallback if config not available
+    MOTION_CONFIG = {
+        'PRE_TRIGGER_FRAMES': 4,
+        'PRE_TRIGGER_INTERVAL_MS': 250,
+        'RING_MAX_BYTES': 64 * 1024
+    }
+
+class FrameRing:
+    """Fixed-memory ring of recent JPEG frames"""
+
+    def __init__(self, frame_cache, num_frames=None, max_bytes=None, interval_ms=None):
+        if num_frames is None:
+            num_frames = MOTION_CONFIG['PRE_TRIGGER_FRAMES']
+        if max_bytes is None:
+            max_bytes = MOTION_CONFIG['RING_MAX_BYTES']
+        if interval_ms is None:
+            interval_ms = MOTION_CONFIG['PRE_TRIGGER_INTERVAL_MS']
+
+        self.frame_cache = frame_cache
+        self.num_frames = max(1, num_frames)
+        self.interval_ms = interval_ms
+
+        # Slots are allocated once so the ring never grows or fragments the heap
+        self.slot_size = max_bytes // self.num_frames
+        self.slots = [bytearray(self.slot_size) for _ in range(self.num_frames)]
+        self.lengths = [0] * self.num_frames
+        self.ticks = [0] * self.num_frames
+        self.head = 0   # Next slot to write
+        self.count = 0  # Valid frames in the ring
+
+        self.armed = False
+        self.frozen = False
+        self.last_store_ticks = 0
+        self.dropped_frames = 0  # Frames larger than one slot
+
+        print(f"Frame ring ready - {self.num_frames} slots x {self.slot_size} bytes")
+
+    def arm(self):
+        """Start collecting frames"""
+        if not self.armed:
+            self.armed = True
+            self.frame_cache.add_listener(self._on_frame)
+
+    def disarm(self):
+        """Stop collecting frames and forget the buffered ones"""
+        if self.armed:
+            self.armed = False
+            self.frame_cache.remove_listener(self._on_frame)
+        self.clear()
+
+    def clear(self):
+        """Mark all slots empty"""
+        self.head = 0
+        self.count = 0
+
+    def freeze(self):
+        """Stop accepting frames while an event is being committed"""
+        self.frozen = True
+
+    def unfreeze(self):
+        """Resume accepting frames"""
+        self.frozen = False
+
+    def tick(self):
+        """Sample a frame if the interval has elapsed (call from the main loop)"""
+        if not self.armed or self.frozen:
+            return
+        # An active stream already feeds us through the frame cache listener
+        if self.frame_cache.is_streaming():
+            return
+        if utime.ticks_diff(utime.ticks_ms(), self.last_store_ticks) >= self.interval_ms:
+            self.frame_cache.capture()
+
+    def _on_frame(self, frame, ticks):
+        """Frame cache listener - copy the frame into the next slot"""
+        if self.frozen:
+            return
+        if utime.ticks_diff(ticks, self.last_store_ticks) < self.interval_ms:
+            return
+
+        size = len(frame)
+        if size > self.slot_size:
+            self.dropped_frames += 1
+            return
+
+        slot = self.head
+        self.slots[slot][:size] = frame
+        self.lengths[slot] = size
+        self.ticks[slot] = ticks
+        self.head = (slot + 1) % self.num_frames
+        if self.count < self.num_frames:
+            self.count += 1
+        self.last_store_ticks = ticks
+
+    def frames(self):
+        """Return memoryviews of the buffered frames, oldest first"""
+        result = []
+        start = (self.head - self.count) % self.num_frames
+        for i in range(self.count):
+            slot = (start + i) % self.num_frames
+            result.append(memoryview(self.slots[slot])[:self.lengths[slot]])
+        return result
+
+    def get_info(self):
+        """Get ring buffer statistics"""
+        return {
+            'armed': self.armed,
+            'frames': self.count,
+            'num_frames': self.num_frames,
+            'slot_size': self.slot_size,
+            'ring_bytes': self.slot_size * self.num_frames,
+            'interval_ms': self.interval_ms,
+            'dropped_frames': self.dropped_frames
+        }
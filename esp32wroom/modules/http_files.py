@@ -0,0 +1,239 @@
+# HTTP File Helpers for ESP32-WROVER Smart Home
+# Streams flash files (or regions of them) with Content-Length and Range support
+
+import sys
+sys.path.append('..')  # To access config
+import picoweb
+import utime
+
+# Import configuration
+try:
+    from config import NTP_CONFIG
+except ImportError:
+    # Fallback if config not available
+    NTP_CONFIG = {'UTC_OFFSET_S': 0}
+
+SEND_BUFSZ = 1024
+POOL_SIZE = 2           # Buffers kept for reuse between requests
+
+# Immutable content (photos, finished clips) can be cached by the browser
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+
+_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+           "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# Device clocks may count from 2000; archives want Unix time
+EPOCH_OFFSET = 946684800 if utime.localtime(0)[0] == 2000 else 0
+
+# The RTC keeps local time (time_sync sets UTC + UTC_OFFSET_S); HTTP dates
+# and tar mtimes are UTC
+UTC_OFFSET_S = NTP_CONFIG.get('UTC_OFFSET_S', 0)
+
+TAR_BLOCK = 512
+
+_buffer_pool = []
+
+def acquire_buffer():
+    """Take a send buffer from the pool (allocating only when it is empty)"""
+    if _buffer_pool:
+        return _buffer_pool.pop()
+    return bytearray(SEND_BUFSZ)
+
+def release_buffer(buf):
+    """Return a send buffer to the pool"""
+    if len(_buffer_pool) < POOL_SIZE:
+        _buffer_pool.append(buf)
+
+def http_date(timestamp):
+    """Format a device (local time) timestamp as an RFC 7231 date"""
+    t = utime.localtime(timestamp - UTC_OFFSET_S)
+    return "%s, %02d %s %04d %02d:%02d:%02d GMT" % (
+        _DAYS[t[6]], t[2], _MONTHS[t[1] - 1], t[0], t[3], t[4], t[5])
+
+def _header(req, name):
+    headers = getattr(req, 'headers', None) or {}
+    value = headers.get(name)
+    if isinstance(value, bytes):
+        value = value.decode()
+    return value
+
+def is_not_modified(req, etag=None, last_modified=None):
+    """True when the client's conditional headers match the current validators"""
+    if_none_match = _header(req, b'If-None-Match')
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        if not etag:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == etag:
+                return True
+        return False
+
+    # We only ever hand out our own dates, so an exact match is enough
+    if_modified_since = _header(req, b'If-Modified-Since')
+    return bool(last_modified and if_modified_since == last_modified)
+
+def parse_range(value, size):
+    """Parse a single 'bytes=start-end' range; returns (start, end) inclusive
+
+    Returns None when there is no usable range header and False when the
+    range cannot be satisfied.
+    """
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode()
+    if not value.startswith('bytes=') or ',' in value:
+        return None  # Multi-range requests get the full body
+
+    spec = value[6:].strip()
+    try:
+        start, end = spec.split('-', 1)
+        if start:
+            start = int(start)
+            end = int(end) if end else size - 1
+        else:
+            # Suffix range: last N bytes
+            length = int(end)
+            if length <= 0:
+                return False
+            start = max(0, size - length)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+def send_region(resp, f, length):
+    """Stream length bytes from the current file position; returns bytes sent"""
+    buf = acquire_buffer()
+    remaining = length
+    try:
+        while remaining > 0:
+            n = f.readinto(buf)
+            if not n:
+                break
+            n = min(n, remaining)
+            yield from resp.awrite(buf, 0, n)
+            remaining -= n
+    finally:
+        release_buffer(buf)
+    return length - remaining
+
+def send_file(req, resp, f, size, content_type, offset=0, headers=None,
+              etag=None, last_modified=None):
+    """Send a file region, honouring conditional and Range request headers
+
+    f must be open; the body lives at offset..offset+size in the file.
+    The caller keeps ownership of f and closes it.
+    """
+    response_headers = {"Accept-Ranges": "bytes"}
+    if etag:
+        response_headers["ETag"] = etag
+    if last_modified:
+        response_headers["Last-Modified"] = last_modified
+    if headers:
+        response_headers.update(headers)
+
+    if is_not_modified(req, etag, last_modified):
+        yield from picoweb.start_response(resp, content_type=content_type,
+                                          status="304", headers=response_headers)
+        return
+
+    byte_range = parse_range(_header(req, b'Range'), size)
+    if_range = _header(req, b'If-Range')
+    if byte_range and if_range and if_range not in (etag, last_modified):
+        byte_range = None  # Resource changed since the partial download began
+
+    if byte_range is False:
+        response_headers["Content-Range"] = f"bytes */{size}"
+        yield from picoweb.start_response(resp, content_type=content_type,
+                                          status="416", headers=response_headers)
+        return
+
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        status = "206"
+    else:
+        start = 0
+        length = size
+        status = "200"
+
+    response_headers["Content-Length"] = str(length)
+    yield from picoweb.start_response(resp, content_type=content_type,
+                                      status=status, headers=response_headers)
+    if req.method == "HEAD":
+        return
+    f.seek(offset + start)
+    yield from send_region(resp, f, length)
+
+def tar_padding(size):
+    """Zero bytes needed to round a tar member body up to a whole block"""
+    return -size % TAR_BLOCK
+
+def tar_size(sizes):
+    """Exact archive size for members of the given body sizes"""
+    total = 2 * TAR_BLOCK  # End-of-archive marker
+    for size in sizes:
+        total += TAR_BLOCK + size + tar_padding(size)
+    return total
+
+def tar_header(buf, name, size, mtime):
+    """Fill buf (512 bytes) with a ustar header for a regular file"""
+    for i in range(TAR_BLOCK):
+        buf[i] = 0
+    name = name.encode()[:100]
+    buf[0:len(name)] = name
+    buf[100:108] = b'0000644\0'
+    buf[108:116] = b'0000000\0'
+    buf[116:124] = b'0000000\0'
+    buf[124:136] = b'%011o\0' % size
+    buf[136:148] = b'%011o\0' % (mtime - UTC_OFFSET_S + EPOCH_OFFSET)
+    buf[148:156] = b'        '  # Checksum is computed with spaces here
+    buf[156] = ord('0')
+    buf[257:265] = b'ustar\x0000'
+    checksum = 0
+    for b in buf:
+        checksum += b
+    buf[148:156] = b'%06o\0 ' % checksum
+    return buf
+
+def send_tar(resp, members):
+    """Stream a tar archive of (name, size, mtime, opener) members
+
+    opener() returns an open file positioned at the member body (or None);
+    only one header block and one send buffer are held at a time.
+    """
+    header = bytearray(TAR_BLOCK)
+    for name, size, mtime, opener in members:
+        yield from resp.awrite(tar_header(header, name, size, mtime))
+        f = opener()
+        if f:
+            try:
+                sent = yield from send_region(resp, f, size)
+            finally:
+                f.close()
+        else:
+            sent = 0
+        # A body reclaimed mid-export is zero-filled to keep the announced size
+        for i in range(TAR_BLOCK):
+            header[i] = 0
+        remaining = size - sent + tar_padding(size)
+        while remaining > 0:
+            n = min(remaining, TAR_BLOCK)
+            yield from resp.awrite(header, 0, n)
+            remaining -= n
+    for i in range(TAR_BLOCK):
+        header[i] = 0
+    yield from resp.awrite(header)
+    yield from resp.awrite(header)
@@ -0,0 +1,105 @@
+# Lazy Module Registry for ESP32-WROVER Smart Home
+# Subsystems are constructed (and their libraries imported) on first use
+
+import gc
+import utime
+
+class LazyModule:
+    """Stands in for a subsystem until one of its attributes is first used"""
+
+    def __init__(self, name, loader):
+        self._name = name
+        self._loader = loader
+        self._instance = None
+        self._failed = False
+        self._error = None
+        self._load_ms = None
+        self._heap_bytes = None
+
+    def _resolve(self):
+        if self._instance is not None:
+            return self._instance
+        if self._failed:
+            raise RuntimeError(f"{self._name} unavailable: {self._error}")
+
+        print(f"⏳ Loading {self._name} on first use...")
+        gc.collect()
+        free_before = gc.mem_free()
+        start = utime.ticks_ms()
+        try:
+            instance = self._loader()
+        except Exception as e:
+            instance = None
+            self._error = str(e)
+        if instance is None:
+            self._failed = True
+            if self._error is None:
+                self._error = "init failed"
+            raise RuntimeError(f"{self._name} unavailable: {self._error}")
+
+        self._load_ms = utime.ticks_diff(utime.ticks_ms(), start)
+        gc.collect()
+        self._heap_bytes = free_before - gc.mem_free()
+        self._instance = instance
+        return instance
+
+    def __getattr__(self, attr):
+        # Only called for attributes the proxy itself does not have
+        return getattr(self._resolve(), attr)
+
+    def __bool__(self):
+        # A proxy counts as available until loading it has failed
+        return not self._failed
+
+def loaded(module):
+    """The real object behind module if it is already initialized, else None"""
+    if isinstance(module, LazyModule):
+        return module._instance
+    return module
+
+class ModuleRegistry:
+    """Named lazy modules with optional eager warm-up"""
+
+    def __init__(self):
+        self.names = []
+        self.modules = {}
+
+    def register(self, name, loader):
+        """Register loader() -> instance (None on failure); returns the proxy"""
+        proxy = LazyModule(name, loader)
+        self.names.append(name)
+        self.modules[name] = proxy
+        return proxy
+
+    def get(self, name):
+        return self.modules.get(name)
+
+    def is_loaded(self, name):
+        proxy = self.modules.get(name)
+        return bool(proxy and proxy._instance is not None)
+
+    def warm_up(self, name):
+        """Load a module now; returns True if it is available"""
+        proxy = self.modules.get(name)
+        if not proxy:
+            return False
+        try:
+            proxy._resolve()
+            return True
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return False
+
+    def get_status(self):
+        """Load state, init time and heap cost of every module"""
+        status = {}
+        for name in self.names:
+            proxy = self.modules[name]
+            status[name] = {
+                'loaded': proxy._instance is not None,
+                'failed': proxy._failed,
+                'error': proxy._error,
+                'load_ms': proxy._load_ms,
+                'heap_bytes': proxy._heap_bytes
+            }
+        return status
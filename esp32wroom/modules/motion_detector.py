@@ -1,23 +1,73 @@
 # PIR Motion Detection Module for ESP32-WROVER Smart Home
 # Handles motion detection, automatic photo capture, and local storage
 
+import sys
+sys.path.append('..')  # To access config
 from machine import Pin
 import utime
-import camera
 import gc
 import uos
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+from frame_cache import frame_cache
+from camera_settings import camera_store
+from frame_ring import FrameRing
+from photo_log import PhotoLog, KIND_MOTION, KIND_THUMB, E_ID, E_TIME, E_LENGTH, E_REF, E_KIND
+from vision_motion import VisionMotionSampler
+from clip_recorder import ClipRecorder
+from motion_events import MotionEventLog
+from event_bus import event_bus, MOTION, MOTION_END, MOTION_PHOTO
+from timer_wheel import timer_wheel
+
+# Import configuration
+try:
+    from config import MOTION_CONFIG, PHOTO_LOG_CONFIG, VISION_CONFIG, CLIP_CONFIG, THUMBNAIL_CONFIG
+except ImportError:
+    # Fallback if config not available
+    THUMBNAIL_CONFIG = {
+        'ENABLED': False,
+        'PROFILE': 'thumbnail',
+        'PAGE_SIZE': 20,
+        'MAX_PAGE_SIZE': 50
+    }
+    CLIP_CONFIG = {'ENABLED': False}
+    VISION_CONFIG = {'ENABLED': False, 'FUSION_THRESHOLD': 0.5}
+    PHOTO_LOG_CONFIG = {'STORAGE_PATH': '/photos'}
+    MOTION_CONFIG = {
+        'PRE_TRIGGER_ENABLED': False,
+        'PRE_TRIGGER_FRAMES': 4,
+        'PRE_TRIGGER_INTERVAL_MS': 250,
+        'RING_MAX_BYTES': 64 * 1024,
+        'POST_TRIGGER_FRAMES': 3,
+        'POST_TRIGGER_INTERVAL_MS': 150
+    }
+
+def legacy_photo_time(filename):
+    """Capture time (seconds) of a motion_YYYYMMDD_HHMMSS.jpg file, or None if unparsable"""
+    try:
+        d, t = filename[7:22].split('_')
+        return utime.mktime((int(d[0:4]), int(d[4:6]), int(d[6:8]),
+                             int(t[0:2]), int(t[2:4]), int(t[4:6]), 0, 0))
+    except (ValueError, IndexError, OverflowError):
+        return None
 
 class PhotoStorage:
-    """Manages local photo storage with rotation"""
+    """Manages local photo storage on top of the append-only photo log"""
     
-    def __init__(self, max_photos=6, storage_path='/photos'):
-        self.max_photos = max_photos
+    def __init__(self, storage_path=None):
+        if storage_path is None:
+            storage_path = PHOTO_LOG_CONFIG['STORAGE_PATH']
         self.storage_path = storage_path
+        self.photo_log = None
         self.photo_count = 0
+        self.max_photos = 0
+        self.thumbs = {}  # photo id -> thumbnail id
         self.setup_storage()
     
     def setup_storage(self):
-        """Initialize storage directory"""
+        """Initialize storage directory and recover the photo log"""
         try:
             # Try to create photos directory
             try:
@@ -26,98 +76,239 @@ class PhotoStorage:
             except OSError:
                 pass  # Directory already exists
             
-            # Count existing photos
-            try:
-                files = uos.listdir(self.storage_path)
-                self.photo_count = len([f for f in files if f.startswith('motion_') and f.endswith('.jpg')])
-                print(f"Found {self.photo_count} existing motion photos")
-            except:
-                self.photo_count = 0
+            self.photo_log = PhotoLog(self.storage_path)
+            self._migrate_legacy_photos()
+            
+            self.photo_count = self.photo_log.count(KIND_MOTION)
+            self.max_photos = self.photo_log.capacity()
+            for entry in self.photo_log.entries(KIND_THUMB, newest_first=False):
+                self.thumbs[entry[E_REF]] = entry[E_ID]
+            print(f"Found {self.photo_count} existing motion photos")
                 
         except Exception as e:
             print(f"Storage setup error: {e}")
             # Fallback to RAM storage
             self.storage_path = None
+            self.photo_log = None
     
-    def save_photo(self, photo_data):
-        """Save photo with automatic rotation"""
+    def _migrate_legacy_photos(self):
+        """Move one-file-per-photo captures from older firmware into the log"""
+        try:
+            files = uos.listdir(self.storage_path)
+        except OSError:
+            return
+        
+        legacy_files = [f for f in files if f.startswith('motion_') and f.endswith('.jpg')]
+        legacy_files.sort()  # Sort by filename (timestamp)
+        
+        migrated = 0
+        for filename in legacy_files:
+            filepath = f"{self.storage_path}/{filename}"
+            try:
+                with open(filepath, 'rb') as f:
+                    self.photo_log.append(f.read(), KIND_MOTION, timestamp=legacy_photo_time(filename))
+                uos.remove(filepath)
+                migrated += 1
+            except Exception as e:
+                # Left in place; the next boot tries it again
+                print(f"Legacy photo migration error ({filename}): {e}")
+            gc.collect()
+        
+        if migrated:
+            print(f"Migrated {migrated} legacy photos into the photo log")
+    
+    def photo_name(self, entry):
+        """Build the public file name of a log entry"""
+        t = utime.localtime(entry[E_TIME])
+        return f"motion_{t[0]:04d}{t[1]:02d}{t[2]:02d}_{t[3]:02d}{t[4]:02d}{t[5]:02d}_{entry[E_ID]}.jpg"
+    
+    def parse_photo_id(self, name):
+        """Extract the photo id from a name produced by photo_name (or a bare id)"""
+        try:
+            if '_' in name:
+                name = name[name.rindex('_') + 1:]
+            if '.' in name:
+                name = name[:name.index('.')]
+            return int(name)
+        except ValueError:
+            return None
+    
+    def save_photo(self, photo_data, ref=0):
+        """Append a photo to the log"""
         if not photo_data:
             return None
-            
+        
+        if not self.photo_log:
+            # RAM storage (limited)
+            print(f"Photo captured in RAM ({len(photo_data)} bytes)")
+            return "RAM:photo.jpg"
+        
         try:
-            # Generate filename with timestamp
-            timestamp = utime.localtime()
-            filename = f"motion_{timestamp[0]:04d}{timestamp[1]:02d}{timestamp[2]:02d}_{timestamp[3]:02d}{timestamp[4]:02d}{timestamp[5]:02d}.jpg"
+            photo_id = self.photo_log.append(photo_data, KIND_MOTION, ref)
+            self.photo_count = self.photo_log.count(KIND_MOTION)
             
-            if self.storage_path:
-                # Save to flash storage
-                filepath = f"{self.storage_path}/{filename}"
-                with open(filepath, 'wb') as f:
-                    f.write(photo_data)
-                
-                self.photo_count += 1
-                
-                # Rotate photos if limit exceeded
-                if self.photo_count > self.max_photos:
-                    self._rotate_photos()
-                
-                print(f"Motion photo saved: {filename} ({len(photo_data)} bytes)")
-                return filepath
-            else:
-                # RAM storage (limited)
-                print(f"Photo captured in RAM: {filename} ({len(photo_data)} bytes)")
-                return f"RAM:{filename}"
+            name = self.photo_name(self.photo_log.get_entry(photo_id))
+            print(f"Motion photo saved: {name} ({len(photo_data)} bytes)")
+            return f"{self.storage_path}/{name}"
                 
         except Exception as e:
             print(f"Photo save error: {e}")
             return None
     
-    def _rotate_photos(self):
-        """Delete oldest photos when limit exceeded"""
+    def save_event(self, frames):
+        """Save a burst of frames as one motion event"""
+        if not frames:
+            return []
+        
+        paths = []
+        event_ref = 0
+        for frame in frames:
+            path = self.save_photo(frame, event_ref)
+            if not path:
+                continue
+            paths.append(path)
+            # Later frames point at the first photo of the event
+            if not event_ref and self.photo_log:
+                event_ref = self.parse_photo_id(path)
+        
+        print(f"Motion event saved: {len(paths)} frames")
+        return paths
+    
+    def save_thumbnail(self, photo_id, thumb_data):
+        """Store a thumbnail next to its full-size photo"""
+        if not self.photo_log or not photo_id or not thumb_data:
+            return None
         try:
-            if not self.storage_path:
-                return
-                
-            files = uos.listdir(self.storage_path)
-            motion_files = [f for f in files if f.startswith('motion_') and f.endswith('.jpg')]
-            motion_files.sort()  # Sort by filename (timestamp)
-            
-            # Delete oldest files
-            while len(motion_files) > self.max_photos:
-                oldest_file = motion_files.pop(0)
-                uos.remove(f"{self.storage_path}/{oldest_file}")
-                print(f"Deleted old photo: {oldest_file}")
-                self.photo_count -= 1
-                
+            thumb_id = self.photo_log.append(thumb_data, KIND_THUMB, photo_id)
+            self.thumbs[photo_id] = thumb_id
+            return thumb_id
         except Exception as e:
-            print(f"Photo rotation error: {e}")
+            print(f"Thumbnail save error: {e}")
+            return None
     
-    def get_photo_list(self):
-        """Get list of stored photos"""
-        try:
-            if not self.storage_path:
-                return []
-                
-            files = uos.listdir(self.storage_path)
-            motion_files = [f for f in files if f.startswith('motion_') and f.endswith('.jpg')]
-            motion_files.sort(reverse=True)  # Newest first
-            return motion_files
-        except:
+    def get_thumbnail_entry(self, name):
+        """Thumbnail entry of a photo; event frames share the event thumbnail"""
+        entry = self.get_photo_entry(name)
+        if not entry:
+            return None
+        for photo_id in (entry[E_ID], entry[E_REF]):
+            thumb_id = self.thumbs.get(photo_id)
+            if not thumb_id:
+                continue
+            thumb = self.photo_log.get_entry(thumb_id)
+            if thumb:
+                return thumb
+            del self.thumbs[photo_id]  # Reclaimed with its segment
+        return None
+    
+    def get_photo_page(self, cursor=None, limit=None, since=None):
+        """One page of photos (newest first) older than cursor and newer than since"""
+        if limit is None:
+            limit = THUMBNAIL_CONFIG['PAGE_SIZE']
+        limit = max(1, min(int(limit), THUMBNAIL_CONFIG['MAX_PAGE_SIZE']))
+        if not self.photo_log:
+            return {'photos': [], 'next_cursor': None}
+        
+        photos = []
+        next_cursor = None
+        for entry in self.photo_log.entries(KIND_MOTION):
+            photo_id = entry[E_ID]
+            if since is not None and photo_id <= since:
+                break  # Ids only grow, so everything after is older
+            if cursor is not None and photo_id >= cursor:
+                continue
+            if len(photos) == limit:
+                next_cursor = photos[-1]['id']
+                break
+            photos.append(self.photo_info(entry))
+        return {'photos': photos, 'next_cursor': next_cursor}
+    
+    def get_photo_summary(self):
+        """Photo count and newest photo, without listing the store"""
+        latest = None
+        if self.photo_log:
+            for entry in self.photo_log.entries(KIND_MOTION):
+                latest = self.photo_info(entry)
+                break
+        return {
+            'count': self.photo_count,
+            'latest': latest
+        }
+    
+    def photo_info(self, entry):
+        """Public description of a photo entry with its URLs"""
+        name = self.photo_name(entry)
+        url = f"/photos/{name}"
+        has_thumb = entry[E_ID] in self.thumbs or entry[E_REF] in self.thumbs
+        return {
+            'id': entry[E_ID],
+            'name': name,
+            'time': entry[E_TIME],
+            'size': entry[E_LENGTH],
+            'event': entry[E_REF] or entry[E_ID],
+            'url': url,
+            'thumb_url': url + '/thumb' if has_thumb else url
+        }
+    
+    def export_members(self, since=None, thumbnails=False):
+        """Archive members (name, size, mtime, opener) for every stored photo, oldest first"""
+        if not self.photo_log:
             return []
+        members = []
+        for entry in self.photo_log.entries(newest_first=False):
+            kind = entry[E_KIND]
+            if since is not None and entry[E_ID] <= since:
+                continue
+            if kind == KIND_MOTION:
+                name = self.photo_name(entry)
+            elif kind == KIND_THUMB and thumbnails:
+                parent = self.photo_log.get_entry(entry[E_REF])
+                if not parent:
+                    continue
+                name = 'thumbs/' + self.photo_name(parent)
+            else:
+                continue
+            members.append((name, entry[E_LENGTH], entry[E_TIME], self._opener(entry[E_ID])))
+        return members
+    
+    def _opener(self, photo_id):
+        return lambda: self.photo_log.open_photo(photo_id)[0]
+    
+    def get_photo_entry(self, name):
+        """Look up the log entry of a stored photo by name or id"""
+        if not self.photo_log:
+            return None
+        photo_id = name if isinstance(name, int) else self.parse_photo_id(name)
+        if photo_id is None:
+            return None
+        return self.photo_log.get_entry(photo_id)
+    
+    def open_photo(self, name):
+        """Open a stored photo by name or id; returns (file, length)"""
+        if not self.photo_log:
+            return None, 0
+        photo_id = name if isinstance(name, int) else self.parse_photo_id(name)
+        if photo_id is None:
+            return None, 0
+        return self.photo_log.open_photo(photo_id)
     
     def get_storage_info(self):
         """Get storage statistics"""
-        return {
+        info = {
             'photo_count': self.photo_count,
             'max_photos': self.max_photos,
             'storage_path': self.storage_path,
             'storage_type': 'flash' if self.storage_path else 'ram'
         }
+        if self.photo_log:
+            info['thumbnails'] = len(self.thumbs)
+            info['photo_log'] = self.photo_log.get_info()
+        return info
 
 class MotionDetector:
     """PIR Motion Detection with automatic photo capture"""
     
-    def __init__(self, pir_pin=13, motion_led_pin=14):
+    def __init__(self, pir_pin=13, motion_led_pin=14, pre_trigger=None, warmup_blink=True):
         self.pir_pin = pir_pin
         self.motion_led_pin = motion_led_pin
         self.last_motion_time = 0
@@ -129,33 +320,87 @@ class MotionDetector:
         self.pir = Pin(self.pir_pin, Pin.IN)
         self.motion_led = Pin(self.motion_led_pin, Pin.OUT)
         self.motion_led.off()
+        self.led_timer = None
         
         # Initialize photo storage
         self.photo_storage = PhotoStorage()
         
+        # Optional pre-trigger ring (frames from before the PIR edge)
+        if pre_trigger is None:
+            pre_trigger = MOTION_CONFIG['PRE_TRIGGER_ENABLED']
+        self.post_trigger_frames = MOTION_CONFIG['POST_TRIGGER_FRAMES']
+        self.post_trigger_interval = MOTION_CONFIG['POST_TRIGGER_INTERVAL_MS']
+        self.frame_ring = None
+        if pre_trigger:
+            try:
+                self.frame_ring = FrameRing(frame_cache)
+            except MemoryError:
+                print("⚠️ Not enough memory for pre-trigger ring - single photo mode")
+        self.last_event_paths = []
+        
+        # Optional vision detector fused with the PIR edge
+        self.vision = None
+        self.fusion_threshold = VISION_CONFIG['FUSION_THRESHOLD']
+        if VISION_CONFIG['ENABLED']:
+            try:
+                self.vision = VisionMotionSampler(frame_cache=frame_cache)
+            except MemoryError:
+                print("⚠️ Not enough memory for vision motion - PIR only")
+        self.last_confidence = 0.0
+        self.rejected_count = 0
+        
+        # Event history for time-range queries and activity patterns
+        self.event_log = None
+        try:
+            self.event_log = MotionEventLog()
+        except MemoryError:
+            print("⚠️ Not enough memory for motion event log")
+        
+        # Thumbnails are a second capture with a small camera profile
+        self.thumbnails = THUMBNAIL_CONFIG['ENABLED']
+        self.thumb_profile = THUMBNAIL_CONFIG['PROFILE']
+        
+        # Optional MJPEG clip recording after each trigger
+        self.clip_recorder = None
+        if CLIP_CONFIG['ENABLED']:
+            try:
+                self.clip_recorder = ClipRecorder(frame_cache)
+            except MemoryError:
+                print("⚠️ Not enough memory for clip recorder - photos only")
+        
         # Motion detection state
         self.last_pir_state = 0
         self.motion_active = False
         self.warmup_complete = False
         
         # Start warmup
-        self.start_warmup()
+        self.start_warmup(warmup_blink)
         
         print(f"Motion detector initialized - PIR: Pin {pir_pin}, LED: Pin {motion_led_pin}")
     
-    def start_warmup(self):
+    def start_warmup(self, blink=True):
         """Start PIR sensor warmup period"""
         print("PIR sensor warming up (30 seconds)...")
         self.warmup_start = utime.ticks_ms()
         self.warmup_complete = False
         
         # Flash LED during warmup
+        if not blink:
+            return
         for i in range(6):
             self.motion_led.on()
             utime.sleep_ms(200)
             self.motion_led.off()
             utime.sleep_ms(200)
     
+    def warmup_blink_async(self):
+        """Warmup LED flashes as a uasyncio coroutine"""
+        for i in range(6):
+            self.motion_led.on()
+            yield from asyncio.sleep_ms(200)
+            self.motion_led.off()
+            yield from asyncio.sleep_ms(200)
+    
     def check_motion(self):
         """Check for motion and handle detection"""
         current_time = utime.ticks_ms()
@@ -165,29 +410,61 @@ class MotionDetector:
             if utime.ticks_diff(current_time, self.warmup_start) > 30000:  # 30 seconds
                 self.warmup_complete = True
                 print("PIR sensor warmup complete - motion detection active")
+                if self.is_armed and self.frame_ring:
+                    self.frame_ring.arm()
             return False
         
+        if self.event_log:
+            self.event_log.tick()
+        
+        # A running clip finishes even if motion gets disarmed
+        if self.clip_recorder and self.clip_recorder.recording:
+            self.clip_recorder.tick()
+        
         if not self.is_armed:
             return False
         
+        # Keep the pre-trigger ring filled
+        if self.frame_ring:
+            self.frame_ring.tick()
+        
+        # Keep the vision background model current
+        if self.vision:
+            self.vision.tick()
+        
         # Read PIR sensor
         current_pir_state = self.pir.value()
         
         # Detect motion (rising edge)
         if current_pir_state == 1 and self.last_pir_state == 0:
             # Motion started
-            if utime.ticks_diff(current_time, self.last_motion_time) > self.motion_cooldown:
+            confidence = self.vision.fuse(True) if self.vision else 1.0
+            if confidence < self.fusion_threshold:
+                # PIR fired but the camera saw nothing (heat, sunlight...)
+                self.rejected_count += 1
+                print(f"PIR edge rejected by vision (confidence {confidence:.2f})")
+            elif utime.ticks_diff(current_time, self.last_motion_time) > self.motion_cooldown:
+                self.last_confidence = confidence
                 self.motion_count += 1
                 self.last_motion_time = current_time
                 self.motion_active = True
                 
                 print(f"🚨 MOTION DETECTED! (Count: {self.motion_count})")
                 
+                if self.event_log:
+                    self.event_log.record(confidence=confidence)
+                
                 # Turn on motion LED
                 self.motion_led.on()
                 
-                # Capture photo
-                photo_path = self.capture_motion_photo()
+                # Audio, LEDs and event streams react from the bus task
+                event_bus.publish(MOTION, {
+                    'count': self.motion_count,
+                    'confidence': confidence
+                })
+                
+                # Capture runs as a task so the post-trigger burst does not stall the wheel
+                asyncio.get_event_loop().create_task(self.capture_and_publish(self.motion_count))
                 
                 # Schedule LED off
                 self._schedule_led_off(2000)  # 2 seconds
@@ -200,26 +477,41 @@ class MotionDetector:
             if self.motion_active:
                 print("✅ Motion ended")
                 self.motion_active = False
+                if self.event_log:
+                    self.event_log.end()
+                event_bus.publish(MOTION_END)
         
         self.last_pir_state = current_pir_state
         return False
     
+    def capture_and_publish(self, count):
+        """Capture the motion photo, then publish MOTION_PHOTO - uasyncio coroutine"""
+        photo_path = yield from self.capture_motion_photo()
+        if self.event_log and photo_path:
+            self.event_log.set_photo(self.photo_storage.parse_photo_id(photo_path))
+        if photo_path:
+            event_bus.publish(MOTION_PHOTO, {'count': count, 'photo': photo_path})
+    
     def capture_motion_photo(self):
-        """Capture photo when motion is detected"""
+        """Capture photo when motion is detected - uasyncio coroutine"""
+        if self.frame_ring and self.frame_ring.armed:
+            pre_count = self.frame_ring.count
+            paths = yield from self.capture_motion_event()
+            # The first burst frame is the one taken at the PIR edge
+            if len(paths) > pre_count:
+                return paths[pre_count]
+            return paths[-1] if paths else None
+        
         try:
             print("📸 Capturing motion photo...")
             
-            # Set high quality for motion photos
-            old_quality = camera.quality()
-            camera.quality(10)  # Best quality
-            
-            # Capture photo
-            photo_data = camera.capture()
-            
-            # Restore original quality
-            camera.quality(old_quality)
+            # High quality snapshot, then back to the stream profile
+            photo_data = camera_store.capture('snapshot')
             
             if photo_data:
+                if self.clip_recorder:
+                    self.clip_recorder.start([photo_data])
+                
                 # Save photo
                 photo_path = self.photo_storage.save_photo(photo_data)
                 
@@ -227,6 +519,7 @@ class MotionDetector:
                 del photo_data
                 gc.collect()
                 
+                self.save_thumbnail(photo_path)
                 return photo_path
             else:
                 print("❌ Failed to capture motion photo")
@@ -236,36 +529,94 @@ class MotionDetector:
             print(f"Motion photo capture error: {e}")
             return None
     
+    def capture_motion_event(self):
+        """Commit pre-trigger ring frames plus a post-trigger burst as one event - uasyncio coroutine"""
+        ring = self.frame_ring
+        ring.freeze()
+        try:
+            print(f"📸 Capturing motion event ({ring.count} pre-trigger frames)...")
+            
+            # Burst first - no quality switch so the first frame lands immediately
+            burst = []
+            for i in range(self.post_trigger_frames):
+                if i > 0:
+                    yield from asyncio.sleep_ms(self.post_trigger_interval)
+                frame = frame_cache.capture()
+                if frame:
+                    burst.append(frame)
+            
+            # Ring slots are written straight to storage without copying
+            if self.clip_recorder:
+                self.clip_recorder.start(ring.frames() + burst)
+            self.last_event_paths = self.photo_storage.save_event(ring.frames() + burst)
+            
+            del burst
+            gc.collect()
+            
+            # One thumbnail per event, attached to its first frame
+            if self.last_event_paths:
+                self.save_thumbnail(self.last_event_paths[0])
+            return self.last_event_paths
+            
+        except Exception as e:
+            print(f"Motion event capture error: {e}")
+            return []
+        finally:
+            ring.clear()
+            ring.unfreeze()
+    
+    def capture_thumbnail(self):
+        """Capture a small preview frame, then restore the stream profile"""
+        try:
+            return camera_store.capture(self.thumb_profile)
+        except Exception as e:
+            print(f"Thumbnail capture error: {e}")
+            return None
+    
+    def save_thumbnail(self, photo_path):
+        """Capture and store the thumbnail for a saved photo"""
+        if not self.thumbnails or not photo_path or not self.photo_storage.photo_log:
+            return None
+        photo_id = self.photo_storage.parse_photo_id(photo_path)
+        if photo_id is None:
+            return None
+        thumb_data = self.capture_thumbnail()
+        thumb_id = self.photo_storage.save_thumbnail(photo_id, thumb_data)
+        del thumb_data
+        gc.collect()
+        return thumb_id
+    
     def _schedule_led_off(self, delay_ms):
         """Schedule LED to turn off after delay"""
-        # Simple implementation - in real system might use timer
-        def turn_off_led():
-            utime.sleep_ms(delay_ms)
-            self.motion_led.off()
-        
-        # For now, just turn off after delay
-        utime.sleep_ms(delay_ms)
-        self.motion_led.off()
+        # A new detection pushes the deadline out instead of stacking timers
+        if self.led_timer is not None and self.led_timer.active:
+            timer_wheel.reschedule(self.led_timer, delay_ms)
+        else:
+            self.led_timer = timer_wheel.call_later(delay_ms, self.motion_led.off, name='motion_led')
     
     def arm_motion_detection(self):
         """Enable motion detection"""
         self.is_armed = True
+        if self.frame_ring and self.warmup_complete:
+            self.frame_ring.arm()
         print("🔒 Motion detection ARMED")
     
     def disarm_motion_detection(self):
         """Disable motion detection"""
         self.is_armed = False
         self.motion_led.off()
+        if self.frame_ring:
+            self.frame_ring.disarm()
         print("🔓 Motion detection DISARMED")
     
     def test_motion_led(self):
-        """Test the motion LED"""
+        """Test the motion LED - uasyncio coroutine"""
         print("Testing motion LED...")
         for i in range(3):
             self.motion_led.on()
-            utime.sleep_ms(200)
+            yield from asyncio.sleep_ms(200)
             self.motion_led.off()
-            utime.sleep_ms(200)
+            yield from asyncio.sleep_ms(200)
         print("Motion LED test complete")
     
     def get_motion_status(self):
@@ -277,15 +628,27 @@ class MotionDetector:
             'warmup_complete': self.warmup_complete,
             'last_motion_time': self.last_motion_time,
             'storage_info': self.photo_storage.get_storage_info(),
-            'photo_list': self.photo_storage.get_photo_list()
+            'pre_trigger': self.frame_ring.get_info() if self.frame_ring else None,
+            'vision': self.vision.get_stats() if self.vision else None,
+            'clips': self.clip_recorder.get_status() if self.clip_recorder else None,
+            'event_log': self.event_log.get_info() if self.event_log else None,
+            'last_confidence': self.last_confidence,
+            'rejected_count': self.rejected_count,
+            'photos': self.photo_storage.get_photo_summary()
         }
     
     def get_recent_photos(self, count=3):
         """Get list of recent motion photos"""
-        photos = self.photo_storage.get_photo_list()
-        return photos[:count] if photos else []
+        page = self.photo_storage.get_photo_page(limit=count)
+        return [photo['name'] for photo in page['photos']]
     
     def cleanup(self):
         """Cleanup resources"""
         self.motion_led.off()
+        if self.frame_ring:
+            self.frame_ring.disarm()
+        if self.clip_recorder:
+            self.clip_recorder.finish()
+        if self.event_log and self.event_log.dirty:
+            self.event_log.persist()
         print("Motion detector cleanup complete") 
\ No newline at end of file
@@ -0,0 +1,199 @@
+# Motion Event Log for ESP32-WROVER Smart Home
+# Fixed-size event ring with hour-of-day histogram, persisted to flash
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+import ustruct
+from array import array
+from atomic_file import write_atomic, open_saved
+
+# Import configuration
+try:
+    from config import MOTION_EVENT_CONFIG
+except ImportError:
+    # Fallback if config not available
+    MOTION_EVENT_CONFIG = {
+        'CAPACITY': 512,
+        'PATH': '/motion_events.bin',
+        'PERSIST_INTERVAL_S': 300,
+        'MAX_RESULTS': 100
+    }
+
+# File layout: header, 24 hour counters, then the four column arrays
+LOG_MAGIC = b'MEVT'
+LOG_VERSION = 1
+HEADER_FMT = '<4sBBHII'  # magic, version, reserved, capacity, start, count
+HEADER_SIZE = ustruct.calcsize(HEADER_FMT)
+
+class MotionEventLog:
+    """Ring of motion events stored column-wise in preallocated arrays"""
+
+    def __init__(self, capacity=None, path=None):
+        self.capacity = capacity or MOTION_EVENT_CONFIG['CAPACITY']
+        self.path = path or MOTION_EVENT_CONFIG['PATH']
+        self.persist_interval_ms = MOTION_EVENT_CONFIG['PERSIST_INTERVAL_S'] * 1000
+        self.max_results = MOTION_EVENT_CONFIG['MAX_RESULTS']
+
+        # Columns: start time (s), duration (ms), photo id, confidence (%)
+        self.times = array('I', [0] * self.capacity)
+        self.durations = array('I', [0] * self.capacity)
+        self.photos = array('I', [0] * self.capacity)
+        self.confidences = array('B', [0] * self.capacity)
+        self.hours = array('I', [0] * 24)  # All-time events per hour of day
+
+        self.start = 0   # Physical slot of the oldest event
+        self.count = 0
+        self.open_slot = -1  # Event still waiting for its end edge
+        self.open_ticks = 0
+        self.dirty = False
+        self.last_persist = utime.ticks_ms()
+        self.persist_count = 0
+
+        self.load()
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
+
+    def record(self, timestamp=None, photo_id=0, confidence=1.0):
+        """Append an event at its start edge; returns its slot"""
+        if timestamp is None:
+            timestamp = utime.time()
+        if self.count and timestamp < self._time_at(self.count - 1):
+            # Clock stepped back - keep the ring sorted for binary search
+            timestamp = self._time_at(self.count - 1)
+        if self.count < self.capacity:
+            slot = (self.start + self.count) % self.capacity
+            self.count += 1
+        else:
+            # Overwrite the oldest event
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+
+        self.times[slot] = timestamp
+        self.durations[slot] = 0
+        self.photos[slot] = photo_id or 0
+        self.confidences[slot] = max(0, min(100, int(confidence * 100)))
+        self.hours[utime.localtime(timestamp)[3]] += 1
+
+        self.open_slot = slot
+        self.open_ticks = utime.ticks_ms()
+        self.dirty = True
+        return slot
+
+    def set_photo(self, photo_id):
+        """Attach the photo of the most recent event"""
+        if self.open_slot >= 0 and photo_id:
+            self.photos[self.open_slot] = photo_id
+
+    def end(self):
+        """Close the open event at the PIR falling edge"""
+        if self.open_slot < 0:
+            return
+        self.durations[self.open_slot] = utime.ticks_diff(utime.ticks_ms(), self.open_ticks)
+        self.open_slot = -1
+        self.dirty = True
+
+    def tick(self):
+        """Persist changes at most once per interval (call from the main loop)"""
+        if not self.dirty:
+            return False
+        if utime.ticks_diff(utime.ticks_ms(), self.last_persist) < self.persist_interval_ms:
+            return False
+        return self.persist()
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def _time_at(self, index):
+        return self.times[(self.start + index) % self.capacity]
+
+    def _lower_bound(self, timestamp):
+        """First logical index with time >= timestamp"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if self._time_at(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def query(self, since=None, until=None, limit=None):
+        """Events with since <= time <= until, newest limit of them, oldest first"""
+        if limit is None:
+            limit = self.max_results
+        first = self._lower_bound(since) if since is not None else 0
+        last = self._lower_bound(until + 1) if until is not None else self.count
+        total = max(0, last - first)
+        first = max(first, last - limit)
+
+        events = []
+        for index in range(first, last):
+            slot = (self.start + index) % self.capacity
+            events.append({
+                'time': self.times[slot],
+                'duration_ms': self.durations[slot],
+                'photo_id': self.photos[slot],
+                'confidence': self.confidences[slot] / 100
+            })
+        return {'events': events, 'total': total, 'truncated': total > len(events)}
+
+    def hour_histogram(self):
+        """All-time event counts for each hour of the day"""
+        return list(self.hours)
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+
+    def persist(self):
+        """Write the log to flash atomically"""
+        try:
+            write_atomic(self.path, (ustruct.pack(HEADER_FMT, LOG_MAGIC, LOG_VERSION, 0,
+                                                  self.capacity, self.start, self.count),
+                                     self.hours, self.times, self.durations,
+                                     self.photos, self.confidences), binary=True)
+        except Exception as e:
+            print(f"Motion event log save error: {e}")
+            return False
+
+        self.dirty = False
+        self.last_persist = utime.ticks_ms()
+        self.persist_count += 1
+        return True
+
+    def load(self):
+        """Restore the log from flash; a missing or foreign file starts empty"""
+        try:
+            with open_saved(self.path, 'rb') as f:
+                magic, version, _, capacity, start, count = ustruct.unpack(
+                    HEADER_FMT, f.read(HEADER_SIZE))
+                if magic != LOG_MAGIC or version != LOG_VERSION or capacity != self.capacity:
+                    print("Motion event log format changed - starting fresh")
+                    return False
+                f.readinto(self.hours)
+                f.readinto(self.times)
+                f.readinto(self.durations)
+                f.readinto(self.photos)
+                f.readinto(self.confidences)
+        except OSError:
+            return False
+
+        self.start = start % self.capacity
+        self.count = min(count, self.capacity)
+        print(f"Motion event log loaded: {self.count} events")
+        return True
+
+    def get_info(self):
+        """Get event log statistics"""
+        return {
+            'events': self.count,
+            'capacity': self.capacity,
+            'oldest': self._time_at(0) if self.count else None,
+            'newest': self._time_at(self.count - 1) if self.count else None,
+            'unsaved_changes': self.dirty,
+            'persist_count': self.persist_count
+        }
@@ -0,0 +1,392 @@
+# Network Manager for ESP32-WROVER Smart Home
+# Fast station reconnect from a flash cache, background retry with backoff
+
+import sys
+sys.path.append('..')  # To access config
+import uos
+import utime
+import json
+import network
+try:
+    import ubinascii as binascii
+except ImportError:
+    import binascii
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+from event_bus import event_bus, NETWORK
+from atomic_file import write_atomic, open_saved
+
+# Import configuration
+try:
+    from config import WIFI_CONFIG
+except ImportError:
+    # Fallback if config not available
+    WIFI_CONFIG = {
+        'STA_SSID': "",
+        'STA_PASSWORD': "",
+        'STA_TIMEOUT': 15,
+        'FAST_CONNECT_TIMEOUT': 4,
+        'CACHE_PATH': '/wifi_cache.json',
+        'REUSE_LEASE': True,
+        'CHECK_INTERVAL_MS': 2000,
+        'RETRY_MIN_S': 2,
+        'RETRY_MAX_S': 300,
+        'INFO_REFRESH_S': 60
+    }
+
+POLL_MS = 50
+
+# Station link states
+DISCONNECTED = 0
+CONNECTING = 1
+CONNECTED = 2
+BACKOFF = 3
+STATE_NAMES = ('disconnected', 'connecting', 'connected', 'backoff')
+
+# Station status codes that end an attempt before its timeout
+FAILED_STATUSES = tuple(
+    getattr(network, name) for name in
+    ('STAT_WRONG_PASSWORD', 'STAT_NO_AP_FOUND', 'STAT_CONNECT_FAIL')
+    if hasattr(network, name)
+)
+
+class NetworkManager:
+    """Station connection with a cached fast path, scan fallback and reconnect
+
+    The last access point (BSSID, channel) and IP lease are kept on flash.
+    A connect first associates straight to that access point with the cached
+    lease set statically, which skips the scan and DHCP; if that does not
+    come up quickly it scans for the strongest access point and uses DHCP.
+    """
+
+    def __init__(self, ssid=None, password=None, cache_path=None):
+        self.ssid = ssid if ssid is not None else WIFI_CONFIG['STA_SSID']
+        self.password = password if password is not None else WIFI_CONFIG['STA_PASSWORD']
+        self.cache_path = cache_path or WIFI_CONFIG.get('CACHE_PATH', '/wifi_cache.json')
+        self.timeout_ms = WIFI_CONFIG.get('STA_TIMEOUT', 15) * 1000
+        self.fast_timeout_ms = WIFI_CONFIG.get('FAST_CONNECT_TIMEOUT', 4) * 1000
+        self.reuse_lease = WIFI_CONFIG.get('REUSE_LEASE', True)
+        self.check_ms = WIFI_CONFIG.get('CHECK_INTERVAL_MS', 2000)
+        self.retry_min_ms = WIFI_CONFIG.get('RETRY_MIN_S', 2) * 1000
+        self.retry_max_ms = WIFI_CONFIG.get('RETRY_MAX_S', 300) * 1000
+        self.info_refresh_ms = WIFI_CONFIG.get('INFO_REFRESH_S', 60) * 1000
+
+        self.sta = network.WLAN(network.STA_IF)
+        self.ap = network.WLAN(network.AP_IF)
+        self.cache = {}  # 'ssid', 'bssid' (hex), 'channel', 'ifconfig'
+        self.state = DISCONNECTED
+        self.ip = None
+        self.ap_ip = None
+        self.bssid = None
+        self.channel = None
+        self.retry_ms = 0
+        self.connected_ticks = None
+        self.change_callbacks = []  # callback(connected) on link up/down
+
+        # Display snapshot for pages and APIs, replaced on link events and
+        # on a slow timer so requests never call into the Wi-Fi driver
+        self.info = {
+            'sta': "Not connected",
+            'ap': "Not active",
+            'sta_ip': None,
+            'ap_ip': None,
+            'rssi': None
+        }
+        self.info_ticks = utime.ticks_ms()
+        self.info_refreshes = 0
+
+        # Statistics
+        self.attempts = 0
+        self.connects = 0
+        self.fast_hits = 0
+        self.fast_misses = 0
+        self.scan_connects = 0
+        self.failures = 0
+        self.disconnects = 0
+        self.reconnects = 0
+        self.first_connect_ms = None
+        self.last_connect_ms = 0
+        self.last_path = None
+        self.total_connect_ms = 0
+
+        self.load()
+
+    def on_change(self, callback):
+        """Register callback(connected) run when the station link goes up or down"""
+        self.change_callbacks.append(callback)
+
+    def _set_state(self, state):
+        was_connected = self.state == CONNECTED
+        self.state = state
+        if was_connected != (state == CONNECTED):
+            self.refresh_info()
+            event_bus.publish(NETWORK, {'connected': state == CONNECTED, 'ip': self.info['sta_ip']})
+            for callback in self.change_callbacks:
+                try:
+                    callback(state == CONNECTED)
+                except Exception as e:
+                    print(f"Network callback error: {e}")
+
+    def is_connected(self):
+        return self.state == CONNECTED
+
+    def refresh_info(self):
+        """Re-read addresses and signal strength from the driver into the info snapshot"""
+        sta_ip = None
+        rssi = None
+        ap_ip = None
+        try:
+            if self.sta.active() and self.sta.isconnected():
+                sta_ip = self.sta.ifconfig()[0]
+                rssi = self.sta.status('rssi')
+        except (OSError, ValueError):
+            pass
+        try:
+            if self.ap.active():
+                ap_ip = self.ap.ifconfig()[0]
+        except OSError:
+            pass
+        self.info = {
+            'sta': f"Connected - IP: {sta_ip}" if sta_ip else "Not connected",
+            'ap': f"Active - IP: {ap_ip}" if ap_ip else "Not active",
+            'sta_ip': sta_ip,
+            'ap_ip': ap_ip,
+            'rssi': rssi
+        }
+        self.info_ticks = utime.ticks_ms()
+        self.info_refreshes += 1
+
+    def start_ap(self, ssid, password, ifconfig):
+        """Bring up the access point; returns True if it is active"""
+        try:
+            self.ap.active(True)
+            self.ap.ifconfig(ifconfig)
+            self.ap.config(
+                essid=ssid,
+                authmode=network.AUTH_WPA_WPA2_PSK,
+                password=password
+            )
+        except Exception as e:
+            print(f"Access point error: {e}")
+        self.refresh_info()
+        self.ap_ip = self.info['ap_ip']
+        return self.ap_ip is not None
+
+    def connect(self):
+        """Connect the station - uasyncio coroutine, returns True once connected"""
+        if not self.ssid:
+            return False
+        self._set_state(CONNECTING)
+        self.attempts += 1
+        start = utime.ticks_ms()
+        self.sta.active(True)
+
+        path = None
+        bssid = None
+        if self.cache.get('ssid') == self.ssid and self.cache.get('bssid'):
+            bssid = binascii.unhexlify(self.cache['bssid'])
+            if (yield from self._connect_cached(bssid)):
+                path = 'cached'
+                self.fast_hits += 1
+            else:
+                self.fast_misses += 1
+        if path is None:
+            bssid = yield from self._connect_scan()
+            if self.sta.isconnected():
+                path = 'scan'
+                self.scan_connects += 1
+
+        if path is None:
+            self.failures += 1
+            try:
+                self.sta.disconnect()  # Stop the driver retrying on its own
+            except OSError:
+                pass
+            self._set_state(DISCONNECTED)
+            print("⚠️  STA connection failed")
+            return False
+
+        elapsed = utime.ticks_diff(utime.ticks_ms(), start)
+        self._connected(path, bssid, elapsed)
+        return True
+
+    def _connect_cached(self, bssid):
+        """Targeted association to the cached access point with the cached lease"""
+        channel = self.cache.get('channel')
+        if channel:
+            try:
+                self.sta.config(channel=channel)  # Not supported by every firmware
+            except (OSError, ValueError, TypeError):
+                pass
+        lease = self.cache.get('ifconfig') if self.reuse_lease else None
+        if lease:
+            self.sta.ifconfig(tuple(lease))
+        if (yield from self._associate(bssid, self.fast_timeout_ms)):
+            return True
+        if lease:
+            self._use_dhcp()
+        return False
+
+    def _connect_scan(self):
+        """Scan, associate to the strongest access point; returns its BSSID"""
+        try:
+            found = self.sta.scan()
+        except OSError as e:
+            print(f"Wi-Fi scan error: {e}")
+            found = []
+        best = None
+        ssid = self.ssid.encode()
+        for entry in found:
+            # (ssid, bssid, channel, rssi, authmode, hidden)
+            if entry[0] == ssid and (best is None or entry[3] > best[3]):
+                best = entry
+        bssid = best[1] if best else None
+        self.channel = best[2] if best else None
+        yield from self._associate(bssid, self.timeout_ms)
+        return bssid
+
+    def _associate(self, bssid, timeout_ms):
+        """Start an association and poll it without blocking the event loop"""
+        try:
+            self.sta.disconnect()
+        except OSError:
+            pass
+        try:
+            if bssid:
+                self.sta.connect(self.ssid, self.password, bssid=bssid)
+            else:
+                self.sta.connect(self.ssid, self.password)
+        except OSError as e:
+            print(f"Wi-Fi connect error: {e}")
+            return False
+        deadline = utime.ticks_add(utime.ticks_ms(), timeout_ms)
+        while utime.ticks_diff(deadline, utime.ticks_ms()) > 0:
+            if self.sta.isconnected():
+                return True
+            if self.sta.status() in FAILED_STATUSES:
+                break
+            yield from asyncio.sleep_ms(POLL_MS)
+        return self.sta.isconnected()
+
+    def _use_dhcp(self):
+        try:
+            self.sta.ifconfig('dhcp')
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def _connected(self, path, bssid, elapsed):
+        self.connects += 1
+        self.last_path = path
+        self.last_connect_ms = elapsed
+        self.total_connect_ms += elapsed
+        if self.first_connect_ms is None:
+            self.first_connect_ms = elapsed
+        self.connected_ticks = utime.ticks_ms()
+        ifconfig = self.sta.ifconfig()
+        self.ip = ifconfig[0]
+        self.bssid = bssid
+        if path == 'cached':
+            try:
+                self.channel = self.sta.config('channel')
+            except (OSError, ValueError):
+                self.channel = self.cache.get('channel')
+        self._set_state(CONNECTED)
+        print(f"✅ STA Mode: Connected - IP: {self.ip} ({path}, {elapsed}ms)")
+
+        # Keep the cache in step with the access point and lease we ended up on
+        cache = {
+            'ssid': self.ssid,
+            'bssid': binascii.hexlify(bssid).decode() if bssid else None,
+            'channel': self.channel,
+            'ifconfig': list(ifconfig)
+        }
+        if cache != self.cache:
+            self.cache = cache
+            self.save()
+
+    def monitor(self):
+        """Watch the link and reconnect with exponential backoff - uasyncio coroutine"""
+        if not self.ssid:
+            return
+        while True:
+            if self.state == CONNECTED:
+                yield from asyncio.sleep_ms(self.check_ms)
+                if self.sta.isconnected():
+                    if utime.ticks_diff(utime.ticks_ms(), self.info_ticks) >= self.info_refresh_ms:
+                        self.refresh_info()  # Slow timer, mainly for RSSI
+                    continue
+                self.disconnects += 1
+                print("⚠️  Wi-Fi link lost - reconnecting")
+                self._set_state(DISCONNECTED)
+                self.retry_ms = 0  # First retry right away through the cached path
+            else:
+                self.retry_ms = min(self.retry_max_ms, max(self.retry_min_ms, self.retry_ms * 2))
+                self._set_state(BACKOFF)
+                print(f"🔄 Wi-Fi retry in {self.retry_ms // 1000}s")
+                yield from asyncio.sleep_ms(self.retry_ms)
+            if (yield from self.connect()):
+                self.retry_ms = 0
+                self.reconnects += 1
+
+    def save(self):
+        """Write the cache to flash atomically"""
+        try:
+            write_atomic(self.cache_path, json.dumps(self.cache))
+            return True
+        except Exception as e:
+            print(f"Wi-Fi cache save error: {e}")
+            return False
+
+    def load(self):
+        """Load the cached access point and lease"""
+        try:
+            with open_saved(self.cache_path) as f:
+                self.cache = json.loads(f.read())
+        except (OSError, ValueError):
+            self.cache = {}
+            return False
+        return True
+
+    def forget(self):
+        """Drop the cache, e.g. after the access point or router changed"""
+        self.cache = {}
+        try:
+            uos.remove(self.cache_path)
+        except OSError:
+            pass
+
+    def get_status(self):
+        """Get link state and connection-time statistics (no driver calls)"""
+        connected_s = 0
+        if self.state == CONNECTED and self.connected_ticks is not None:
+            connected_s = utime.ticks_diff(utime.ticks_ms(), self.connected_ticks) // 1000
+        return {
+            'state': STATE_NAMES[self.state],
+            'ssid': self.ssid,
+            'ip': self.ip if self.state == CONNECTED else None,
+            'ap_ip': self.ap_ip,
+            'bssid': self.cache.get('bssid'),
+            'channel': self.channel,
+            'rssi': self.info['rssi'],
+            'info_age_s': utime.ticks_diff(utime.ticks_ms(), self.info_ticks) // 1000,
+            'info_refreshes': self.info_refreshes,
+            'connected_s': connected_s,
+            'first_connect_ms': self.first_connect_ms,
+            'last_connect_ms': self.last_connect_ms,
+            'last_connect_path': self.last_path,
+            'avg_connect_ms': self.total_connect_ms // self.connects if self.connects else 0,
+            'attempts': self.attempts,
+            'connects': self.connects,
+            'fast_hits': self.fast_hits,
+            'fast_misses': self.fast_misses,
+            'scan_connects': self.scan_connects,
+            'failures': self.failures,
+            'disconnects': self.disconnects,
+            'reconnects': self.reconnects,
+            'retry_ms': self.retry_ms
+        }
+
+# Shared instance used by boot code and the web server
+network_manager = NetworkManager()
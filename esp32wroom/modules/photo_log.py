@@ -0,0 +1,411 @@
+# Log-structured Photo Store for ESP32-WROVER Smart Home
+# Appends photos to a few large segment files instead of one flash file per photo
+
+import sys
+sys.path.append('..')  # To access config
+import uos
+import utime
+import ustruct
+try:
+    from ubinascii import crc32
+except ImportError:
+    from binascii import crc32
+
+# Import configuration
+try:
+    from config import PHOTO_LOG_CONFIG
+except ImportError:
+    # Fallback if config not available
+    PHOTO_LOG_CONFIG = {
+        'SEGMENT_BYTES': 192 * 1024,
+        'MAX_SEGMENTS': 6,
+        'ENTRIES_PER_SEGMENT': 64,
+        'MIN_FREE_BYTES': 64 * 1024
+    }
+
+# Segment layout:
+#   header   magic, version, reserved, entries per segment, segment sequence
+#   index    ENTRIES_PER_SEGMENT fixed-size slots (zeroed until committed)
+#   data     photo bodies appended back to back
+SEGMENT_MAGIC = b'PLOG'
+SEGMENT_VERSION = 1
+HEADER_FMT = '<4sBBHI'
+HEADER_SIZE = ustruct.calcsize(HEADER_FMT)
+ENTRY_FMT = '<IIIIIIBBH'  # id, timestamp, offset, length, crc32, ref, kind, flags, reserved
+ENTRY_SIZE = ustruct.calcsize(ENTRY_FMT)
+ENTRY_COMMITTED = 0xA5
+
+SEGMENT_PREFIX = 'seg_'
+SEGMENT_SUFFIX = '.plog'
+
+# Record kinds
+KIND_MOTION = 1
+KIND_TIMELAPSE = 2
+KIND_THUMB = 3      # ref = id of the full-size photo
+
+# Entry tuple fields
+E_ID = 0
+E_TIME = 1
+E_OFFSET = 2
+E_LENGTH = 3
+E_CRC = 4
+E_REF = 5
+E_KIND = 6
+
+COPY_BUFSZ = 1024
+
+class _Segment:
+    """In-memory view of one segment file"""
+
+    def __init__(self, seq, path, slots):
+        self.seq = seq
+        self.path = path
+        self.slots = slots
+        self.entries = []  # Committed entry tuples in slot order
+        self.data_start = HEADER_SIZE + slots * ENTRY_SIZE
+        self.append_offset = self.data_start
+
+    def used_bytes(self):
+        return self.append_offset
+
+    def is_full(self, length, segment_bytes):
+        if len(self.entries) >= self.slots:
+            return True
+        return self.append_offset + length > segment_bytes
+
+class PhotoLog:
+    """Append-only photo log with circular segment reclamation"""
+
+    def __init__(self, storage_path='/photos', segment_bytes=None,
+                 max_segments=None, entries_per_segment=None):
+        self.storage_path = storage_path
+        self.segment_bytes = segment_bytes or PHOTO_LOG_CONFIG['SEGMENT_BYTES']
+        self.max_segments = max_segments or PHOTO_LOG_CONFIG['MAX_SEGMENTS']
+        self.entries_per_segment = entries_per_segment or PHOTO_LOG_CONFIG['ENTRIES_PER_SEGMENT']
+        self.min_free_bytes = PHOTO_LOG_CONFIG['MIN_FREE_BYTES']
+
+        self.segments = []  # Oldest first
+        self.index = {}     # photo id -> segment
+        self.next_id = 1
+        self._active_file = None
+        self._active_path = None
+        self.skipped_seq = 0  # Highest sequence of an unreadable segment left in place
+
+        # Statistics
+        self.appends = 0
+        self.reclaimed_segments = 0
+        self.recovered_entries = 0
+        self.discarded_entries = 0
+        self.skipped_segments = 0
+
+        self.recover()
+
+    # -------------------------------------------------------------------------
+    # Recovery
+    # -------------------------------------------------------------------------
+
+    def recover(self):
+        """Rebuild the in-memory index from segment headers"""
+        start = utime.ticks_ms()
+        self.close()
+        self.segments = []
+        self.index = {}
+        self.skipped_segments = 0
+
+        try:
+            names = [n for n in uos.listdir(self.storage_path)
+                     if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)]
+        except OSError:
+            names = []
+        names.sort()  # Zero-padded sequence numbers sort chronologically
+
+        for name in names:
+            path = f"{self.storage_path}/{name}"
+            segment = self._load_segment(path)
+            if segment:
+                self.segments.append(segment)
+                for entry in segment.entries:
+                    self.index[entry[E_ID]] = segment
+                    if entry[E_ID] >= self.next_id:
+                        self.next_id = entry[E_ID] + 1
+            else:
+                # May still hold photos (bad read, newer format) - never delete it here
+                self.skipped_segments += 1
+                self._set_aside(name)
+
+        # Only the newest record can be torn by a power cut
+        if self.segments:
+            self._verify_tail(self.segments[-1])
+
+        self.recovered_entries = len(self.index)
+        elapsed = utime.ticks_diff(utime.ticks_ms(), start)
+        print(f"Photo log recovered: {len(self.index)} photos in {len(self.segments)} segments ({elapsed}ms)")
+
+    def _set_aside(self, name):
+        """Rename an unreadable segment out of the log so it can be inspected"""
+        path = f"{self.storage_path}/{name}"
+        try:
+            uos.rename(path, path + '.bad')
+            print(f"Set aside unreadable segment: {name}.bad")
+        except OSError:
+            print(f"Skipping unreadable segment: {name}")
+            try:
+                seq = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            except ValueError:
+                return
+            # New segments must not be created over it
+            self.skipped_seq = max(self.skipped_seq, seq)
+
+    def _load_segment(self, path):
+        """Read a segment header and its committed index entries"""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+                if len(header) < HEADER_SIZE:
+                    return None
+                magic, version, _, slots, seq = ustruct.unpack(HEADER_FMT, header)
+                if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+                    return None
+
+                table = f.read(slots * ENTRY_SIZE)
+                segment = _Segment(seq, path, slots)
+                for slot in range(len(table) // ENTRY_SIZE):
+                    fields = ustruct.unpack_from(ENTRY_FMT, table, slot * ENTRY_SIZE)
+                    if fields[7] != ENTRY_COMMITTED:
+                        break  # Slots are filled in order
+                    segment.entries.append(fields[:7])
+                    end = fields[E_OFFSET] + fields[E_LENGTH]
+                    if end > segment.append_offset:
+                        segment.append_offset = end
+                return segment
+        except Exception as e:
+            print(f"Segment load error ({path}): {e}")
+            return None
+
+    def _verify_tail(self, segment):
+        """Drop the last entry of a segment if its body does not match the CRC"""
+        if not segment.entries:
+            return
+        entry = segment.entries[-1]
+        try:
+            if self._crc_of(segment, entry) == entry[E_CRC]:
+                return
+        except Exception:
+            pass
+
+        print(f"Discarding torn photo record {entry[E_ID]}")
+        slot = len(segment.entries) - 1
+        segment.entries.pop()
+        self.index.pop(entry[E_ID], None)
+        segment.append_offset = entry[E_OFFSET]
+        self.discarded_entries += 1
+        try:
+            with open(segment.path, 'r+b') as f:
+                f.seek(HEADER_SIZE + slot * ENTRY_SIZE)
+                f.write(bytes(ENTRY_SIZE))
+        except Exception as e:
+            print(f"Torn record cleanup error: {e}")
+
+    def _crc_of(self, segment, entry):
+        buf = bytearray(COPY_BUFSZ)
+        crc = 0
+        remaining = entry[E_LENGTH]
+        with open(segment.path, 'rb') as f:
+            f.seek(entry[E_OFFSET])
+            while remaining > 0:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                n = min(n, remaining)
+                crc = crc32(memoryview(buf)[:n], crc)
+                remaining -= n
+        return crc
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def append(self, data, kind=KIND_MOTION, ref=0, timestamp=None):
+        """Append one photo and return its id"""
+        length = len(data)
+        if HEADER_SIZE + self.entries_per_segment * ENTRY_SIZE + length > self.segment_bytes:
+            raise ValueError("Photo larger than a log segment")
+
+        segment = self._segment_for(length)
+        if timestamp is None:
+            timestamp = utime.time()
+
+        photo_id = self.next_id
+        offset = segment.append_offset
+        slot = len(segment.entries)
+        crc = crc32(data)
+        f = self._open_active(segment)
+
+        # Body first, index slot last: a record only exists once its slot is written
+        f.seek(offset)
+        f.write(data)
+        f.flush()
+        f.seek(HEADER_SIZE + slot * ENTRY_SIZE)
+        f.write(ustruct.pack(ENTRY_FMT, photo_id, timestamp, offset, length,
+                             crc, ref, kind, ENTRY_COMMITTED, 0))
+        f.flush()
+
+        entry = (photo_id, timestamp, offset, length, crc, ref, kind)
+        segment.entries.append(entry)
+        segment.append_offset = offset + length
+        self.index[photo_id] = segment
+        self.next_id = photo_id + 1
+        self.appends += 1
+        return photo_id
+
+    def _segment_for(self, length):
+        """Return a segment with room for length bytes, opening a new one if needed"""
+        if self.segments:
+            segment = self.segments[-1]
+            if not segment.is_full(length, self.segment_bytes):
+                return segment
+        return self._new_segment()
+
+    def _new_segment(self):
+        """Create the next segment, reclaiming the oldest ones when over budget"""
+        self.close()
+        while len(self.segments) >= self.max_segments:
+            self._reclaim_oldest()
+        while self.segments and self._free_bytes() < self.segment_bytes + self.min_free_bytes:
+            self._reclaim_oldest()
+
+        seq = max(self.segments[-1].seq if self.segments else 0, self.skipped_seq) + 1
+        path = f"{self.storage_path}/{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}"
+        segment = _Segment(seq, path, self.entries_per_segment)
+        with open(path, 'wb') as f:
+            f.write(ustruct.pack(HEADER_FMT, SEGMENT_MAGIC, SEGMENT_VERSION, 0,
+                                 segment.slots, seq))
+            f.write(bytes(segment.slots * ENTRY_SIZE))
+        self.segments.append(segment)
+        return segment
+
+    def _reclaim_oldest(self):
+        """Drop the oldest segment (one file removal frees many photos)"""
+        segment = self.segments.pop(0)
+        for entry in segment.entries:
+            self.index.pop(entry[E_ID], None)
+        self._remove_file(segment.path)
+        self.reclaimed_segments += 1
+        print(f"Reclaimed photo segment {segment.seq} ({len(segment.entries)} photos)")
+
+    def _open_active(self, segment):
+        if self._active_file is None or self._active_path != segment.path:
+            self.close()
+            self._active_file = open(segment.path, 'r+b')
+            self._active_path = segment.path
+        return self._active_file
+
+    def close(self):
+        """Close the active segment file"""
+        if self._active_file is not None:
+            try:
+                self._active_file.close()
+            except Exception:
+                pass
+            self._active_file = None
+            self._active_path = None
+
+    def _free_bytes(self):
+        try:
+            stat = uos.statvfs(self.storage_path)
+            return stat[0] * stat[3]
+        except Exception:
+            return self.segment_bytes + self.min_free_bytes
+
+    def _remove_file(self, path):
+        try:
+            uos.remove(path)
+        except OSError:
+            pass
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+
+    def get_entry(self, photo_id):
+        """Get the entry tuple for a photo id"""
+        segment = self.index.get(photo_id)
+        if not segment:
+            return None
+        for entry in segment.entries:
+            if entry[E_ID] == photo_id:
+                return entry
+        return None
+
+    def open_photo(self, photo_id):
+        """Open a photo for streaming; returns (file, length) positioned at the body"""
+        segment = self.index.get(photo_id)
+        entry = self.get_entry(photo_id)
+        if not entry:
+            return None, 0
+        if self._active_file is not None:
+            self._active_file.flush()
+        f = open(segment.path, 'rb')
+        f.seek(entry[E_OFFSET])
+        return f, entry[E_LENGTH]
+
+    def read(self, photo_id):
+        """Read a whole photo into memory"""
+        f, length = self.open_photo(photo_id)
+        if not f:
+            return None
+        try:
+            return f.read(length)
+        finally:
+            f.close()
+
+    def entries(self, kind=None, newest_first=True):
+        """List committed entries, optionally filtered by kind"""
+        result = []
+        for segment in self.segments:
+            for entry in segment.entries:
+                if kind is None or entry[E_KIND] == kind:
+                    result.append(entry)
+        if newest_first:
+            result.reverse()
+        return result
+
+    def count(self, kind=None):
+        """Number of committed entries"""
+        if kind is None:
+            return len(self.index)
+        total = 0
+        for segment in self.segments:
+            for entry in segment.entries:
+                if entry[E_KIND] == kind:
+                    total += 1
+        return total
+
+    def bytes_used(self, kind=None):
+        """Total body bytes of committed entries, optionally filtered by kind"""
+        total = 0
+        for segment in self.segments:
+            for entry in segment.entries:
+                if kind is None or entry[E_KIND] == kind:
+                    total += entry[E_LENGTH]
+        return total
+
+    def capacity(self):
+        """Upper bound on retained photos"""
+        return self.max_segments * self.entries_per_segment
+
+    def get_info(self):
+        """Get photo log statistics"""
+        return {
+            'segments': len(self.segments),
+            'max_segments': self.max_segments,
+            'segment_bytes': self.segment_bytes,
+            'entries': len(self.index),
+            'capacity': self.capacity(),
+            'bytes_used': sum([s.used_bytes() for s in self.segments]),
+            'next_id': self.next_id,
+            'appends': self.appends,
+            'reclaimed_segments': self.reclaimed_segments,
+            'discarded_entries': self.discarded_entries,
+            'skipped_segments': self.skipped_segments
+        }
@@ -2,13 +2,12 @@
 # Provides audio notifications using PWM and FREENOVE Audio Board
 
 from machine import Pin, PWM
-import utime
-import math
+from sound_manager import sound_manager, UI, NOTIFICATION, MOTION, ALARM
 
 class PWMAudio:
     """PWM Audio Controller for FREENOVE Audio Board"""
     
-    def __init__(self, pwm_pin=12, status_led_pin=0):
+    def __init__(self, pwm_pin=12, status_led_pin=0, startup_sound=True):
         self.pwm_pin = pwm_pin
         self.status_led_pin = status_led_pin
         self.is_enabled = True
@@ -34,225 +33,106 @@ class PWMAudio:
                     print(f"⚠️ Status LED init failed: {e}")
                     self.status_led = None
             
+            sound_manager.add_device('audio', self._start_tone, self._silence)
             print(f"PWM Audio initialized - PWM: Pin {pwm_pin}, LED: Pin {status_led_pin}")
-            self.play_startup_sound()
+            if startup_sound:
+                self.play_startup_sound()
             
         except Exception as e:
             print(f"PWM Audio initialization error: {e}")
             self.is_enabled = False
     
+    def _start_tone(self, frequency, volume=None):
+        """Sound manager output: tone at frequency (duty = volume), status LED on"""
+        self.pwm.freq(int(frequency))
+        self.pwm.duty(int(self.current_volume if volume is None else volume))
+        if self.status_led:
+            self.status_led.on()
+    
+    def _silence(self):
+        """Sound manager output: silence"""
+        if self.pwm:
+            self.pwm.duty(0)
+        if self.status_led:
+            self.status_led.off()
+    
+    def play(self, notes, name=None, gap_ms=None, replace=False, priority=NOTIFICATION):
+        """Queue (frequency Hz, duration ms[, duty]) notes in a sound class; returns at once
+        
+        The sound plays on the device AUDIO_CONFIG routes the class to;
+        gap_ms defaults to AUDIO_CONFIG NOTE_GAP_MS.
+        """
+        if not self.is_enabled or not self.pwm:
+            return None
+        seq_id = sound_manager.play(notes, name, priority, gap_ms, replace)
+        if seq_id is None:
+            print(f"🔇 Sound queue full - {name} dropped")
+        return seq_id
+    
+    def stop(self, seq_id=None):
+        """Cancel a queued or playing sound (all but alarms by default)"""
+        if seq_id is None:
+            return sound_manager.cancel(up_to=MOTION)
+        return sound_manager.cancel(seq_id)
+    
     def play_startup_sound(self):
         """Play startup melody"""
-        if not self.is_enabled:
-            return
-            
-        try:
-            if self.status_led:
-                self.status_led.on()
-            startup_melody = [
-                (440, 0.2),   # A4
-                (523, 0.2),   # C5  
-                (659, 0.2),   # E5
-                (784, 0.4)    # G5 (longer)
-            ]
-            
-            for freq, duration in startup_melody:
-                self.play_tone(freq, duration)
-                utime.sleep(0.05)  # Small gap between notes
-            
-            if self.status_led:
-                self.status_led.off()
-            print("🎵 Startup sound played")
-            
-        except Exception as e:
-            print(f"Startup sound error: {e}")
+        if self.play(((440, 200), (523, 200), (659, 200), (784, 400)), 'startup', 50, priority=UI):
+            print("🎵 Startup sound queued")
     
     def play_tone(self, frequency, duration, volume=None):
-        """Play a single tone"""
-        if not self.is_enabled or not self.pwm:
-            return
-            
-        try:
-            if volume is None:
-                volume = self.current_volume
-                
-            self.pwm.freq(int(frequency))
-            self.pwm.duty(int(volume))
-            utime.sleep(duration)
-            self.pwm.duty(0)  # Silent
-            
-        except Exception as e:
-            print(f"Tone play error: {e}")
+        """Play a single tone (duration in seconds)"""
+        return self.play(((int(frequency), int(duration * 1000), volume),), 'tone', priority=UI)
     
     def play_motion_alert(self):
         """Play motion detection alert sound"""
-        if not self.is_enabled:
-            return
-            
-        try:
-            if self.status_led:
-                self.status_led.on()
-            
-            # Rising tone sequence for motion
-            frequencies = [800, 1000, 1200, 1500]
-            for freq in frequencies:
-                self.play_tone(freq, 0.1, self.current_volume)
-            
-            if self.status_led:
-                self.status_led.off()
-            print("🚨 Motion alert sound played")
-            
-        except Exception as e:
-            print(f"Motion alert error: {e}")
+        # Rising tone sequence for motion
+        if self.play(((800, 100), (1000, 100), (1200, 100), (1500, 100)), 'motion', priority=MOTION):
+            print("🚨 Motion alert sound queued")
     
     def play_photo_capture_sound(self):
         """Play photo capture confirmation sound"""
-        if not self.is_enabled:
-            return
-            
-        try:
-            if self.status_led:
-                self.status_led.on()
-            
-            # Camera shutter sound simulation
-            self.play_tone(1200, 0.1, self.current_volume)
-            utime.sleep(0.05)
-            self.play_tone(800, 0.1, self.current_volume)
-            
-            if self.status_led:
-                self.status_led.off()
-            print("📸 Photo capture sound played")
-            
-        except Exception as e:
-            print(f"Photo sound error: {e}")
+        # Camera shutter sound simulation
+        if self.play(((1200, 100), (800, 100)), 'capture', 50):
+            print("📸 Photo capture sound queued")
     
     def play_alarm_sound(self):
         """Play alarm/warning sound"""
-        if not self.is_enabled:
-            return
-            
-        try:
-            if self.status_led:
-                self.status_led.on()
-            
-            # Alternating high-low alarm
-            for i in range(3):
-                self.play_tone(1000, 0.3, self.current_volume)
-                self.play_tone(500, 0.3, self.current_volume)
-            
-            if self.status_led:
-                self.status_led.off()
-            print("🚨 Alarm sound played")
-            
-        except Exception as e:
-            print(f"Alarm sound error: {e}")
+        # Alternating high-low alarm
+        if self.play(((1000, 300), (500, 300)) * 3, 'alarm', priority=ALARM):
+            print("🚨 Alarm sound queued")
     
     def play_success_sound(self):
         """Play success confirmation sound"""
-        if not self.is_enabled:
-            return
-            
-        try:
-            if self.status_led:
-                self.status_led.on()
-            
-            # Rising success melody
-            success_notes = [
-                (523, 0.15),  # C5
-                (659, 0.15),  # E5
-                (784, 0.25)   # G5
-            ]
-            
-            for freq, duration in success_notes:
-                self.play_tone(freq, duration, self.current_volume)
-                utime.sleep(0.05)
-            
-            if self.status_led:
-                self.status_led.off()
-            print("✅ Success sound played")
-            
-        except Exception as e:
-            print(f"Success sound error: {e}")
+        # Rising success melody
+        if self.play(((523, 150), (659, 150), (784, 250)), 'success', 50):
+            print("✅ Success sound queued")
     
     def play_error_sound(self):
         """Play error/failure sound"""
-        if not self.is_enabled:
-            return
-            
-        try:
-            if self.status_led:
-                self.status_led.on()
-            
-            # Low error beeps
-            for i in range(3):
-                self.play_tone(200, 0.2, self.current_volume)
-                utime.sleep(0.1)
-            
-            if self.status_led:
-                self.status_led.off()
-            print("❌ Error sound played")
-            
-        except Exception as e:
-            print(f"Error sound error: {e}")
+        # Low error beeps
+        if self.play(((200, 200),) * 3, 'error', 100):
+            print("❌ Error sound queued")
     
     def play_notification_beep(self):
         """Play simple notification beep"""
-        if not self.is_enabled:
-            return
-            
-        try:
-            if self.status_led:
-                self.status_led.on()
-            self.play_tone(1000, 0.2, self.current_volume)
-            if self.status_led:
-                self.status_led.off()
-            print("🔔 Notification beep played")
-            
-        except Exception as e:
-            print(f"Notification beep error: {e}")
+        if self.play(((1000, 200),), 'notification'):
+            print("🔔 Notification beep queued")
     
     def play_sweep(self, start_freq=200, end_freq=2000, duration=2.0):
         """Play frequency sweep"""
-        if not self.is_enabled:
-            return
-            
-        try:
-            if self.status_led:
-                self.status_led.on()
-            
-            steps = 50
-            step_duration = duration / steps
-            
-            for i in range(steps):
-                freq = start_freq + (end_freq - start_freq) * i / steps
-                self.play_tone(freq, step_duration, self.current_volume)
-            
-            if self.status_led:
-                self.status_led.off()
-            print(f"🎶 Frequency sweep played ({start_freq}Hz → {end_freq}Hz)")
-            
-        except Exception as e:
-            print(f"Sweep error: {e}")
+        steps = 50
+        step_ms = int(duration * 1000 / steps)
+        notes = [(start_freq + (end_freq - start_freq) * i // steps, step_ms) for i in range(steps)]
+        if self.play(notes, 'sweep', 0, priority=UI):
+            print(f"🎶 Frequency sweep queued ({start_freq}Hz → {end_freq}Hz)")
     
     def play_melody(self, notes):
-        """Play a melody from a list of (frequency, duration) tuples"""
-        if not self.is_enabled:
-            return
-            
-        try:
-            if self.status_led:
-                self.status_led.on()
-            
-            for freq, duration in notes:
-                self.play_tone(freq, duration, self.current_volume)
-                utime.sleep(0.05)  # Small gap between notes
-            
-            if self.status_led:
-                self.status_led.off()
-            print(f"🎵 Melody played ({len(notes)} notes)")
-            
-        except Exception as e:
-            print(f"Melody error: {e}")
+        """Play a melody from a list of (frequency, duration seconds) tuples"""
+        seq_id = self.play([(freq, int(duration * 1000)) for freq, duration in notes], 'melody', 50, priority=UI)
+        if seq_id:
+            print(f"🎵 Melody queued ({len(notes)} notes)")
+        return seq_id
     
     def set_volume(self, volume_percent):
         """Set audio volume (0-100%)"""
@@ -266,50 +146,35 @@ class PWMAudio:
                 
             print(f"🔊 Volume set to {volume_percent}% (duty: {self.current_volume})")
             
-            # Play test tone
+            # Test tone; slider moves replace the previous one instead of queueing
             if volume_percent > 0:
-                self.play_tone(1000, 0.1, self.current_volume)
+                self.play(((1000, 100),), 'volume', replace=True, priority=UI)
             
         except Exception as e:
             print(f"Volume set error: {e}")
     
     def test_audio_system(self):
-        """Test all audio functions"""
+        """Queue a test of tones, volume levels and notification sounds"""
         if not self.is_enabled:
             print("❌ Audio system not available")
             return False
             
         print("🔧 Testing PWM Audio System...")
-        
-        try:
-            # Test basic tones
-            print("   Testing basic tones...")
-            test_frequencies = [440, 880, 1000, 500]
-            for freq in test_frequencies:
-                self.play_tone(freq, 0.3, 300)
-                utime.sleep(0.2)
-            
-            # Test volume levels
-            print("   Testing volume levels...")
-            for volume in [128, 256, 512, 768]:
-                self.play_tone(1000, 0.2, volume)
-                utime.sleep(0.1)
-            
-            # Test notification sounds
-            print("   Testing notification sounds...")
-            self.play_success_sound()
-            utime.sleep(0.5)
-            self.play_error_sound()
-            utime.sleep(0.5)
-            self.play_motion_alert()
-            utime.sleep(0.5)
-            
-            print("✅ Audio system test complete!")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Audio test failed: {e}")
+        notes = []
+        # Basic tones
+        for freq in (440, 880, 1000, 500):
+            notes += [(freq, 300, 300), (0, 200)]
+        # Volume levels
+        for volume in (128, 256, 512, 768):
+            notes += [(1000, 200, volume), (0, 100)]
+        # Notification sounds
+        notes += [(523, 150), (0, 50), (659, 150), (0, 50), (784, 250), (0, 500)]
+        notes += [(200, 200), (0, 100)] * 3 + [(0, 500)]
+        notes += [(800, 100), (1000, 100), (1200, 100), (1500, 100)]
+        if self.play(notes, 'test', 0, replace=True, priority=UI) is None:
             return False
+        print("✅ Audio system test queued")
+        return True
     
     def enable_audio(self):
         """Enable audio notifications"""
@@ -320,10 +185,7 @@ class PWMAudio:
     def disable_audio(self):
         """Disable audio notifications"""
         self.is_enabled = False
-        if self.pwm:
-            self.pwm.duty(0)  # Ensure silence
-        if self.status_led:
-            self.status_led.off()
+        self.stop()  # Ensure silence
         print("🔇 Audio disabled")
     
     def get_audio_status(self):
@@ -332,6 +194,7 @@ class PWMAudio:
             'enabled': self.is_enabled,
             'volume_percent': int((self.current_volume / 1023.0) * 100),
             'volume_duty': self.current_volume,
+            'sequencer': sound_manager.get_status(),
             'pwm_pin': self.pwm_pin,
             'status_led_pin': self.status_led_pin
         }
@@ -339,8 +202,8 @@ class PWMAudio:
     def cleanup(self):
         """Cleanup PWM resources"""
         try:
+            self.stop()
             if self.pwm:
-                self.pwm.duty(0)
                 self.pwm.deinit()
             if self.status_led:
                 self.status_led.off()
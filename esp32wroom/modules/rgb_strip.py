@@ -7,6 +7,10 @@ sys.path.append('..')  # To access config
 from neopixel import NeoPixel
 from machine import Pin
 import time
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
 
 # Import configuration
 try:
@@ -214,6 +218,29 @@ class RGBStrip:
         time.sleep_ms(500)
         self.clear()
     
+    def startup_sequence_async(self):
+        """Startup animation as a uasyncio coroutine (does not block boot)"""
+        for i in range(self.num_leds):
+            self.strip[i] = (50, 50, 50)
+            self.strip.write()
+            yield from asyncio.sleep_ms(100)
+        
+        yield from asyncio.sleep_ms(300)
+        
+        # Rainbow sweep
+        colors = [(255, 0, 0), (255, 128, 0), (255, 255, 0), (0, 255, 0),
+                  (0, 255, 255), (0, 0, 255), (128, 0, 255), (255, 0, 128)]
+        for shift in range(len(colors) + 1):
+            for i in range(self.num_leds):
+                self.strip[i] = colors[(i + shift) % len(colors)]
+            self.strip.write()
+            yield from asyncio.sleep_ms(100)
+        
+        # End with green (ready)
+        self.set_color_name('green', 100)
+        yield from asyncio.sleep_ms(500)
+        self.clear()
+    
     def system_status(self, wifi_ok=False, camera_ok=False, sensors_ok=False):
         """Show system status across 8 LEDs"""
         self.clear()
@@ -0,0 +1,287 @@
+# Automation Rules Engine for ESP32-WROVER Smart Home
+# JSON rules compiled into an input -> rules plan, re-evaluated only on change
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+import json
+from event_bus import event_bus, RULE, MOTION, MOTION_END, ALARM, ALARM_STOP, SENSOR, NETWORK
+
+# Import configuration
+try:
+    from config import AUTOMATION_CONFIG
+except ImportError:
+    # Fallback if config not available
+    AUTOMATION_CONFIG = {
+        'ENABLED': True,
+        'RULES_PATH': '/rules.json'
+    }
+
+# Condition operators
+OP_LT = 0
+OP_LE = 1
+OP_GT = 2
+OP_GE = 3
+OP_EQ = 4
+OP_NE = 5
+OP_BETWEEN = 6  # Inclusive; wraps around when low > high (e.g. hours 22..6)
+OPERATORS = {'<': OP_LT, '<=': OP_LE, '>': OP_GT, '>=': OP_GE,
+             '==': OP_EQ, '!=': OP_NE, 'between': OP_BETWEEN}
+
+class Rule:
+    """A compiled rule: conditions as (slot, op, a, b) tuples"""
+
+    def __init__(self, name, all_conds, any_conds, actions, cooldown_ms):
+        self.name = name
+        self.all_conds = all_conds
+        self.any_conds = any_conds
+        self.actions = actions
+        self.cooldown_ms = cooldown_ms
+        self.state = False      # Result of the last evaluation
+        self.fires = 0
+        self.last_fire = None   # ticks_ms
+
+class RulesEngine:
+    """Fires a rule's actions when its conditions go from false to true
+
+    Rules look like:
+        {"name": "night_motion",
+         "all": [["motion", "==", true], ["hour", "between", 22, 6]],
+         "any": [...],
+         "actions": [{"type": "rgb", "color": "white", "brightness": 40}],
+         "cooldown_s": 60}
+
+    Inputs are numbered slots. Compiling records which rules read each slot,
+    so set_input() only queues those rules, and only when the value changed.
+    An unset input makes every condition on it false.
+    """
+
+    def __init__(self, path=None, on_fire=None):
+        self.path = path or AUTOMATION_CONFIG.get('RULES_PATH', '/rules.json')
+        self.on_fire = on_fire or self._publish
+        self.slots = {}    # Input name -> slot
+        self.values = []   # Slot -> current value
+        self.deps = []     # Slot -> indexes of rules reading it
+        self.rules = []
+        self.queued = []   # Rule indexes waiting for evaluation
+        self.pending = []  # Rule index -> already queued
+
+        # Statistics
+        self.evaluations = 0
+        self.rule_evals = 0
+        self.fired = 0
+        self.last_eval_us = 0
+        self.max_eval_us = 0
+        self.total_eval_us = 0
+        self.errors = []
+
+    def _slot(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = len(self.values)
+            self.slots[name] = slot
+            self.values.append(None)
+            self.deps.append([])
+        return slot
+
+    def _compile_conditions(self, conds, index):
+        compiled = []
+        for cond in conds:
+            op = OPERATORS[cond[1]]
+            slot = self._slot(cond[0])
+            if index not in self.deps[slot]:
+                self.deps[slot].append(index)
+            low = cond[2]
+            high = cond[3] if op == OP_BETWEEN else None
+            compiled.append((slot, op, low, high))
+        return tuple(compiled)
+
+    def compile(self, rules):
+        """Build the evaluation plan; rules with errors are skipped and reported"""
+        self.rules = []
+        self.errors = []
+        for slot in range(len(self.deps)):
+            self.deps[slot] = []
+        for spec in rules:
+            name = spec.get('name', 'rule%d' % len(self.rules))
+            index = len(self.rules)
+            try:
+                all_conds = self._compile_conditions(spec.get('all', ()), index)
+                any_conds = self._compile_conditions(spec.get('any', ()), index)
+                if not all_conds and not any_conds:
+                    raise ValueError("no conditions")
+                rule = Rule(name, all_conds, any_conds, spec.get('actions', []),
+                            int(spec.get('cooldown_s', 0) * 1000))
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                # Drop dependencies already recorded for the broken rule
+                for deps in self.deps:
+                    if index in deps:
+                        deps.remove(index)
+                self.errors.append(f"{name}: {e}")
+                print(f"Rule {name} skipped: {e}")
+                continue
+            self.rules.append(rule)
+        self.pending = [False] * len(self.rules)
+        self.queued = []
+        # Every rule gets one evaluation against the current inputs
+        for index in range(len(self.rules)):
+            self._queue(index)
+        return len(self.rules)
+
+    def load(self, path=None):
+        """Load and compile rules from a JSON file (a list or {"rules": [...]})"""
+        try:
+            with open(path or self.path) as f:
+                rules = json.loads(f.read())
+        except (OSError, ValueError) as e:
+            print(f"Rules load error: {e}")
+            return 0
+        if isinstance(rules, dict):
+            rules = rules.get('rules', [])
+        count = self.compile(rules)
+        print(f"⚙️  {count} automation rules loaded")
+        return count
+
+    def _queue(self, index):
+        if not self.pending[index]:
+            self.pending[index] = True
+            self.queued.append(index)
+
+    def set_input(self, name, value):
+        """Update an input; rules reading it are queued if the value changed"""
+        slot = self.slots.get(name)
+        if slot is None:
+            return  # No rule reads this input
+        if self.values[slot] == value:
+            return
+        self.values[slot] = value
+        for index in self.deps[slot]:
+            self._queue(index)
+
+    def _test(self, cond):
+        value = self.values[cond[0]]
+        if value is None:
+            return False
+        op = cond[1]
+        a = cond[2]
+        if op == OP_LT:
+            return value < a
+        if op == OP_LE:
+            return value <= a
+        if op == OP_GT:
+            return value > a
+        if op == OP_GE:
+            return value >= a
+        if op == OP_EQ:
+            return value == a
+        if op == OP_NE:
+            return value != a
+        b = cond[3]
+        if a <= b:
+            return a <= value <= b
+        return value >= a or value <= b
+
+    def _evaluate_rule(self, rule):
+        for cond in rule.all_conds:
+            if not self._test(cond):
+                return False
+        if rule.any_conds:
+            for cond in rule.any_conds:
+                if self._test(cond):
+                    return True
+            return False
+        return True
+
+    def _run(self, indexes):
+        fired = 0
+        now = utime.ticks_ms()
+        for index in indexes:
+            rule = self.rules[index]
+            state = self._evaluate_rule(rule)
+            if state and not rule.state:
+                if rule.last_fire is None or utime.ticks_diff(now, rule.last_fire) >= rule.cooldown_ms:
+                    rule.fires += 1
+                    rule.last_fire = now
+                    fired += 1
+                    self.on_fire(rule)
+            rule.state = state
+        self.rule_evals += len(indexes)
+        self.fired += fired
+        return fired
+
+    def evaluate(self):
+        """Evaluate the rules whose inputs changed; returns how many fired"""
+        if not self.queued:
+            return 0
+        start = utime.ticks_us()
+        queued = self.queued
+        self.queued = []
+        for index in queued:
+            self.pending[index] = False
+        fired = self._run(queued)
+        self._account(start)
+        return fired
+
+    def evaluate_all(self):
+        """Evaluate every rule regardless of changes (reference for the benchmark)"""
+        start = utime.ticks_us()
+        fired = self._run(range(len(self.rules)))
+        self._account(start)
+        return fired
+
+    def _account(self, start):
+        elapsed = utime.ticks_diff(utime.ticks_us(), start)
+        self.evaluations += 1
+        self.last_eval_us = elapsed
+        self.total_eval_us += elapsed
+        if elapsed > self.max_eval_us:
+            self.max_eval_us = elapsed
+
+    def _publish(self, rule):
+        event_bus.publish(RULE, {'rule': rule.name, 'actions': rule.actions})
+
+    def bind_events(self, bus=None):
+        """Feed motion, alarm, sensor and network events into the inputs"""
+        bus = bus or event_bus
+        bus.subscribe(MOTION, self._on_event, priority=20, name='rules')
+        bus.subscribe(MOTION_END, self._on_event, priority=20, name='rules')
+        bus.subscribe(ALARM, self._on_event, priority=20, name='rules')
+        bus.subscribe(ALARM_STOP, self._on_event, priority=20, name='rules')
+        bus.subscribe(SENSOR, self._on_event, priority=20, name='rules')
+        bus.subscribe(NETWORK, self._on_event, priority=20, name='rules')
+
+    def _on_event(self, topic, data):
+        if topic == MOTION:
+            self.set_input('motion', True)
+            self.set_input('motion_count', data['count'])
+        elif topic == MOTION_END:
+            self.set_input('motion', False)
+        elif topic == ALARM:
+            self.set_input('alarm_active', True)
+        elif topic == ALARM_STOP:
+            self.set_input('alarm_active', False)
+        elif topic == SENSOR:
+            self.set_input('temperature_c', data['temperature_c'])
+            self.set_input('humidity', data['humidity'])
+        elif topic == NETWORK:
+            self.set_input('connected', data['connected'])
+        self.evaluate()
+
+    def get_status(self):
+        """Get rules engine statistics"""
+        return {
+            'rules': [{
+                'name': r.name,
+                'active': r.state,
+                'fires': r.fires
+            } for r in self.rules],
+            'inputs': dict((name, self.values[slot]) for name, slot in self.slots.items()),
+            'errors': self.errors,
+            'queued': len(self.queued),
+            'evaluations': self.evaluations,
+            'rule_evaluations': self.rule_evals,
+            'fired': self.fired,
+            'last_eval_us': self.last_eval_us,
+            'avg_eval_us': self.total_eval_us // self.evaluations if self.evaluations else 0,
+            'max_eval_us': self.max_eval_us
+        }
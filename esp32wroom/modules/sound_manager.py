@@ -0,0 +1,84 @@
+# Sound Manager for ESP32-WROVER Smart Home
+# One prioritized playback engine for the PWM audio board and both buzzers
+
+import sys
+sys.path.append('..')  # To access config
+from tone_sequencer import ToneSequencer
+
+# Import configuration
+try:
+    from config import AUDIO_CONFIG
+except ImportError:
+    # Fallback if config not available
+    AUDIO_CONFIG = {
+        'QUEUE_SIZE': 4,
+        'NOTE_GAP_MS': 50,
+        'ROUTES': {'alarm': 'buzzer', 'motion': 'audio', 'notification': 'audio', 'ui': 'audio'},
+        'RESUME': ['alarm', 'motion'],
+        'FALLBACK': ['audio', 'buzzer', 'active']
+    }
+
+# Sound classes, lowest first; a higher class preempts a lower one
+UI = 0
+NOTIFICATION = 1
+MOTION = 2
+ALARM = 3
+CLASS_NAMES = ('ui', 'notification', 'motion', 'alarm')
+
+class SoundManager:
+    """Routes each sound class to an output device and plays one sound at a time
+
+    Devices register a start(frequency, volume) / stop() pair under a name
+    ('audio', 'buzzer', 'active'). AUDIO_CONFIG ROUTES picks the device per
+    class; when it is not registered (module not loaded) the first
+    available FALLBACK device plays instead. Classes listed in RESUME
+    continue after a preemption, the others are dropped.
+    """
+
+    def __init__(self):
+        self.routes = AUDIO_CONFIG.get('ROUTES', {})
+        self.resume = AUDIO_CONFIG.get('RESUME', ['alarm', 'motion'])
+        self.fallback = AUDIO_CONFIG.get('FALLBACK', ['audio', 'buzzer', 'active'])
+        self.devices = {}  # name -> (start, stop)
+        self.engine = ToneSequencer(queue_size=AUDIO_CONFIG.get('QUEUE_SIZE', 4))
+
+    def add_device(self, name, start, stop):
+        """Register an output: start(frequency, volume or None) and stop()"""
+        self.devices[name] = (start, stop)
+        stop()
+
+    def output_for(self, priority, device=None):
+        output = self.devices.get(device or self.routes.get(CLASS_NAMES[priority]))
+        if output is None:
+            for name in self.fallback:
+                if name in self.devices:
+                    return self.devices[name]
+        return output
+
+    def play(self, notes, name=None, priority=NOTIFICATION, gap_ms=None, replace=False,
+             device=None, on_done=None):
+        """Queue notes in a sound class; returns the sequence id or None"""
+        output = self.output_for(priority, device)
+        if output is None:
+            return None
+        return self.engine.play(notes, name, gap_ms, replace, on_done, priority, output,
+                                CLASS_NAMES[priority] in self.resume)
+
+    def cancel(self, seq_id=None, up_to=None):
+        """Stop one sound, every sound of class <= up_to, or everything"""
+        return self.engine.cancel(seq_id, up_to)
+
+    def is_active(self, seq_id):
+        return seq_id is not None and self.engine.is_active(seq_id)
+
+    def get_status(self):
+        """Playback engine state, devices and routes"""
+        status = self.engine.get_status()
+        if status['priority'] is not None:
+            status['class'] = CLASS_NAMES[status['priority']]
+        status['devices'] = list(self.devices.keys())
+        status['routes'] = self.routes
+        return status
+
+# Shared instance - every sound goes through here
+sound_manager = SoundManager()
@@ -0,0 +1,234 @@
+# Time Synchronization for ESP32-WROVER Smart Home
+# SNTP client that sets the RTC, re-syncs periodically and corrects drift in between
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+import usocket as socket
+import ustruct
+from machine import RTC
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+from timer_wheel import timer_wheel
+
+# Import configuration
+try:
+    from config import NTP_CONFIG
+except ImportError:
+    # Fallback if config not available
+    NTP_CONFIG = {
+        'ENABLED': True,
+        'SERVERS': ['pool.ntp.org'],
+        'PORT': 123,
+        'UTC_OFFSET_S': 0,
+        'TIMEOUT_MS': 1500,
+        'SAMPLES': 3,
+        'RESYNC_S': 3600,
+        'RETRY_S': 30,
+        'MIN_DRIFT_SPAN_S': 600,
+        'CORRECT_INTERVAL_S': 60,
+        'CORRECT_STEP_MS': 100
+    }
+
+# Seconds from the NTP epoch (1900) to the port's epoch (2000 on the ESP32)
+NTP_DELTA = 3155673600 if utime.gmtime(0)[0] == 2000 else 2208988800
+NTP_PACKET = '!B39xII'  # Flags, then the transmit timestamp (origin cookie)
+
+def ntp_to_ms(seconds, fraction):
+    """NTP timestamp -> ms since the NTP epoch"""
+    return seconds * 1000 + ((fraction * 1000) >> 32)
+
+class TimeSync:
+    """Keeps the RTC on NTP time
+
+    Each sync sends SAMPLES requests and uses the reply with the shortest
+    round trip; its offset is (T2 - T1 + T3 - T4) / 2 with T1/T4 taken from
+    ticks_ms. The RTC holds local time (UTC + UTC_OFFSET_S) because
+    utime.localtime() has no time zone. The offset left over at a re-sync,
+    plus the corrections already applied, divided by the time since the
+    last sync gives the RTC drift; between syncs a timer_wheel job steps
+    the RTC by the predicted error once it reaches CORRECT_STEP_MS.
+    """
+
+    def __init__(self, servers=None, port=None, rtc=None):
+        self.servers = servers or NTP_CONFIG.get('SERVERS', ['pool.ntp.org'])
+        self.port = port or NTP_CONFIG.get('PORT', 123)
+        self.utc_offset_s = NTP_CONFIG.get('UTC_OFFSET_S', 0)
+        self.timeout_ms = NTP_CONFIG.get('TIMEOUT_MS', 1500)
+        self.samples = NTP_CONFIG.get('SAMPLES', 3)
+        self.resync_s = NTP_CONFIG.get('RESYNC_S', 3600)
+        self.retry_s = NTP_CONFIG.get('RETRY_S', 30)
+        self.min_drift_span_ms = NTP_CONFIG.get('MIN_DRIFT_SPAN_S', 600) * 1000
+        self.correct_step_ms = NTP_CONFIG.get('CORRECT_STEP_MS', 100)
+        self.rtc = rtc or RTC()
+        self.change_callbacks = []
+        self.correct_timer = None
+        self.running = False
+
+        # Sync state
+        self.synced = False
+        self.last_sync_ticks = None
+        self.applied_ms = 0      # Drift corrections written since the last sync
+        self.drift_ppm = None    # RTC error rate, positive when the RTC runs slow
+        self.server = None
+
+        # Statistics
+        self.syncs = 0
+        self.failures = 0
+        self.last_offset_ms = 0
+        self.last_delay_ms = 0
+        self.max_offset_ms = 0
+        self.corrections = 0
+        self.corrected_ms = 0
+        self.last_sync_time = None  # utime.time() after the last sync
+
+    def on_change(self, callback):
+        """Register callback() run after the RTC was stepped by a sync"""
+        self.change_callbacks.append(callback)
+
+    def rtc_ms(self):
+        """RTC as ms since the epoch"""
+        dt = self.rtc.datetime()
+        seconds = utime.mktime((dt[0], dt[1], dt[2], dt[4], dt[5], dt[6], 0, 0))
+        return seconds * 1000 + dt[7] // 1000
+
+    def set_rtc_ms(self, ms):
+        t = utime.gmtime(ms // 1000)
+        self.rtc.datetime((t[0], t[1], t[2], t[6], t[3], t[4], t[5], (ms % 1000) * 1000))
+
+    def _resolve(self, server):
+        if isinstance(server, tuple):
+            return server  # (ip, port) - e.g. a local stand-in
+        return socket.getaddrinfo(server, self.port)[0][-1]
+
+    def query(self, addr):
+        """One request/reply - uasyncio coroutine, returns (offset_ms, delay_ms) or None"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setblocking(False)
+            t1 = utime.ticks_ms()
+            cookie = utime.ticks_us() & 0x3fffffff
+            sock.sendto(ustruct.pack(NTP_PACKET, 0x23, 0, cookie), addr)  # v4, client
+            while True:
+                try:
+                    reply = sock.recv(48)
+                except OSError:
+                    reply = None
+                if reply:
+                    t4 = utime.ticks_ms()
+                    local_ms = self.rtc_ms()
+                    break
+                if utime.ticks_diff(utime.ticks_ms(), t1) > self.timeout_ms:
+                    return None
+                yield from asyncio.sleep_ms(10)
+        finally:
+            sock.close()
+
+        if len(reply) < 48 or reply[0] & 0x07 != 4 or reply[1] == 0:
+            return None  # Not a server reply, or kiss-o'-death
+        origin = ustruct.unpack('!I', reply[28:32])[0]
+        if origin != cookie:
+            return None  # Stale or spoofed reply
+        receive = ntp_to_ms(*ustruct.unpack('!II', reply[32:40]))
+        transmit = ntp_to_ms(*ustruct.unpack('!II', reply[40:48]))
+        rtt = utime.ticks_diff(t4, t1)
+        delay = max(0, rtt - (transmit - receive))
+        server_ms = transmit + delay // 2 - NTP_DELTA * 1000 + self.utc_offset_s * 1000
+        return server_ms - local_ms, delay
+
+    def sync(self):
+        """Measure against the first server that answers and step the RTC - uasyncio coroutine"""
+        for server in self.servers:
+            try:
+                addr = self._resolve(server)
+            except OSError as e:
+                print(f"NTP resolve error ({server}): {e}")
+                continue
+            best = None
+            for _ in range(self.samples):
+                try:
+                    sample = yield from self.query(addr)
+                except OSError as e:
+                    print(f"NTP query error ({server}): {e}")
+                    sample = None
+                if sample and (best is None or sample[1] < best[1]):
+                    best = sample
+            if best:
+                self.server = server if isinstance(server, str) else f"{server[0]}:{server[1]}"
+                self._apply(best[0], best[1])
+                return True
+        self.failures += 1
+        return False
+
+    def _apply(self, offset_ms, delay_ms):
+        now_ticks = utime.ticks_ms()
+        if self.synced:
+            span = utime.ticks_diff(now_ticks, self.last_sync_ticks)
+            if span >= self.min_drift_span_ms:
+                # Offset the RTC would show with no corrections since the last sync
+                drift = (offset_ms + self.applied_ms) * 1000000 / span
+                self.drift_ppm = drift if self.drift_ppm is None else (self.drift_ppm + drift) / 2
+        self.set_rtc_ms(self.rtc_ms() + offset_ms)
+        self.synced = True
+        self.last_sync_ticks = now_ticks
+        self.applied_ms = 0
+        if self.syncs:  # The first sync sets the clock; later offsets are residual error
+            self.max_offset_ms = max(self.max_offset_ms, abs(offset_ms))
+        self.syncs += 1
+        self.last_offset_ms = offset_ms
+        self.last_delay_ms = delay_ms
+        self.last_sync_time = utime.time()
+        print(f"🕒 Time synced from {self.server}: offset {offset_ms}ms, delay {delay_ms}ms")
+        for callback in self.change_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Time change callback error: {e}")
+
+    def correct(self):
+        """Step the RTC by the drift predicted since the last sync (timer_wheel job)"""
+        if self.drift_ppm is None or not self.synced:
+            return 0
+        span = utime.ticks_diff(utime.ticks_ms(), self.last_sync_ticks)
+        due = int(self.drift_ppm * span / 1000000) - self.applied_ms
+        if abs(due) < self.correct_step_ms:
+            return 0
+        self.set_rtc_ms(self.rtc_ms() + due)
+        self.applied_ms += due
+        self.corrections += 1
+        self.corrected_ms += due
+        return due
+
+    def run(self, is_connected=None):
+        """Sync once the network is up, then every RESYNC_S - uasyncio coroutine"""
+        self.running = True
+        if self.correct_timer is None:
+            self.correct_timer = timer_wheel.call_every(
+                NTP_CONFIG.get('CORRECT_INTERVAL_S', 60) * 1000, self.correct, name='rtc_drift')
+        while True:
+            if is_connected and not is_connected():
+                yield from asyncio.sleep_ms(1000)
+                continue
+            ok = yield from self.sync()
+            yield from asyncio.sleep_ms((self.resync_s if ok else self.retry_s) * 1000)
+
+    def get_status(self):
+        """Get time sync statistics"""
+        return {
+            'synced': self.synced,
+            'server': self.server,
+            'syncs': self.syncs,
+            'failures': self.failures,
+            'last_offset_ms': self.last_offset_ms,
+            'last_delay_ms': self.last_delay_ms,
+            'max_offset_ms': self.max_offset_ms,
+            'drift_ppm': round(self.drift_ppm, 1) if self.drift_ppm is not None else None,
+            'corrections': self.corrections,
+            'corrected_ms': self.corrected_ms,
+            'since_sync_s': utime.time() - self.last_sync_time if self.last_sync_time is not None else None
+        }
+
+# Shared instance - main starts run() once Wi-Fi is configured
+time_sync = TimeSync()
@@ -0,0 +1,168 @@
+# Timelapse Recording Module for ESP32-WROVER Smart Home
+# Periodic reduced-size captures appended to the photo log, with a storage quota
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+import gc
+from camera_settings import camera_store
+from photo_log import KIND_TIMELAPSE, E_ID, E_REF, E_TIME
+from timer_wheel import timer_wheel
+
+# Import configuration
+try:
+    from config import TIMELAPSE_CONFIG
+except ImportError:
+    # Fallback if config not available
+    TIMELAPSE_CONFIG = {
+        'INTERVAL_S': 60,
+        'PROFILE': 'timelapse',
+        'QUOTA_BYTES': 256 * 1024,
+        'PLAYBACK_FPS': 10,
+        'REUSE_MAX_AGE_MS': 2000
+    }
+
+class TimelapseRecorder:
+    """Captures a frame every interval into the photo log"""
+
+    def __init__(self, photo_log, frame_cache):
+        self.photo_log = photo_log
+        self.frame_cache = frame_cache
+
+        self.interval_s = TIMELAPSE_CONFIG['INTERVAL_S']
+        self.profile = TIMELAPSE_CONFIG['PROFILE']
+        self.quota_bytes = TIMELAPSE_CONFIG['QUOTA_BYTES']
+        self.reuse_max_age_ms = TIMELAPSE_CONFIG['REUSE_MAX_AGE_MS']
+        self.playback_fps = TIMELAPSE_CONFIG['PLAYBACK_FPS']
+
+        self.running = False
+        self.session_id = 0
+        self.frames_captured = 0
+        self.shared_frames = 0
+        self.last_capture = 0
+        self.timer = None
+        self.quota_reached = False
+        self.bytes_used = photo_log.bytes_used(KIND_TIMELAPSE) if photo_log else 0
+
+        print(f"Timelapse recorder ready - {self.bytes_used}/{self.quota_bytes} bytes used")
+
+    def start(self, interval_s=None):
+        """Start a new timelapse session"""
+        if not self.photo_log:
+            return False
+        if interval_s:
+            self.interval_s = max(1, int(interval_s))
+        self.bytes_used = self.photo_log.bytes_used(KIND_TIMELAPSE)
+        if self.bytes_used >= self.quota_bytes:
+            self.quota_reached = True
+            print("⚠️ Timelapse quota reached - not starting")
+            return False
+
+        self.running = True
+        self.quota_reached = False
+        self.session_id = 0
+        self.frames_captured = 0
+        self.last_capture = utime.ticks_add(utime.ticks_ms(), -self.interval_s * 1000)
+        timer_wheel.cancel(self.timer)
+        self.timer = timer_wheel.call_every(self.interval_s * 1000, self.tick,
+                                            name='timelapse', first_ms=0)
+        print(f"🎞️ Timelapse started (every {self.interval_s}s)")
+        return True
+
+    def stop(self):
+        """Stop the current session"""
+        timer_wheel.cancel(self.timer)
+        self.timer = None
+        if self.running:
+            self.running = False
+            print(f"🎞️ Timelapse stopped ({self.frames_captured} frames)")
+
+    def tick(self):
+        """Capture the next frame (runs every interval from the timer wheel)"""
+        if not self.running:
+            return False
+        self.last_capture = utime.ticks_ms()
+        return self.capture_frame()
+
+    def capture_frame(self):
+        """Grab one frame, reusing the live stream frame when there is one"""
+        frame = None
+        if self.frame_cache:
+            if self.frame_cache.is_streaming():
+                frame = self.frame_cache.get_frame()
+            else:
+                frame = self.frame_cache.peek(self.reuse_max_age_ms)
+            if frame:
+                self.shared_frames += 1
+
+        if frame is None:
+            frame = self._reduced_capture()
+        if not frame:
+            return False
+
+        if self.bytes_used + len(frame) > self.quota_bytes:
+            self.quota_reached = True
+            self.stop()
+            print("⚠️ Timelapse quota reached - recording stopped")
+            return False
+
+        try:
+            photo_id = self.photo_log.append(frame, KIND_TIMELAPSE, self.session_id)
+        except Exception as e:
+            print(f"Timelapse save error: {e}")
+            return False
+
+        # The first frame's id names the session
+        if not self.session_id:
+            self.session_id = photo_id
+        self.bytes_used += len(frame)
+        self.frames_captured += 1
+        del frame
+        gc.collect()
+        return True
+
+    def _reduced_capture(self):
+        """Capture with the timelapse profile, then switch back"""
+        try:
+            return camera_store.capture(self.profile)
+        except Exception as e:
+            print(f"Timelapse capture error: {e}")
+            return None
+
+    def sessions(self):
+        """List sessions (newest first) as dicts"""
+        result = []
+        counts = {}
+        for entry in self.photo_log.entries(KIND_TIMELAPSE, newest_first=False):
+            head = entry[E_REF] or entry[E_ID]
+            counts[head] = counts.get(head, 0) + 1
+            if not entry[E_REF]:
+                result.append({'id': entry[E_ID], 'started': entry[E_TIME]})
+        # Sessions whose head frame was reclaimed are dropped
+        for session in result:
+            session['frames'] = counts.get(session['id'], 0)
+        result.reverse()
+        return result
+
+    def session_frames(self, session_id=None):
+        """Entry tuples of one session in capture order (latest session by default)"""
+        frames = self.photo_log.entries(KIND_TIMELAPSE, newest_first=False)
+        if session_id is None:
+            session_id = 0
+            for entry in frames:
+                if not entry[E_REF]:
+                    session_id = entry[E_ID]
+        return [e for e in frames if e[E_ID] == session_id or e[E_REF] == session_id]
+
+    def get_status(self):
+        """Get timelapse status"""
+        return {
+            'running': self.running,
+            'interval_s': self.interval_s,
+            'session_id': self.session_id,
+            'frames_captured': self.frames_captured,
+            'shared_frames': self.shared_frames,
+            'bytes_used': self.bytes_used,
+            'quota_bytes': self.quota_bytes,
+            'quota_reached': self.quota_reached
+        }
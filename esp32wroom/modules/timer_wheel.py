@@ -0,0 +1,306 @@
+# Timer Wheel for ESP32-WROVER Smart Home
+# Hashed timing wheel for one-shot and periodic jobs with ms deadlines
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+from boot_orchestrator import GENERATOR
+
+# Import configuration
+try:
+    from config import TIMER_CONFIG
+except ImportError:
+    # Fallback if config not available
+    TIMER_CONFIG = {
+        'TICK_SHIFT': 3,
+        'SLOTS': 64,
+        'MAX_SLEEP_MS': 500
+    }
+
+class Timer:
+    """A scheduled job; keep it to cancel the job later"""
+
+    def __init__(self, callback, deadline, period_ms=0, name=None):
+        self.callback = callback
+        self.deadline = deadline  # ticks_ms
+        self.period_ms = period_ms
+        self.name = name or 'timer'
+        self.active = True
+        self.slot = -1  # Bucket index; -1 while not in the wheel (due or stopped)
+        self.runs = 0
+        self.overruns = 0  # Periodic deadlines skipped because the loop was late
+        self.max_late_ms = 0
+        self.max_run_us = 0
+
+class TimerWheel:
+    """Timers hashed into 2^TICK_SHIFT ms buckets by deadline
+
+    Each bucket holds the timers whose deadline falls on that tick in any
+    rotation; firing compares the exact deadline, so resolution is 1 ms. An
+    advance only visits the buckets between the last advance and now (at
+    most one rotation), so the cost per tick is constant. The earliest
+    deadline is cached and only rescanned after that timer fired or was
+    cancelled, which lets the loop sleep exactly until the next job.
+    """
+
+    def __init__(self, tick_shift=None, slots=None):
+        self.shift = tick_shift if tick_shift is not None else TIMER_CONFIG.get('TICK_SHIFT', 3)
+        self.slots = slots or TIMER_CONFIG.get('SLOTS', 64)  # Power of two
+        self.mask = self.slots - 1
+        self.max_sleep_ms = TIMER_CONFIG.get('MAX_SLEEP_MS', 500)
+        self.wheel = [[] for _ in range(self.slots)]
+        self.cursor = utime.ticks_ms()  # Everything due up to here has fired
+        self.count = 0
+        self.next_deadline = None
+        self.next_dirty = False
+        self.due = []  # Reused between advances
+        self.running = False
+        self.advancing = False
+        self.sleep_until = None  # When run() wakes next
+        self.waker = None        # Id and deadline of the pending extra wake-up
+        self.waker_at = None
+
+        # Statistics
+        self.fired = 0
+        self.errors = 0
+        self.advances = 0
+        self.buckets_visited = 0
+        self.rescans = 0
+        self.total_sleep_ms = 0
+        self.wakers = 0
+
+    def _insert(self, timer):
+        timer.slot = (timer.deadline >> self.shift) & self.mask
+        self.wheel[timer.slot].append(timer)
+        self.count += 1
+        if not self.next_dirty and (self.next_deadline is None or
+                                    utime.ticks_diff(timer.deadline, self.next_deadline) < 0):
+            self.next_deadline = timer.deadline
+        # Added by another task while every sleeper wakes too late; during an
+        # advance the advancing task picks the new deadline up itself
+        if self.running and not self.advancing and self._later(timer.deadline):
+            self._start_waker(timer.deadline)
+
+    def call_at(self, deadline, callback, period_ms=0, name=None):
+        """Run callback() at a ticks_ms deadline; returns the Timer"""
+        now = utime.ticks_ms()
+        if utime.ticks_diff(deadline, now) < 0:
+            deadline = now
+        timer = Timer(callback, deadline, period_ms, name)
+        self._insert(timer)
+        return timer
+
+    def call_later(self, delay_ms, callback, name=None):
+        """Run callback() once after delay_ms"""
+        return self.call_at(utime.ticks_add(utime.ticks_ms(), delay_ms), callback, 0, name)
+
+    def call_every(self, period_ms, callback, name=None, first_ms=None):
+        """Run callback() every period_ms (first run after first_ms, default one period)"""
+        delay = period_ms if first_ms is None else first_ms
+        return self.call_at(utime.ticks_add(utime.ticks_ms(), delay), callback, period_ms, name)
+
+    def cancel(self, timer):
+        """Stop a timer; safe to call on one that already fired or was cancelled
+
+        A timer already taken out of the wheel by the running advance (due
+        in the same batch) is only marked inactive, so _fire skips it.
+        """
+        if timer is None or not timer.active:
+            return False
+        timer.active = False
+        if timer.slot >= 0:
+            self.wheel[timer.slot].remove(timer)
+            timer.slot = -1
+            self.count -= 1
+        if timer.deadline == self.next_deadline:
+            self.next_dirty = True
+        return True
+
+    def reschedule(self, timer, delay_ms):
+        """Move a timer to now + delay_ms, re-activating it if needed
+
+        If it is due in the running advance, that pending run is dropped
+        (the timer is back in a bucket) and it fires at the new deadline only.
+        """
+        self.cancel(timer)
+        timer.active = True
+        timer.deadline = utime.ticks_add(utime.ticks_ms(), delay_ms)
+        self._insert(timer)
+        return timer
+
+    def advance(self, now=None):
+        """Fire every timer due by now; returns how many ran"""
+        if now is None:
+            now = utime.ticks_ms()
+        # Buckets crossed, counted from the start of the cursor's bucket
+        offset = self.cursor & ((1 << self.shift) - 1)
+        elapsed_ticks = (utime.ticks_diff(now, self.cursor) + offset) >> self.shift
+        visits = min(elapsed_ticks + 1, self.slots)
+        slot = (self.cursor >> self.shift) & self.mask
+        due = self.due
+        for i in range(visits):
+            bucket = self.wheel[(slot + i) & self.mask]
+            j = 0
+            while j < len(bucket):
+                timer = bucket[j]
+                if utime.ticks_diff(timer.deadline, now) <= 0:
+                    bucket.pop(j)
+                    timer.slot = -1
+                    self.count -= 1
+                    due.append(timer)
+                else:
+                    j += 1
+        self.cursor = now
+        self.advances += 1
+        self.buckets_visited += visits
+        if not due:
+            return 0
+
+        self.next_dirty = True
+        ran = 0
+        self.advancing = True
+        try:
+            for timer in due:
+                if self._fire(timer, now):
+                    ran += 1
+        finally:
+            self.advancing = False
+            del due[:]
+        return ran
+
+    def _fire(self, timer, now):
+        if not timer.active or timer.slot >= 0:
+            return False  # Cancelled or rescheduled by an earlier callback in this batch
+        late = utime.ticks_diff(now, timer.deadline)
+        if late > timer.max_late_ms:
+            timer.max_late_ms = late
+        if timer.period_ms:
+            # Re-arm before running so the callback may cancel it
+            timer.deadline = utime.ticks_add(timer.deadline, timer.period_ms)
+            if utime.ticks_diff(timer.deadline, now) <= 0:
+                timer.overruns += 1
+                timer.deadline = utime.ticks_add(now, timer.period_ms)
+            self._insert(timer)
+        else:
+            timer.active = False
+
+        start = utime.ticks_us()
+        try:
+            result = timer.callback()
+            if isinstance(result, GENERATOR):
+                asyncio.get_event_loop().create_task(result)
+        except Exception as e:
+            self.errors += 1
+            print(f"Timer {timer.name} error: {e}")
+        elapsed = utime.ticks_diff(utime.ticks_us(), start)
+        if elapsed > timer.max_run_us:
+            timer.max_run_us = elapsed
+        timer.runs += 1
+        self.fired += 1
+        return True
+
+    def _rescan(self):
+        self.rescans += 1
+        earliest = None
+        for bucket in self.wheel:
+            for timer in bucket:
+                if earliest is None or utime.ticks_diff(timer.deadline, earliest) < 0:
+                    earliest = timer.deadline
+        self.next_deadline = earliest
+        self.next_dirty = False
+
+    def next_delay(self, now=None):
+        """Milliseconds until the earliest deadline (0 if due, None if idle)"""
+        if self.next_dirty:
+            self._rescan()
+        if self.next_deadline is None:
+            return None
+        if now is None:
+            now = utime.ticks_ms()
+        return max(0, utime.ticks_diff(self.next_deadline, now))
+
+    def _later(self, deadline):
+        """True if no sleeper (run() or a waker) advances by deadline"""
+        if self.sleep_until is None or utime.ticks_diff(deadline, self.sleep_until) >= 0:
+            return False
+        return self.waker is None or utime.ticks_diff(deadline, self.waker_at) < 0
+
+    def _start_waker(self, deadline):
+        self.wakers += 1
+        self.waker = self.wakers
+        self.waker_at = deadline
+        asyncio.get_event_loop().create_task(self._wake(deadline, self.wakers))
+
+    def _wake(self, deadline, waker):
+        """Advance at a deadline earlier than run()'s sleep - uasyncio coroutine
+
+        Keeps going while the next deadline still comes before run() wakes,
+        unless a newer waker took over (that one then covers it).
+        """
+        while True:
+            yield from asyncio.sleep_ms(max(0, utime.ticks_diff(deadline, utime.ticks_ms())))
+            self.advance()
+            if self.waker == waker:
+                self.waker = None
+            delay = self.next_delay()
+            if delay is None:
+                return
+            deadline = utime.ticks_add(utime.ticks_ms(), delay)
+            if not self._later(deadline):
+                return
+            self.waker = waker
+            self.waker_at = deadline
+
+    def run(self):
+        """Fire timers and sleep until the next deadline - uasyncio coroutine
+
+        Sleeps are capped at MAX_SLEEP_MS. A timer added by another task
+        (e.g. a web request) with an earlier deadline than the current sleep
+        starts a short-lived waker task, so it is not held up behind it.
+        """
+        self.running = True
+        while True:
+            self.advance()
+            delay = self.next_delay()
+            if delay is None or delay > self.max_sleep_ms:
+                delay = self.max_sleep_ms
+            self.sleep_until = utime.ticks_add(utime.ticks_ms(), delay)
+            self.total_sleep_ms += delay
+            yield from asyncio.sleep_ms(delay)
+
+    def get_stats(self):
+        """Get timer wheel statistics"""
+        timers = []
+        for bucket in self.wheel:
+            for timer in bucket:
+                timers.append({
+                    'name': timer.name,
+                    'in_ms': utime.ticks_diff(timer.deadline, utime.ticks_ms()),
+                    'period_ms': timer.period_ms,
+                    'runs': timer.runs,
+                    'overruns': timer.overruns,
+                    'max_late_ms': timer.max_late_ms,
+                    'max_run_us': timer.max_run_us
+                })
+        return {
+            'running': self.running,
+            'tick_ms': 1 << self.shift,
+            'slots': self.slots,
+            'timers': self.count,
+            'next_ms': self.next_delay(),
+            'fired': self.fired,
+            'errors': self.errors,
+            'advances': self.advances,
+            'avg_buckets_per_advance': self.buckets_visited // self.advances if self.advances else 0,
+            'rescans': self.rescans,
+            'sleep_ms': self.total_sleep_ms,
+            'wakers': self.wakers,
+            'jobs': timers
+        }
+
+# Shared instance - modules schedule their deadlines here
+timer_wheel = TimerWheel()
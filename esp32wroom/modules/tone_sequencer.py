@@ -0,0 +1,235 @@
+# Tone Sequencer for ESP32-WROVER Smart Home
+# Plays note lists from timer wheel callbacks so audio never blocks a request
+
+import sys
+sys.path.append('..')  # To access config
+from timer_wheel import timer_wheel
+
+# Import configuration
+try:
+    from config import AUDIO_CONFIG
+except ImportError:
+    # Fallback if config not available
+    AUDIO_CONFIG = {
+        'QUEUE_SIZE': 4,
+        'NOTE_GAP_MS': 50
+    }
+
+class Sequence:
+    """A queued note list: (frequency Hz, duration ms[, volume]) tuples, 0 Hz rests"""
+
+    def __init__(self, seq_id, notes, name, gap_ms, on_done, priority, output, resume):
+        self.id = seq_id
+        self.notes = notes
+        self.name = name
+        self.gap_ms = gap_ms
+        self.on_done = on_done
+        self.priority = priority
+        self.output = output  # (start, stop)
+        self.resume = resume  # Continue after being preempted (else dropped)
+        self.index = 0
+        self.duration_ms = sum(note[1] for note in notes) + gap_ms * max(0, len(notes) - 1)
+
+class ToneSequencer:
+    """Priority queue of note lists played one step per timer_wheel deadline
+
+    A sequence's output is a (start(frequency, volume), stop()) pair, so one
+    sequencer can drive several tone devices, one sound at a time. play()
+    returns at once; each note end is a one-shot timer that starts the next
+    note (or the gap after it). A higher priority sequence preempts the one
+    playing, which resumes from its current note afterwards unless it was
+    queued with resume=False. cancel() silences the output immediately.
+    """
+
+    def __init__(self, start=None, stop=None, on_state=None, queue_size=None):
+        self.output = (start, stop)  # Default output
+        self.on_state = on_state     # on_state(playing) - e.g. a status LED
+        self.queue_size = queue_size or AUDIO_CONFIG.get('QUEUE_SIZE', 4)
+        self.default_gap_ms = AUDIO_CONFIG.get('NOTE_GAP_MS', 50)
+        self.queue = []  # Highest priority first, FIFO within a priority
+        self.current = None
+        self.in_gap = False
+        self.timer = None
+        self.next_id = 1
+
+        # Statistics
+        self.played = 0
+        self.cancelled = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.preempted = 0
+
+    def play(self, notes, name=None, gap_ms=None, replace=False, on_done=None,
+             priority=0, output=None, resume=True):
+        """Queue notes; returns the sequence id, or None if it was dropped
+
+        A request with the same name and notes as a queued one is coalesced
+        into that entry. replace=True instead drops queued sequences with the
+        same name and restarts a playing one, so repeated requests (volume
+        slider) do not pile up. A full queue makes room only for a higher
+        priority.
+        """
+        if not notes:
+            return None
+        if name and replace:
+            for seq in self.queue[:]:
+                if seq.name == name:
+                    self.queue.remove(seq)
+                    self.coalesced += 1
+            if self.current and self.current.name == name:
+                self.coalesced += 1
+                self._finish(completed=False)
+        elif name:
+            for seq in self.queue:
+                if seq.name == name and list(seq.notes) == list(notes):
+                    self.coalesced += 1
+                    return seq.id
+        if len(self.queue) >= self.queue_size:
+            if self.queue[-1].priority >= priority:
+                self.dropped += 1
+                return None
+            self._drop(self.queue.pop())
+        seq = Sequence(self.next_id, notes, name or 'tones',
+                       self.default_gap_ms if gap_ms is None else gap_ms,
+                       on_done, priority, output or self.output, resume)
+        self.next_id += 1
+        self._enqueue(seq)
+        if self.current is None:
+            self._next_sequence()
+        elif priority > self.current.priority:
+            self._preempt()
+        return seq.id
+
+    def _enqueue(self, seq, front=False):
+        """Insert behind equal priorities, or ahead of them when front=True"""
+        index = 0
+        for queued in self.queue:
+            if queued.priority < seq.priority or (front and queued.priority == seq.priority):
+                break
+            index += 1
+        self.queue.insert(index, seq)
+
+    def _preempt(self):
+        seq = self.current
+        timer_wheel.cancel(self.timer)
+        self.timer = None
+        seq.output[1]()
+        self.current = None
+        self.preempted += 1
+        if seq.resume:
+            self._enqueue(seq, front=True)  # Picks up at the interrupted note
+        else:
+            self._drop(seq)
+        self._next_sequence()
+
+    def _drop(self, seq):
+        self.dropped += 1
+        self._notify(seq, False)
+
+    def _notify(self, seq, completed):
+        if seq.on_done:
+            try:
+                seq.on_done(completed)
+            except Exception as e:
+                print(f"Sequence {seq.name} callback error: {e}")
+
+    def _next_sequence(self):
+        if not self.queue:
+            if self.on_state:
+                self.on_state(False)
+            return
+        was_idle = self.current is None
+        self.current = self.queue.pop(0)
+        if was_idle and self.on_state:
+            self.on_state(True)
+        self._play_note()
+
+    def _play_note(self):
+        seq = self.current
+        note = seq.notes[seq.index]
+        self.in_gap = False
+        if note[0] > 0:
+            seq.output[0](note[0], note[2] if len(note) > 2 else None)
+        else:
+            seq.output[1]()
+        self.timer = timer_wheel.call_later(note[1], self._step, name='tone')
+
+    def _step(self):
+        """Timer callback: end of a note or of the gap after it"""
+        self.timer = None
+        seq = self.current
+        if seq is None:
+            return
+        if not self.in_gap:
+            seq.index += 1
+            if seq.index >= len(seq.notes):
+                self._finish(completed=True)
+                return
+            if seq.gap_ms:
+                seq.output[1]()
+                self.in_gap = True
+                self.timer = timer_wheel.call_later(seq.gap_ms, self._step, name='tone')
+                return
+        self._play_note()
+
+    def _finish(self, completed):
+        timer_wheel.cancel(self.timer)
+        self.timer = None
+        seq = self.current
+        seq.output[1]()
+        self.current = None
+        if completed:
+            self.played += 1
+        else:
+            self.cancelled += 1
+        self._notify(seq, completed)
+        self._next_sequence()
+
+    def cancel(self, seq_id=None, up_to=None):
+        """Stop one sequence (queued or playing), those of priority <= up_to, or everything
+
+        Returns False when the given sequence was not found.
+        """
+        found = False
+        for seq in self.queue[:]:
+            if (seq_id is None and (up_to is None or seq.priority <= up_to)) or seq.id == seq_id:
+                self.queue.remove(seq)
+                self.cancelled += 1
+                self._notify(seq, False)
+                found = True
+        seq = self.current
+        if seq and ((seq_id is None and (up_to is None or seq.priority <= up_to)) or seq.id == seq_id):
+            self._finish(completed=False)
+            found = True
+        return found or seq_id is None
+
+    def is_playing(self):
+        return self.current is not None
+
+    def is_active(self, seq_id):
+        """True while the sequence is playing, preempted or queued"""
+        if self.current and self.current.id == seq_id:
+            return True
+        for seq in self.queue:
+            if seq.id == seq_id:
+                return True
+        return False
+
+    def get_status(self):
+        """Current sequence, queue and statistics"""
+        seq = self.current
+        return {
+            'playing': seq.name if seq else None,
+            'id': seq.id if seq else None,
+            'priority': seq.priority if seq else None,
+            'note': seq.index if seq else None,
+            'notes': len(seq.notes) if seq else None,
+            'duration_ms': seq.duration_ms if seq else None,
+            'queue': [{'id': s.id, 'name': s.name, 'priority': s.priority,
+                       'duration_ms': s.duration_ms} for s in self.queue],
+            'played': self.played,
+            'cancelled': self.cancelled,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'preempted': self.preempted
+        }
@@ -0,0 +1,308 @@
+# Vision Motion Detection Module for ESP32-WROVER Smart Home
+# Block-wise frame differencing on small grayscale frames, fused with the PIR edge
+
+import sys
+sys.path.append('..')  # To access config
+import utime
+import camera
+from camera_settings import camera_store
+from camera_power import camera_power
+from array import array
+
+# ulab is optional - the pure Python path is used when it is missing
+try:
+    from ulab import numpy as np
+    ULAB_AVAILABLE = True
+except ImportError:
+    ULAB_AVAILABLE = False
+
+# Import configuration
+try:
+    from config import VISION_CONFIG
+except ImportError:
+    # Fallback if config not available
+    VISION_CONFIG = {
+        'ENABLED': False,
+        'WIDTH': 96,
+        'HEIGHT': 96,
+        'BLOCK_SIZE': 8,
+        'SAMPLE_INTERVAL_MS': 500,
+        'TIME_BUDGET_MS': 30,
+        'PIXEL_STRIDE': 2,
+        'LEARN_SHIFT': 3,
+        'BLOCK_THRESHOLD': 12,
+        'FULL_CONFIDENCE_FRACTION': 0.2,
+        'ZONES': [],
+        'PIR_WEIGHT': 0.4,
+        'VISION_WEIGHT': 0.6,
+        'FUSION_THRESHOLD': 0.5
+    }
+
+BG_SHIFT = 4  # Background is kept as fixed point (value << BG_SHIFT)
+
+class FrameDiffDetector:
+    """Running-average background model with per-block difference scores"""
+
+    def __init__(self, width=None, height=None, block_size=None, zones=None,
+                 time_budget_ms=None, use_ulab=None):
+        cfg = VISION_CONFIG
+        self.width = width or cfg['WIDTH']
+        self.height = height or cfg['HEIGHT']
+        self.block_size = block_size or cfg['BLOCK_SIZE']
+        self.time_budget_ms = time_budget_ms or cfg['TIME_BUDGET_MS']
+        self.stride = cfg['PIXEL_STRIDE']
+        self.learn_shift = cfg['LEARN_SHIFT']
+        self.block_threshold = cfg['BLOCK_THRESHOLD']
+        self.full_fraction = cfg['FULL_CONFIDENCE_FRACTION']
+        if use_ulab is None:
+            use_ulab = ULAB_AVAILABLE
+        self.use_ulab = use_ulab
+
+        self.cols = self.width // self.block_size
+        self.rows = self.height // self.block_size
+        self.num_blocks = self.cols * self.rows
+
+        # Preallocated state
+        self.background = None
+        self.block_scores = array('H', [0] * self.num_blocks)
+        self.next_block = 0  # Round-robin position when the budget runs out
+        self.zones = self._compile_zones(zones if zones is not None else cfg['ZONES'])
+
+        # Results and statistics
+        self.confidence = 0.0
+        self.zone_confidence = {}
+        self.frames_processed = 0
+        self.last_process_ms = 0
+        self.max_process_ms = 0
+        self.budget_overruns = 0
+
+    def _compile_zones(self, zones):
+        """Turn fractional zone rectangles into block index lists"""
+        if not zones:
+            zones = [{'name': 'all', 'rect': (0.0, 0.0, 1.0, 1.0), 'weight': 1.0}]
+
+        compiled = []
+        for zone in zones:
+            x, y, w, h = zone['rect']
+            c0 = int(x * self.cols)
+            r0 = int(y * self.rows)
+            c1 = max(c0 + 1, int((x + w) * self.cols + 0.5))
+            r1 = max(r0 + 1, int((y + h) * self.rows + 0.5))
+            blocks = []
+            for r in range(r0, min(r1, self.rows)):
+                for c in range(c0, min(c1, self.cols)):
+                    blocks.append(r * self.cols + c)
+            compiled.append((zone['name'], zone.get('weight', 1.0), blocks))
+        return compiled
+
+    def reset(self):
+        """Forget the background model"""
+        self.background = None
+        self.next_block = 0
+        self.confidence = 0.0
+        for i in range(self.num_blocks):
+            self.block_scores[i] = 0
+
+    def process(self, frame):
+        """Feed one grayscale frame (width*height bytes); returns confidence 0..1"""
+        if len(frame) < self.width * self.height:
+            return self.confidence
+
+        start = utime.ticks_ms()
+
+        if self.background is None:
+            self._init_background(frame)
+            return 0.0
+
+        if self.use_ulab:
+            try:
+                self._process_ulab(frame)
+            except Exception as e:
+                print(f"ulab path failed, using pure Python: {e}")
+                self.use_ulab = False
+                self._init_background(frame)
+                return 0.0
+        else:
+            self._process_blocks(frame, start)
+
+        elapsed = utime.ticks_diff(utime.ticks_ms(), start)
+        self.last_process_ms = elapsed
+        if elapsed > self.max_process_ms:
+            self.max_process_ms = elapsed
+        self.frames_processed += 1
+
+        self.confidence = self._score_zones()
+        return self.confidence
+
+    def _init_background(self, frame):
+        if self.use_ulab:
+            self.background = np.array(frame[:self.width * self.height], dtype=np.float)
+        else:
+            self.background = array('H', [0] * (self.width * self.height))
+            bg = self.background
+            for i in range(self.width * self.height):
+                bg[i] = frame[i] << BG_SHIFT
+
+    def _process_blocks(self, frame, start):
+        """Pure Python path - scores blocks round-robin until the time budget is spent"""
+        done = 0
+        i = self.next_block
+        while done < self.num_blocks:
+            self.block_scores[i] = self._score_block(frame, i)
+            i += 1
+            if i == self.num_blocks:
+                i = 0
+            done += 1
+            if utime.ticks_diff(utime.ticks_ms(), start) >= self.time_budget_ms:
+                break
+        if done < self.num_blocks:
+            self.budget_overruns += 1
+        self.next_block = i
+
+    def _score_block(self, frame, index):
+        """Mean absolute difference of one block, updating its background"""
+        bs = self.block_size
+        step = self.stride
+        w = self.width
+        shift = self.learn_shift
+        bg = self.background
+        x0 = (index % self.cols) * bs
+        y0 = (index // self.cols) * bs
+
+        total = 0
+        count = 0
+        for y in range(y0, y0 + bs, step):
+            row = y * w + x0
+            for p in range(row, row + bs, step):
+                value = frame[p] << BG_SHIFT
+                ref = bg[p]
+                diff = value - ref
+                bg[p] = ref + (diff >> shift)
+                total += diff if diff > 0 else -diff
+                count += 1
+        return (total >> BG_SHIFT) // count
+
+    def _process_ulab(self, frame):
+        """Vectorized path - whole frame per call"""
+        bs = self.block_size
+        current = np.array(frame[:self.width * self.height], dtype=np.float)
+        diff = abs(current - self.background)
+        self.background = self.background + (current - self.background) / (1 << self.learn_shift)
+
+        # Sum each row segment of block width, then each column of block height
+        rows = diff.reshape((self.height * self.cols, bs))
+        partial = np.sum(rows, axis=1).reshape((self.rows, bs * self.cols))
+        area = bs * bs
+        for r in range(self.rows):
+            line = partial[r]
+            for c in range(self.cols):
+                total = 0
+                for k in range(bs):
+                    total += line[k * self.cols + c]
+                self.block_scores[r * self.cols + c] = int(total / area)
+
+    def _score_zones(self):
+        """Fraction of changed blocks per zone, scaled to a 0..1 confidence"""
+        best = 0.0
+        threshold = self.block_threshold
+        scores = self.block_scores
+        for name, weight, blocks in self.zones:
+            changed = 0
+            for b in blocks:
+                if scores[b] >= threshold:
+                    changed += 1
+            full = max(1, int(len(blocks) * self.full_fraction))
+            confidence = min(1.0, changed / full) * weight
+            self.zone_confidence[name] = confidence
+            if confidence > best:
+                best = confidence
+        return min(1.0, best)
+
+    def get_stats(self):
+        """Get detector statistics"""
+        return {
+            'confidence': self.confidence,
+            'zones': self.zone_confidence,
+            'frames_processed': self.frames_processed,
+            'last_process_ms': self.last_process_ms,
+            'max_process_ms': self.max_process_ms,
+            'budget_overruns': self.budget_overruns,
+            'time_budget_ms': self.time_budget_ms,
+            'blocks': self.num_blocks,
+            'ulab': self.use_ulab
+        }
+
+def camera_gray_source():
+    """Grab a small grayscale frame, or None if the camera firmware can't switch formats"""
+    if not hasattr(camera, 'GRAYSCALE') or not hasattr(camera, 'pixformat'):
+        return None
+    if not camera_power.ensure_on():
+        return None
+    try:
+        camera.pixformat(camera.GRAYSCALE)
+        camera.framesize(camera.FRAME_96X96)
+        return camera.capture()
+    finally:
+        camera.pixformat(camera.JPEG)
+        camera_store.mark_changed('resolution')
+        camera_store.apply()
+
+def fuse_confidence(pir_edge, vision_confidence):
+    """Combine a PIR edge (0/1) with a vision confidence into one score"""
+    if vision_confidence is None:
+        return 1.0 if pir_edge else 0.0
+    score = VISION_CONFIG['PIR_WEIGHT'] * (1 if pir_edge else 0)
+    score += VISION_CONFIG['VISION_WEIGHT'] * vision_confidence
+    return min(1.0, score)
+
+class VisionMotionSampler:
+    """Samples frames at a modest rate and keeps the detector up to date"""
+
+    def __init__(self, detector=None, source=None, interval_ms=None, frame_cache=None):
+        self.detector = detector or FrameDiffDetector()
+        self.source = source or camera_gray_source
+        self.interval_ms = interval_ms or VISION_CONFIG['SAMPLE_INTERVAL_MS']
+        self.frame_cache = frame_cache
+        self.last_sample = utime.ticks_ms()
+        self.available = True
+
+    def tick(self):
+        """Sample and process a frame if the interval has elapsed"""
+        if not self.available:
+            return None
+        # Format switching would break an active JPEG stream
+        if self.frame_cache and self.frame_cache.is_streaming():
+            return self.detector.confidence
+
+        now = utime.ticks_ms()
+        if utime.ticks_diff(now, self.last_sample) < self.interval_ms:
+            return self.detector.confidence
+        self.last_sample = now
+
+        try:
+            frame = self.source()
+        except Exception as e:
+            print(f"Vision sample error: {e}")
+            frame = None
+
+        if frame is None:
+            print("⚠️ Grayscale capture not supported - vision motion disabled")
+            self.available = False
+            return None
+
+        return self.detector.process(frame)
+
+    def confidence(self):
+        """Latest vision confidence, or None when vision is unavailable"""
+        return self.detector.confidence if self.available else None
+
+    def fuse(self, pir_edge):
+        """Fused PIR + vision confidence"""
+        return fuse_confidence(pir_edge, self.confidence())
+
+    def get_stats(self):
+        """Get sampler statistics"""
+        stats = self.detector.get_stats()
+        stats['available'] = self.available
+        stats['interval_ms'] = self.interval_ms
+        return stats
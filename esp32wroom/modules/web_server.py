@@ -2,11 +2,32 @@
 # Handles all web routes, templates, and HTTP functionality
 
 import picoweb
+import ure as re
 import utime
-import camera
+import uos
 import gc
 import json
-import network
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+from frame_cache import frame_cache
+from camera_settings import camera_store
+from camera_power import camera_power
+from network_manager import network_manager
+from event_bus import event_bus
+from timer_wheel import timer_wheel
+from time_sync import time_sync
+from sound_manager import sound_manager, UI
+from http_files import send_file, send_region, send_tar, tar_size, http_date, CACHE_IMMUTABLE
+from photo_log import E_ID, E_TIME, E_CRC
+
+# Import configuration
+try:
+    from config import EVENT_BUS_CONFIG
+except ImportError:
+    # Fallback if config not available
+    EVENT_BUS_CONFIG = {'SSE_MAX_CLIENTS': 2, 'SSE_KEEPALIVE_S': 15}
 
 # Import optimized templates
 try:
@@ -44,16 +65,8 @@ except ImportError:
         return {}
     def safe_api_call(func): return func
 
-# Camera settings (global like main.py)
-camera_settings = {
-    'resolution': camera.FRAME_QVGA,
-    'quality': 15,
-    'brightness': 0,
-    'contrast': 0,
-    'saturation': 0,
-    'flip': 1,
-    'mirror': 1
-}
+# Camera settings (global like main.py) - owned by the persistent store
+camera_settings = camera_store.settings
 
 # Global references to modules
 env_sensor = None
@@ -61,54 +74,53 @@ alarm_system = None
 rgb_strip = None
 motion_detector = None
 pwm_audio = None
+timelapse = None
+boot_orchestrator = None
+module_registry = None
+rules_engine = None
 server_status = {
     'start_time': utime.time(),
     'requests_handled': 0,
     'errors_count': 0
 }
 
-def init_modules(environmental_sensor=None, alarm_sys=None, rgb_controller=None, motion_detector_sys=None, audio_system=None):
+def init_modules(environmental_sensor=None, alarm_sys=None, rgb_controller=None, motion_detector_sys=None, audio_system=None, timelapse_sys=None):
     """Initialize module references"""
-    global env_sensor, alarm_system, rgb_strip, motion_detector, pwm_audio
+    global env_sensor, alarm_system, rgb_strip, motion_detector, pwm_audio, timelapse
     env_sensor = environmental_sensor
     alarm_system = alarm_sys
     rgb_strip = rgb_controller
     motion_detector = motion_detector_sys
     pwm_audio = audio_system
+    timelapse = timelapse_sys
     print("Web server modules initialized")
     print(f"  Motion detector: {'✅' if motion_detector else '❌'}")
     print(f"  PWM audio: {'✅' if pwm_audio else '❌'}")
+    print(f"  Timelapse: {'✅' if timelapse else '❌'}")
+
+def set_boot_orchestrator(orchestrator):
+    """Attach the boot orchestrator so /api/system/boot can report on it"""
+    global boot_orchestrator
+    boot_orchestrator = orchestrator
+
+def set_rules_engine(engine):
+    """Attach the automation rules engine for /api/rules"""
+    global rules_engine
+    rules_engine = engine
+
+def set_module_registry(registry):
+    """Attach the lazy module registry so /api/system/boot can report load costs"""
+    global module_registry
+    module_registry = registry
 
 def apply_camera_settings():
-    """Apply current camera settings"""
-    camera.framesize(camera_settings['resolution'])
-    camera.quality(camera_settings['quality'])
-    camera.brightness(camera_settings['brightness'])
-    camera.contrast(camera_settings['contrast'])
-    camera.saturation(camera_settings['saturation'])
-    camera.flip(camera_settings['flip'])
-    camera.mirror(camera_settings['mirror'])
+    """Apply current camera settings (only registers that changed)"""
+    return camera_store.apply()
 
 def get_network_info():
-    """Get network information for display"""
-    sta_info = "Not connected"
-    ap_info = "Not active"
-    
-    try:
-        sta_if = network.WLAN(network.STA_IF)
-        if sta_if.active() and sta_if.isconnected():
-            sta_info = f"Connected - IP: {sta_if.ifconfig()[0]}"
-    except:
-        pass
-    
-    try:
-        ap_if = network.WLAN(network.AP_IF)
-        if ap_if.active():
-            ap_info = f"Active - IP: {ap_if.ifconfig()[0]}"
-    except:
-        pass
-    
-    return sta_info, ap_info
+    """Get network information for display (cached snapshot, no Wi-Fi driver calls)"""
+    info = network_manager.info
+    return info['sta'], info['ap']
 
 # =============================================================================
 # HTML TEMPLATES (Enhanced with all components)
@@ -521,11 +533,13 @@ MAIN_PAGE = """<!DOCTYPE html>
         }
         
         function viewPhotos() {
-            fetch('/api/photos')
+            fetch('/api/photos?limit=12')
                 .then(response => response.json())
                 .then(data => {
                     if (data.photos) {
-                        document.getElementById('recentPhotos').textContent = 'Fotos recentes: ' + data.photos.join(', ');
+                        document.getElementById('recentPhotos').innerHTML = data.photos.map(p =>
+                            '<a href="' + p.url + '" target="_blank"><img src="' + p.thumb_url + '" width="80" loading="lazy" title="' + p.name + '"></a>'
+                        ).join(' ');
                     }
                 })
                 .catch(error => {
@@ -729,9 +743,9 @@ def stream_page(req, resp):
     yield from resp.awrite(template)
 
 def send_frame():
-    """Camera frame generator (same as main.py)"""
+    """Camera frame generator (shared with motion capture via the frame cache)"""
     try:
-        buf = camera.capture()
+        buf = frame_cache.get_frame()
         if buf:
             yield (b'--frame\r\n'
                    b'Content-Type: image/jpeg\r\n\r\n'
@@ -744,18 +758,22 @@ def send_frame():
 def video_stream(req, resp):
     """Video stream handler (same as main.py)"""
     yield from picoweb.start_response(resp, content_type="multipart/x-mixed-replace; boundary=frame")
-    while True:
-        frame_gen = send_frame()
-        try:
-            frame_data = next(frame_gen)
-            yield from resp.awrite(frame_data)
-            gc.collect()
-            utime.sleep_ms(50)  # ~20 FPS
-        except StopIteration:
-            break
-        except Exception as e:
-            print("Stream error: " + str(e))
-            break
+    frame_cache.stream_started()
+    try:
+        while True:
+            frame_gen = send_frame()
+            try:
+                frame_data = next(frame_gen)
+                yield from resp.awrite(frame_data)
+                gc.collect()
+                yield from asyncio.sleep_ms(50)  # ~20 FPS, other tasks run meanwhile
+            except StopIteration:
+                break
+            except Exception as e:
+                print("Stream error: " + str(e))
+                break
+    finally:
+        frame_cache.stream_stopped()
 
 def settings_handler(req, resp):
     """Settings page handler"""
@@ -764,22 +782,12 @@ def settings_handler(req, resp):
         try:
             yield from req.read_form_data()
             
-            # Update camera settings
-            if 'quality' in req.form:
-                camera_settings['quality'] = int(req.form['quality'])
-            if 'brightness' in req.form:
-                camera_settings['brightness'] = int(req.form['brightness'])
-            if 'contrast' in req.form:
-                camera_settings['contrast'] = int(req.form['contrast'])
-            if 'saturation' in req.form:
-                camera_settings['saturation'] = int(req.form['saturation'])
-            if 'flip' in req.form:
-                camera_settings['flip'] = int(req.form['flip'])
-            if 'mirror' in req.form:
-                camera_settings['mirror'] = int(req.form['mirror'])
-            
-            # Apply settings
-            apply_camera_settings()
+            # Update, apply and persist only what changed
+            changes = {}
+            for name in ('quality', 'brightness', 'contrast', 'saturation', 'flip', 'mirror'):
+                if name in req.form:
+                    changes[name] = req.form[name]
+            camera_store.update(changes)
             
             # Redirect to success
             yield from picoweb.start_response(resp, status="302", headers={"Location": "/settings?saved=1"})
@@ -807,14 +815,8 @@ def settings_handler(req, resp):
 def capture_handler(req, resp):
     """Photo capture handler (same as main.py)"""
     try:
-        # Temporarily set high quality for photo
-        old_quality = camera_settings['quality']
-        camera.quality(10)  # Best quality
-        
-        buf = camera.capture()
-        
-        # Restore original quality
-        camera.quality(old_quality)
+        # High quality snapshot, then back to the stream profile
+        buf = camera_store.capture('snapshot')
         
         if buf:
             yield from picoweb.start_response(resp, content_type="image/jpeg", 
@@ -976,25 +978,53 @@ def api_alarm(req, resp):
             else:
                 yield from error_response(resp, "Alarm arming not supported")
         elif action == 'test_buzzer':
-            if hasattr(alarm_system, 'passive_buzzer'):
-                alarm_system.passive_buzzer.beep(1000, 500)
-                yield from success_response(resp, "Buzzer test completed")
+            if hasattr(alarm_system, 'play_pattern'):
+                alarm_system.play_pattern(((1000, 500),), name='buzzer_test', priority=UI, device='buzzer')
+                yield from success_response(resp, "Buzzer test started")
             else:
                 yield from error_response(resp, "Buzzer not available")
         elif action == 'test_led':
             if hasattr(alarm_system, 'status_led'):
                 alarm_system.status_led.on()
-                utime.sleep_ms(500)
+                yield from asyncio.sleep_ms(500)
                 alarm_system.status_led.off()
                 yield from success_response(resp, "LED test completed")
             else:
                 yield from error_response(resp, "Status LED not available")
         elif action == 'panic':
             if hasattr(alarm_system, 'normal_alarm_sequence'):
-                alarm_system.normal_alarm_sequence()
+                alarm_system.normal_alarm_sequence()  # Runs as a task; all_clear stops it
                 yield from success_response(resp, "Panic alarm triggered")
             else:
                 yield from error_response(resp, "Panic function not available")
+        elif action == 'add':
+            if hasattr(alarm_system, 'add_alarm'):
+                try:
+                    alarm_id = alarm_system.add_alarm(int(data.get('hour', -1)), int(data.get('minute', -1)),
+                                                      data.get('days', 'daily'), data.get('type'), data.get('label'))
+                except (TypeError, ValueError) as e:
+                    yield from error_response(resp, f"Invalid alarm: {e}", "400")
+                    return
+                if alarm_id:
+                    yield from success_response(resp, f"Alarm {alarm_id} added", {"id": alarm_id})
+                else:
+                    yield from error_response(resp, "Invalid time or too many alarms", "400")
+            else:
+                yield from error_response(resp, "Alarm schedule not available")
+        elif action in ('remove', 'enable', 'disable'):
+            try:
+                alarm_id = int(data.get('id', 0))
+            except (TypeError, ValueError):
+                yield from error_response(resp, "Invalid alarm id", "400")
+                return
+            if action == 'remove':
+                done = alarm_system.remove_alarm(alarm_id)
+            else:
+                done = alarm_system.enable_alarm(alarm_id, action == 'enable')
+            if done:
+                yield from success_response(resp, f"Alarm {alarm_id} {action}d")
+            else:
+                yield from error_response(resp, f"No alarm {alarm_id}", "404")
         elif action == 'all_clear':
             if hasattr(alarm_system, 'stop_alarm'):
                 alarm_system.stop_alarm()
@@ -1012,16 +1042,32 @@ def api_alarm(req, resp):
                 "status": "active",
                 "available": True
             }
+            if hasattr(alarm_system, 'scheduler'):
+                data["alarms"] = alarm_system.scheduler.get_schedule()
+                data["scheduler"] = alarm_system.scheduler.get_stats()
         else:
             data = {"error": "Alarm system not available", "available": False}
         
         yield from json_response(resp, data)
 
 def api_camera(req, resp):
-    """Camera API endpoint"""
+    """Camera API endpoint (?benchmark=1&rounds=1-10 times every profile switch)"""
     try:
+        try:
+            benchmark, rounds = query_ints(req, 'benchmark', 'rounds')
+        except ValueError:
+            yield from error_response(resp, "benchmark and rounds must be integers", "400")
+            return
+        if benchmark == 1:
+            # Switching profiles would corrupt the frames of an open stream
+            if frame_cache.is_streaming():
+                yield from error_response(resp, "Camera is streaming", "409")
+                return
+            camera_store.benchmark(max(1, min(10, rounds or 3)))
         data = {
             "settings": camera_settings,
+            "store": camera_store.get_info(),
+            "power": camera_power.get_status(),
             "status": "active"
         }
         yield from picoweb.start_response(resp, content_type="application/json")
@@ -1039,7 +1085,12 @@ def api_system(req, resp):
             "uptime": utime.time() - server_status['start_time'],
             "free_memory": gc.mem_free(),
             "requests_handled": server_status['requests_handled'],
-            "errors_count": server_status['errors_count']
+            "errors_count": server_status['errors_count'],
+            "network": network_manager.get_status(),
+            "events": event_bus.get_stats(),
+            "timers": timer_wheel.get_stats(),
+            "time": time_sync.get_status(),
+            "sound": sound_manager.get_status()
         }
         
         yield from picoweb.start_response(resp, content_type="application/json")
@@ -1053,6 +1104,16 @@ def api_system(req, resp):
         except:
             pass
 
+def api_system_boot(req, resp):
+    """Boot timing breakdown (available while boot is still running)"""
+    if boot_orchestrator:
+        data = boot_orchestrator.get_report()
+    else:
+        data = {"error": "Boot report not available"}
+    if module_registry:
+        data['modules'] = module_registry.get_status()
+    yield from json_response(resp, data)
+
 @safe_api_call
 def api_motion(req, resp):
     """Motion detection API endpoint with POST controls"""
@@ -1077,7 +1138,7 @@ def api_motion(req, resp):
                 yield from error_response(resp, "Motion arming not supported")
         elif action == 'test_led':
             if hasattr(motion_detector, 'test_motion_led'):
-                motion_detector.test_motion_led()
+                yield from motion_detector.test_motion_led()
                 yield from success_response(resp, "Motion LED test completed")
             else:
                 yield from error_response(resp, "Motion LED test not available")
@@ -1100,11 +1161,86 @@ def api_motion(req, resp):
         if motion_detector and hasattr(motion_detector, 'get_motion_status'):
             data = motion_detector.get_motion_status()
             data['available'] = True
+            # Photo pages only on request - the status carries a summary
+            if req.qs:
+                try:
+                    data['photos'].update(get_photo_page(req, motion_detector.photo_storage))
+                except ValueError:
+                    yield from error_response(resp, "cursor, limit and since must be integers", "400")
+                    return
         else:
             data = {"error": "Motion detector not available", "available": False}
         
         yield from json_response(resp, data)
 
+@safe_api_call
+def api_motion_events(req, resp):
+    """Motion history between since and until (device timestamps)"""
+    event_log = getattr(motion_detector, 'event_log', None)
+    if not event_log:
+        yield from error_response(resp, "Motion event log not available")
+        return
+    
+    try:
+        since, until, limit = query_ints(req, 'since', 'until', 'limit')
+    except ValueError:
+        yield from error_response(resp, "since, until and limit must be integers", "400")
+        return
+    data = event_log.query(since, until,
+                           min(limit, event_log.max_results) if limit else None)
+    data['hours'] = event_log.hour_histogram()
+    yield from json_response(resp, data)
+
+@safe_api_call
+def api_rules(req, resp):
+    """Automation rules status; POST {"action": "reload"} recompiles the rules file"""
+    if not rules_engine:
+        yield from error_response(resp, "Rules engine not available")
+        return
+    
+    if req.method == "POST":
+        data = yield from parse_json_body(req)
+        if data.get('action') == 'reload':
+            count = rules_engine.load()
+            yield from success_response(resp, f"{count} rules loaded", {"errors": rules_engine.errors})
+        else:
+            yield from error_response(resp, "Invalid action")
+        return
+    
+    yield from json_response(resp, rules_engine.get_status())
+
+def api_events(req, resp):
+    """Server-sent events stream of event bus events (?topics=motion,alarm)"""
+    if len(event_bus.listeners) >= EVENT_BUS_CONFIG.get('SSE_MAX_CLIENTS', 2):
+        yield from error_response(resp, "Too many event streams", status="503")
+        return
+    
+    req.parse_qs()
+    topics = req.form.get('topics')
+    listener = event_bus.listen(topics.split(',') if topics else None)
+    keepalive_ms = EVENT_BUS_CONFIG.get('SSE_KEEPALIVE_S', 15) * 1000
+    try:
+        yield from picoweb.start_response(resp, content_type="text/event-stream", headers={
+            "Cache-Control": "no-cache"
+        })
+        idle_ms = 0
+        while True:
+            item = listener.pop()
+            if item:
+                topic, data = item
+                yield from resp.awrite("event: %s\ndata: %s\n\n" % (topic, json.dumps(data)))
+                idle_ms = 0
+                continue
+            if idle_ms >= keepalive_ms:
+                yield from resp.awrite(": keepalive\n\n")
+                idle_ms = 0
+            yield from asyncio.sleep_ms(200)
+            idle_ms += 200
+    except OSError:
+        pass  # Client went away
+    finally:
+        event_bus.unlisten(listener)
+
 @safe_api_call
 def api_audio(req, resp):
     """PWM Audio API endpoint with POST controls"""
@@ -1161,15 +1297,30 @@ def api_audio(req, resp):
                 sound_played = True
                 
             if sound_played:
-                yield from success_response(resp, f"Sound '{sound}' played")
+                yield from success_response(resp, f"Sound '{sound}' queued")
             else:
                 yield from error_response(resp, f"Sound '{sound}' not available")
         elif action == 'test':
             if hasattr(pwm_audio, 'test_audio_system'):
                 pwm_audio.test_audio_system()
-                yield from success_response(resp, "Audio system test completed")
+                yield from success_response(resp, "Audio system test started")
             else:
                 yield from error_response(resp, "Audio test not available")
+        elif action == 'stop':
+            if hasattr(pwm_audio, 'stop'):
+                seq_id = data.get('id')
+                if seq_id is not None:
+                    try:
+                        seq_id = int(seq_id)
+                    except (TypeError, ValueError):
+                        yield from error_response(resp, "Invalid sound id", "400")
+                        return
+                if pwm_audio.stop(seq_id):
+                    yield from success_response(resp, "Audio stopped")
+                else:
+                    yield from error_response(resp, "Sound not found", "404")
+            else:
+                yield from error_response(resp, "Audio stop not available")
         else:
             yield from error_response(resp, f"Unknown action: {action}")
     else:
@@ -1182,16 +1333,26 @@ def api_audio(req, resp):
         
         yield from json_response(resp, data)
 
+def query_ints(req, *names):
+    """Integer query parameters (None when absent); ValueError if one is not a number"""
+    req.parse_qs()
+    return [int(req.form[name]) if req.form.get(name) else None for name in names]
+
+def get_photo_page(req, storage):
+    """Photo page selected by the cursor, limit and since query parameters
+
+    Raises ValueError when one of them is not a number.
+    """
+    cursor, limit, since = query_ints(req, 'cursor', 'limit', 'since')
+    return storage.get_photo_page(cursor, limit, since)
+
 def api_photos(req, resp):
-    """Photo gallery API endpoint"""
+    """Photo gallery API endpoint (paginated, newest first)"""
     try:
         if motion_detector and motion_detector.photo_storage:
-            photos = motion_detector.photo_storage.get_photo_list()
-            storage_info = motion_detector.photo_storage.get_storage_info()
-            data = {
-                "photos": photos,
-                "storage_info": storage_info
-            }
+            storage = motion_detector.photo_storage
+            data = get_photo_page(req, storage)
+            data['storage_info'] = storage.get_storage_info()
         else:
             data = {"error": "Photo storage not available"}
         
@@ -1199,10 +1360,155 @@ def api_photos(req, resp):
         yield from resp.awrite(json.dumps(data))
     except OSError:
         pass
+    except ValueError:
+        yield from error_response(resp, "cursor, limit and since must be integers", "400")
     except Exception as e:
         yield from picoweb.start_response(resp, status="500")
         yield from resp.awrite('{"error": "API error"}')
 
+def api_photos_export(req, resp):
+    """Download stored photos as one tar archive built on the fly"""
+    storage = motion_detector.photo_storage if motion_detector else None
+    if not storage or not storage.photo_log:
+        yield from picoweb.http_error(resp, "404")
+        return
+    
+    try:
+        since, = query_ints(req, 'since')
+    except ValueError:
+        yield from error_response(resp, "since must be an integer", "400")
+        return
+    members = storage.export_members(since, req.form.get('thumbs') == '1')
+    
+    # Sizes are known up front, so the client gets a real Content-Length
+    yield from picoweb.start_response(resp, content_type="application/x-tar", headers={
+        "Content-Length": str(tar_size([m[1] for m in members])),
+        "Content-Disposition": 'attachment; filename="photos.tar"'
+    })
+    yield from send_tar(resp, members)
+    gc.collect()
+
+def send_photo_entry(req, resp, storage, entry):
+    """Stream one photo-log entry with caching and Range support"""
+    f, length = storage.photo_log.open_photo(entry[E_ID]) if entry else (None, 0)
+    if not f:
+        yield from picoweb.http_error(resp, "404")
+        return
+    
+    # Photos never change once written, so id + CRC is a strong validator
+    try:
+        yield from send_file(req, resp, f, length, "image/jpeg",
+                             offset=f.tell(),
+                             headers={"Cache-Control": CACHE_IMMUTABLE},
+                             etag='"%d-%08x"' % (entry[E_ID], entry[E_CRC]),
+                             last_modified=http_date(entry[E_TIME]))
+    finally:
+        f.close()
+
+def photo_handler(req, resp):
+    """Stored photo handler (by name or id)"""
+    storage = motion_detector.photo_storage if motion_detector else None
+    entry = storage.get_photo_entry(req.url_match.group(1)) if storage else None
+    yield from send_photo_entry(req, resp, storage, entry)
+
+def thumbnail_handler(req, resp):
+    """Thumbnail of a stored photo"""
+    storage = motion_detector.photo_storage if motion_detector else None
+    entry = storage.get_thumbnail_entry(req.url_match.group(1)) if storage else None
+    yield from send_photo_entry(req, resp, storage, entry)
+
+def timelapse_stream(req, resp):
+    """Play a timelapse session back as MJPEG at accelerated speed"""
+    if not timelapse:
+        yield from picoweb.http_error(resp, "404")
+        return
+    
+    try:
+        session_id, fps = query_ints(req, 'session', 'fps')
+    except ValueError:
+        yield from error_response(resp, "session and fps must be integers", "400")
+        return
+    if fps is None:
+        fps = timelapse.playback_fps
+    frames = timelapse.session_frames(session_id)
+    if not frames:
+        yield from picoweb.http_error(resp, "404")
+        return
+    
+    delay_ms = 1000 // max(1, min(fps, 30))
+    photo_log = timelapse.photo_log
+    yield from picoweb.start_response(resp, content_type="multipart/x-mixed-replace; boundary=frame")
+    for entry in frames:
+        f, length = photo_log.open_photo(entry[0])
+        if not f:
+            continue  # Reclaimed while playing
+        try:
+            yield from resp.awrite(b'--frame\r\nContent-Type: image/jpeg\r\n')
+            yield from resp.awrite(b'Content-Length: %d\r\n\r\n' % length)
+            yield from send_region(resp, f, length)
+            yield from resp.awrite(b'\r\n')
+        finally:
+            f.close()
+        yield from asyncio.sleep_ms(delay_ms)
+
+def clip_handler(req, resp):
+    """Recorded motion clip handler with Range support for seeking"""
+    clip_recorder = getattr(motion_detector, 'clip_recorder', None)
+    path = clip_recorder.clip_file(req.url_match.group(1)) if clip_recorder else None
+    if not path:
+        yield from picoweb.http_error(resp, "404")
+        return
+    
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        yield from picoweb.http_error(resp, "404")
+        return
+    
+    try:
+        stat = uos.stat(path)
+        yield from send_file(req, resp, f, stat[6], "video/x-msvideo",
+                             etag='"%x-%x"' % (stat[6], stat[8]),
+                             last_modified=http_date(stat[8]))
+    finally:
+        f.close()
+
+def api_clips(req, resp):
+    """Clip recorder status and clip list"""
+    clip_recorder = getattr(motion_detector, 'clip_recorder', None)
+    if clip_recorder:
+        data = clip_recorder.get_status()
+        data['available'] = True
+    else:
+        data = {"error": "Clip recorder not available", "available": False}
+    yield from json_response(resp, data)
+
+@safe_api_call
+def api_timelapse(req, resp):
+    """Timelapse API endpoint with POST controls"""
+    if not timelapse:
+        yield from error_response(resp, "Timelapse not available")
+        return
+    
+    if req.method == "POST":
+        data = yield from parse_json_body(req)
+        action = data.get('action')
+        
+        if action == 'start':
+            if timelapse.start(data.get('interval')):
+                yield from success_response(resp, f"Timelapse started (every {timelapse.interval_s}s)")
+            else:
+                yield from error_response(resp, "Timelapse could not start (quota reached?)")
+        elif action == 'stop':
+            timelapse.stop()
+            yield from success_response(resp, "Timelapse stopped")
+        else:
+            yield from error_response(resp, f"Unknown action: {action}")
+    else:
+        data = timelapse.get_status()
+        data['sessions'] = timelapse.sessions()
+        yield from json_response(resp, data)
+
 # =============================================================================
 # ROUTES LIST (Enhanced with new APIs)
 # =============================================================================
@@ -1219,9 +1525,20 @@ ROUTES = [
     ("/api/rgb", api_rgb),
     ("/api/alarm", api_alarm),
     ("/api/system", api_system),
+    ("/api/system/boot", api_system_boot),
     ("/api/motion", api_motion),
+    ("/api/motion/events", api_motion_events),
     ("/api/audio", api_audio),
+    ("/api/events", api_events),
+    ("/api/rules", api_rules),
     ("/api/photos", api_photos),
+    ("/api/photos/export", api_photos_export),
+    ("/api/timelapse", api_timelapse),
+    ("/timelapse", timelapse_stream),
+    ("/api/clips", api_clips),
+    (re.compile("^/clips/(.+)$"), clip_handler),
+    (re.compile("^/photos/([^/]+)/thumb$"), thumbnail_handler),
+    (re.compile("^/photos/([^/]+)$"), photo_handler),
 ]
 
 def create_web_server():
@@ -1230,6 +1547,33 @@ def create_web_server():
     app = picoweb.WebApp(__name__, ROUTES)
     return app
 
+def start_server(host="0.0.0.0", port=80, debug=True):
+    """Start listening on the running event loop without blocking
+
+    Used by the boot orchestrator so requests are served while the
+    remaining subsystems are still initializing.
+    """
+    print(f"Starting Smart Home Web Server on {host}:{port}")
+    app = create_web_server()
+    if debug >= 0:
+        import ulogging
+        app.log = ulogging.getLogger("picoweb")
+        if debug > 0:
+            app.log.setLevel(ulogging.DEBUG)
+    app.debug = int(debug)
+    app.init()
+    
+    def handle(reader, writer):
+        if boot_orchestrator:
+            boot_orchestrator.mark_first_request()
+        yield from app._handle(reader, writer)
+    
+    loop = asyncio.get_event_loop()
+    loop.create_task(asyncio.start_server(handle, host, port))
+    if boot_orchestrator:
+        boot_orchestrator.mark_server_started()
+    return app
+
 def run_server(host="0.0.0.0", port=80, debug=True):
     """Run the web server (simple approach)"""
     print(f"Starting Smart Home Web Server on {host}:{port}")
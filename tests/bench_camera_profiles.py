@@ -0,0 +1,59 @@
+# Benchmark Camera Profile Switching
+# Times switching between named camera profiles (delta register writes + settle)
+
+import sys
+sys.path.append('modules')  # Modules import each other by bare name, as in main.py
+import camera
+import utime
+import gc
+from config import get_camera_pin_config
+from camera_settings import camera_store
+
+ROUNDS = 5
+
+print("Camera Profile Switch Benchmark")
+print("===============================")
+
+pins = get_camera_pin_config()
+camera.init(
+    0,
+    d0=pins['D0'], d1=pins['D1'], d2=pins['D2'], d3=pins['D3'],
+    d4=pins['D4'], d5=pins['D5'], d6=pins['D6'], d7=pins['D7'],
+    format=camera.JPEG, xclk_freq=camera.XCLK_20MHz,
+    href=pins['HREF'], vsync=pins['VSYNC'],
+    reset=pins['RESET'], pwdn=pins['PWDN'],
+    sioc=pins['SIOC'], siod=pins['SIOD'],
+    xclk=pins['XCLK'], pclk=pins['PCLK'],
+    fb_location=camera.PSRAM
+)
+
+try:
+    start = utime.ticks_ms()
+    written = camera_store.restore()
+    print("Full apply: " + str(len(written)) + " registers in " + str(utime.ticks_diff(utime.ticks_ms(), start)) + " ms")
+
+    start = utime.ticks_ms()
+    written = camera_store.apply()
+    print("Repeat apply (no changes): " + str(len(written)) + " registers in " + str(utime.ticks_diff(utime.ticks_ms(), start)) + " ms")
+    print("")
+
+    print("Profiles: " + ", ".join(camera_store.profiles))
+    stats = camera_store.benchmark(ROUNDS)
+    for key in stats:
+        s = stats[key]
+        print("   " + key + ": avg " + str(s['avg_ms']) + " ms, max " + str(s['max_ms']) + " ms (" + str(s['count']) + " switches)")
+    print("")
+
+    for name in camera_store.profiles:
+        start = utime.ticks_ms()
+        frame = camera_store.capture(name)
+        elapsed = utime.ticks_diff(utime.ticks_ms(), start)
+        size = len(frame) if frame else 0
+        print("Capture with " + name + ": " + str(size) + " bytes in " + str(elapsed) + " ms")
+        del frame
+        gc.collect()
+finally:
+    camera.deinit()
+
+print("")
+print("Camera profile benchmark completed!")
@@ -0,0 +1,81 @@
+# Benchmark Automation Rules Engine
+# Compares change-driven evaluation with re-evaluating every rule
+
+import sys
+sys.path.append('modules')  # Modules import each other by bare name, as in main.py
+from rules_engine import RulesEngine
+import utime
+import gc
+
+RULE_COUNT = 100
+INPUT_COUNT = 16
+ITERATIONS = 2000
+
+print("Automation Rules Engine Benchmark")
+print("=================================")
+
+def synthetic_rules(count):
+    """Rules over a handful of named inputs plus generic sensor inputs"""
+    rules = []
+    for n in range(count):
+        sensor = 's' + str(n % INPUT_COUNT)
+        conds = [[sensor, '>', n % 50]]
+        if n % 3 == 0:
+            conds.append(['hour', 'between', 22, 6])
+        if n % 4 == 0:
+            conds.append(['motion', '==', True])
+        rules.append({
+            'name': 'rule' + str(n),
+            'all': conds,
+            'any': [['temperature_c', '>=', 28], ['humidity', '>=', 80]] if n % 5 == 0 else [],
+            'actions': []
+        })
+    return rules
+
+fired = [0]
+
+def on_fire(rule):
+    fired[0] += 1
+
+engine = RulesEngine(on_fire=on_fire)
+start = utime.ticks_us()
+engine.compile(synthetic_rules(RULE_COUNT))
+print("Compiled " + str(len(engine.rules)) + " rules over " + str(len(engine.slots)) + " inputs in " + str(utime.ticks_diff(utime.ticks_us(), start)) + " us")
+engine.evaluate()
+print("")
+
+def drive(evaluate):
+    """Change one input per step, as sensor and motion events do, then evaluate"""
+    seed = 4321
+    gc.collect()
+    start = utime.ticks_us()
+    for i in range(ITERATIONS):
+        seed = (seed * 1103515245 + 12345) & 0x7fffffff
+        which = i % (INPUT_COUNT + 2)
+        if which < INPUT_COUNT:
+            engine.set_input('s' + str(which), (seed >> 16) % 60)
+        elif which == INPUT_COUNT:
+            engine.set_input('motion', bool(seed & 1))
+        else:
+            engine.set_input('temperature_c', 20 + (seed >> 16) % 12)
+        evaluate()
+    return utime.ticks_diff(utime.ticks_us(), start)
+
+engine.set_input('hour', 23)
+engine.set_input('humidity', 50)
+engine.evaluate()
+
+for label, evaluate in (("change-driven", engine.evaluate), ("full re-evaluation", engine.evaluate_all)):
+    fired[0] = 0
+    before = engine.rule_evals
+    elapsed = drive(evaluate)
+    rules_run = engine.rule_evals - before
+    print(label + ":")
+    print("   " + str(ITERATIONS) + " evaluations in " + str(elapsed // 1000) + " ms")
+    print("   " + str(elapsed // ITERATIONS) + " us per evaluation, " + str(ITERATIONS * 1000000 // max(1, elapsed)) + " evaluations/s")
+    print("   " + str(rules_run // ITERATIONS) + " rules checked per evaluation, " + str(fired[0]) + " fired")
+    print("")
+
+status = engine.get_status()
+print("Max single evaluation: " + str(status['max_eval_us']) + " us")
+print("Rules engine benchmark completed!")
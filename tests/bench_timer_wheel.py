@@ -0,0 +1,89 @@
+# Benchmark Timer Wheel
+# Cost of advancing the wheel versus checking every job's deadline each tick
+
+import sys
+sys.path.append('modules')  # Modules import each other by bare name, as in main.py
+from timer_wheel import TimerWheel
+import utime
+import gc
+
+JOB_COUNT = 64
+SIMULATED_MS = 60000
+STEP_MS = 10
+
+print("Timer Wheel Benchmark")
+print("=====================")
+
+fired = [0]
+
+def job():
+    fired[0] += 1
+
+def periods():
+    """Mix of fast polls and slow housekeeping, like the main loop's jobs"""
+    return [(50, 100, 250, 1000, 3000, 30000, 60000)[n % 7] + n for n in range(JOB_COUNT)]
+
+def run_wheel():
+    wheel = TimerWheel()
+    base = utime.ticks_ms()
+    for period in periods():
+        wheel.call_at(utime.ticks_add(base, period), job, period)
+    fired[0] = 0
+    gc.collect()
+    start = utime.ticks_us()
+    for t in range(0, SIMULATED_MS, STEP_MS):
+        wheel.advance(utime.ticks_add(base, t))
+    elapsed = utime.ticks_diff(utime.ticks_us(), start)
+    return elapsed, wheel
+
+def run_scan():
+    """Reference: one deadline list checked in full every tick"""
+    base = utime.ticks_ms()
+    jobs = [[utime.ticks_add(base, period), period] for period in periods()]
+    fired[0] = 0
+    gc.collect()
+    start = utime.ticks_us()
+    for t in range(0, SIMULATED_MS, STEP_MS):
+        now = utime.ticks_add(base, t)
+        for entry in jobs:
+            if utime.ticks_diff(entry[0], now) <= 0:
+                entry[0] = utime.ticks_add(entry[0], entry[1])
+                job()
+    return utime.ticks_diff(utime.ticks_us(), start)
+
+steps = SIMULATED_MS // STEP_MS
+elapsed, wheel = run_wheel()
+wheel_fired = fired[0]
+stats = wheel.get_stats()
+print("Timer wheel (" + str(JOB_COUNT) + " jobs, " + str(steps) + " ticks of " + str(STEP_MS) + " ms):")
+print("   " + str(elapsed // 1000) + " ms total, " + str(elapsed // steps) + " us per tick")
+print("   " + str(stats['avg_buckets_per_advance']) + " buckets visited per tick, " + str(wheel_fired) + " jobs fired")
+print("")
+
+elapsed_scan = run_scan()
+print("Full deadline scan:")
+print("   " + str(elapsed_scan // 1000) + " ms total, " + str(elapsed_scan // steps) + " us per tick")
+print("   " + str(JOB_COUNT) + " deadlines checked per tick, " + str(fired[0]) + " jobs fired")
+print("")
+
+def count_wakeups(job_periods):
+    """Wake-ups of a loop that sleeps until the next deadline"""
+    wheel = TimerWheel()
+    base = utime.ticks_ms()
+    for period in job_periods:
+        wheel.call_at(utime.ticks_add(base, period), job, period)
+    t = 0
+    wakeups = 0
+    while t < SIMULATED_MS:
+        wheel.advance(utime.ticks_add(base, t))
+        t += wheel.next_delay(utime.ticks_add(base, t)) or 1
+        wakeups += 1
+    return wakeups
+
+# Sleep-until-deadline versus a fixed 100 ms poll. main always registers the
+# motion poll (MOTION_POLL_MS 100), so on the device the loop still wakes every
+# 100 ms; fewer wake-ups need a longer MOTION_POLL_MS.
+print("Loop wake-ups over " + str(SIMULATED_MS // 1000) + " s (fixed 100 ms poll: " + str(SIMULATED_MS // 100) + "):")
+print("   main's jobs incl. 100 ms motion poll: " + str(count_wakeups((100, 1000, 30000, 60000))))
+print("   without the motion poll (1 s/30 s/60 s): " + str(count_wakeups((1000, 30000, 60000))))
+print("Timer wheel benchmark completed!")
@@ -0,0 +1,83 @@
+# Benchmark Vision Motion Detection
+# Runs the frame-difference detector over recorded (or synthetic) grayscale frames
+
+import sys
+sys.path.append('modules')  # Modules import each other by bare name, as in main.py
+from vision_motion import FrameDiffDetector, ULAB_AVAILABLE
+import uos
+import utime
+import gc
+
+WIDTH = 96
+HEIGHT = 96
+FRAMES_DIR = '/frames'  # Optional: raw 96x96 grayscale dumps (*.gray)
+
+print("Vision Motion Detector Benchmark")
+print("================================")
+print("ulab available: " + str(ULAB_AVAILABLE))
+print("")
+
+def load_recorded_frames():
+    """Load recorded frames if present on flash"""
+    try:
+        names = [n for n in uos.listdir(FRAMES_DIR) if n.endswith('.gray')]
+    except OSError:
+        return []
+    names.sort()
+    frames = []
+    for name in names:
+        with open(FRAMES_DIR + '/' + name, 'rb') as f:
+            frames.append(f.read())
+    return frames
+
+def synthetic_frames(count=40):
+    """Static noisy background with a bright square crossing after frame 20"""
+    frames = []
+    seed = 12345
+    base = bytearray(WIDTH * HEIGHT)
+    for i in range(len(base)):
+        seed = (seed * 1103515245 + 12345) & 0x7fffffff
+        base[i] = 80 + (seed >> 16) % 16
+    for n in range(count):
+        frame = bytearray(base)
+        if n >= 20:
+            x0 = (n - 20) * 3
+            for y in range(30, 60):
+                for x in range(x0, min(x0 + 24, WIDTH)):
+                    frame[y * WIDTH + x] = 220
+        frames.append(frame)
+    return frames
+
+frames = load_recorded_frames()
+source = "recorded"
+if not frames:
+    frames = synthetic_frames()
+    source = "synthetic"
+print("Frames: " + str(len(frames)) + " (" + source + ")")
+
+for use_ulab in ([False, True] if ULAB_AVAILABLE else [False]):
+    detector = FrameDiffDetector(WIDTH, HEIGHT, use_ulab=use_ulab)
+    gc.collect()
+
+    detections = 0
+    total_ms = 0
+    start_all = utime.ticks_ms()
+    for index, frame in enumerate(frames):
+        confidence = detector.process(frame)
+        total_ms += detector.last_process_ms
+        if confidence >= 0.5:
+            detections += 1
+            print("   frame " + str(index) + ": confidence " + str(confidence))
+    wall_ms = utime.ticks_diff(utime.ticks_ms(), start_all)
+
+    stats = detector.get_stats()
+    print("--- " + ("ulab" if use_ulab else "pure Python") + " path ---")
+    print("Average per frame: " + str(total_ms / max(1, len(frames) - 1)) + " ms")
+    print("Worst frame: " + str(stats['max_process_ms']) + " ms (budget " + str(stats['time_budget_ms']) + " ms)")
+    print("Budget overruns: " + str(stats['budget_overruns']))
+    print("Frames with motion: " + str(detections))
+    print("Wall time: " + str(wall_ms) + " ms")
+    print("Free memory: " + str(gc.mem_free()) + " bytes")
+    print("")
+
+print("Vision benchmark completed!")
@@ -1,7 +1,9 @@
 # Test Environmental Sensor Module
 # Standalone test for DHT11 integration module
 
-from modules.environmental_sensor import EnvironmentalSensor
+import sys
+sys.path.append('modules')  # Modules import each other by bare name, as in main.py
+from environmental_sensor import EnvironmentalSensor
 import time
 import gc
 
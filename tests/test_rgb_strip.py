@@ -1,7 +1,9 @@
 # Test Freenove 8-RGB-LED Strip
 # Comprehensive test for all 8 addressable RGB LEDs
 
-from modules.rgb_strip import RGBStrip
+import sys
+sys.path.append('modules')  # Modules import each other by bare name, as in main.py
+from rgb_strip import RGBStrip
 import time
 
 print("Freenove 8-RGB-LED Strip Test")
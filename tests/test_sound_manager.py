@@ -0,0 +1,54 @@
+# Test Sound Manager Module
+# Priority, preemption/resume and coalescing with logging outputs (no speaker needed)
+
+import sys
+sys.path.append('modules')  # Modules import each other by bare name, as in main.py
+from sound_manager import sound_manager, UI, NOTIFICATION, MOTION, ALARM
+from timer_wheel import timer_wheel
+import utime
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+print("Sound Manager Module Test")
+print("=========================")
+
+start = utime.ticks_ms()
+
+def device(name):
+    """Output that prints instead of making sound"""
+    def tone(frequency, volume=None):
+        print(str(utime.ticks_diff(utime.ticks_ms(), start)) + "ms " + name + " " + str(frequency) + "Hz")
+    def silence():
+        pass
+    return tone, silence
+
+sound_manager.add_device('audio', *device('audio'))
+sound_manager.add_device('buzzer', *device('buzzer'))
+print("Routes: " + str(sound_manager.routes))
+print("")
+
+def run():
+    print("--- Motion alert, then repeated UI beeps ---")
+    sound_manager.play(((800, 200), (1000, 200), (1200, 200)), 'motion', MOTION, 0)
+    for _ in range(5):
+        sound_manager.play(((1000, 50),), 'beep', UI)
+    print("Coalesced: " + str(sound_manager.get_status()['coalesced']) + " (expected 4)")
+    yield from asyncio.sleep_ms(300)
+
+    print("--- Alarm preempts motion, which resumes afterwards ---")
+    sound_manager.play(((2000, 150), (0, 50)) * 2, 'alarm', ALARM)
+    yield from asyncio.sleep_ms(1200)
+
+    print("--- Cancel everything below alarm ---")
+    sound_manager.play(((523, 1000),), 'chime', NOTIFICATION)
+    sound_manager.cancel(up_to=MOTION)
+    print("Playing after cancel: " + str(sound_manager.get_status()['playing']))
+    print("")
+    print("Status: " + str(sound_manager.get_status()))
+
+loop = asyncio.get_event_loop()
+loop.create_task(timer_wheel.run())
+loop.run_until_complete(run())
+print("Sound manager test completed!")
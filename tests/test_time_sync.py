@@ -0,0 +1,100 @@
+# Test Time Sync Module
+# SNTP client against a local UDP NTP stand-in (no internet needed)
+
+import sys
+sys.path.append('modules')  # Modules import each other by bare name, as in main.py
+from time_sync import TimeSync, NTP_DELTA
+import usocket as socket
+import ustruct
+import utime
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+PORT = 12300
+OFFSET_MS = 1500    # Stand-in clock ahead of the RTC at start
+DRIFT_PPM = 20000   # Stand-in runs 2% fast - exaggerated so seconds show it
+
+print("Time Sync Module Test")
+print("=====================")
+print("Stand-in on 127.0.0.1:" + str(PORT) + ", offset " + str(OFFSET_MS) + "ms, drift " + str(DRIFT_PPM) + "ppm")
+print("")
+
+sync = TimeSync(servers=[('127.0.0.1', PORT)])
+sync.min_drift_span_ms = 1000
+sync.correct_step_ms = 10
+start_ticks = utime.ticks_ms()
+start_ms = sync.rtc_ms() + OFFSET_MS
+serving = [True]
+answered = [0]
+
+def standin_ms():
+    """Stand-in clock (local time, ms since the epoch)"""
+    elapsed = utime.ticks_diff(utime.ticks_ms(), start_ticks)
+    return start_ms + elapsed + elapsed * DRIFT_PPM // 1000000
+
+def ntp_stamp(ms):
+    ms += (NTP_DELTA - sync.utc_offset_s) * 1000
+    return ms // 1000, ((ms % 1000) << 32) // 1000
+
+def standin():
+    """Answer NTP requests like a stratum 1 server"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(socket.getaddrinfo('127.0.0.1', PORT)[0][-1])
+    sock.setblocking(False)
+    while serving[0]:
+        try:
+            request, addr = sock.recvfrom(48)
+        except OSError:
+            yield from asyncio.sleep_ms(2)
+            continue
+        receive = ntp_stamp(standin_ms())
+        reply = bytearray(48)
+        reply[0] = 0x24  # v4, server
+        reply[1] = 1     # Stratum 1
+        reply[24:32] = request[40:48]  # Origin = client transmit
+        reply[32:40] = ustruct.pack('!II', *receive)
+        reply[40:48] = ustruct.pack('!II', *ntp_stamp(standin_ms()))
+        sock.sendto(reply, addr)
+        answered[0] += 1
+    sock.close()
+
+def error_ms():
+    return sync.rtc_ms() - standin_ms()
+
+def run():
+    yield from asyncio.sleep_ms(50)
+
+    print("--- Initial sync ---")
+    print("RTC error before: " + str(error_ms()) + "ms")
+    ok = yield from sync.sync()
+    print("Synced: " + str(ok) + ", measured offset " + str(sync.last_offset_ms) + "ms, delay " + str(sync.last_delay_ms) + "ms")
+    print("RTC error after: " + str(error_ms()) + "ms")
+    print("")
+
+    print("--- Drift estimate ---")
+    yield from asyncio.sleep_ms(3000)
+    print("RTC error after 3s: " + str(error_ms()) + "ms")
+    yield from sync.sync()
+    print("Re-sync offset " + str(sync.last_offset_ms) + "ms, drift " + str(sync.get_status()['drift_ppm']) + "ppm (expected ~" + str(DRIFT_PPM) + ")")
+    print("")
+
+    print("--- Correction between syncs ---")
+    yield from asyncio.sleep_ms(3000)
+    before = error_ms()
+    applied = sync.correct()
+    print("RTC error " + str(before) + "ms, correction " + str(applied) + "ms, now " + str(error_ms()) + "ms")
+    yield from sync.sync()
+    print("Residual at next sync: " + str(sync.last_offset_ms) + "ms")
+    print("")
+
+    print("Status: " + str(sync.get_status()))
+    print("Requests answered: " + str(answered[0]))
+    serving[0] = False
+
+loop = asyncio.get_event_loop()
+loop.create_task(standin())
+loop.run_until_complete(run())
+print("Time sync test completed!")